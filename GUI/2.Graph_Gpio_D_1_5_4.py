@@ -1,44 +1,105 @@
-import spidev
 import time
+launched_at = time.perf_counter()  # 起動時間の計測用
 #from RPi import GPIO
-import matplotlib
-matplotlib.use('TkAgg')  # Use GUI backend
-from matplotlib import pyplot as plt
-from scipy.ndimage import gaussian_filter1d
-from scipy import signal as scipy_signal
-import gpiod
 import numpy as np
-import socket
 import signal
 import sys
 import atexit
+import argparse
+import json
+from pathlib import Path
+
+from pieeg import BACKENDS, DATA_RATES, DRDY_MODES, open_device
+from pieeg.decimate import MODES as DISPLAY_MODES, Decimator
+from pieeg.device import pieeg16
+from pieeg.bandpower import as_dict, band_powers_mean
+from pieeg.health import AcquisitionHealth, write_json
+from pieeg.channels import CHANNEL_TOPIC, MQTT_BROKER, MQTT_PORT, ChannelPublisher, mqtt_client as connect_mqtt
+from pieeg.control import CONTROL_TOPIC, CallbackSink, ControlPublisher, MqttSink, ShmSink, UdpSink
+from pieeg.recorder import RawRecorder, RecordingThread
+from pieeg.shm import BAND_CHANNEL, BAND_KEYS, BAND_RECORD, ShmPublisher, band_dict, band_record
+from pieeg.stats import ThroughputStats
+
+# ダッシュボードの /api/gpio-config が保存するピン設定（リポジトリ直下の gpio_config.json）を既定値にする
+GPIO_CONFIG_FILE = Path(__file__).resolve().parent.parent / "gpio_config.json"
+try:
+    with open(GPIO_CONFIG_FILE) as f:
+        gpio_config = json.load(f)
+except (OSError, ValueError):
+    gpio_config = {}
+
+parser = argparse.ArgumentParser(description="PiEEG-16 acquisition and live plot")
+parser.add_argument("--rate", type=int, choices=DATA_RATES, default=250,
+                    help="ADS1299 data rate in SPS, written to CONFIG1 on both chips (default: 250)")
+parser.add_argument("--backend", choices=BACKENDS, default="ads1299",
+                    help="ads1299 hardware (default) or the software simulator (no spidev/gpiod needed)")
+parser.add_argument("--sim-speed", type=float, default=1.0,
+                    help="simulator pace as a multiple of real time; 0 = free-run as fast as possible (default: 1)")
+parser.add_argument("--spi", default=pieeg16(int(gpio_config.get('cs_pin', 19))), metavar="PORTS",
+                    help="ADS1299 chips as BUS.DEV[:GPIO_CS][xDAISY],... (default: %(default)s, the PiEEG-16 "
+                         "with cs_pin from gpio_config.json)")
+parser.add_argument("--gpio-chip", default=str(gpio_config.get('gpio_chip', '0')), metavar="CHIP",
+                    help="gpiod chip for DRDY and GPIO chip-selects, e.g. /dev/gpiochip4 on a Pi 5 "
+                         "(default: %(default)s, from gpio_config.json)")
+parser.add_argument("--drdy", choices=DRDY_MODES, default="edge",
+                    help="DRDY detection: kernel edge events (default) or legacy busy-polling")
+parser.add_argument("--plot-hz", type=float, default=10.0,
+                    help="live plot redraw rate, independent of the sample rate (default: 10)")
+parser.add_argument("--display-points", type=int, default=400,
+                    help="points per channel trace across the plot window, independent of the sample rate "
+                         "(default: 400, ~4 per pixel column of a subplot at the default figure size)")
+parser.add_argument("--display-mode", choices=DISPLAY_MODES, default="m4",
+                    help="plot decimation: m4 (first/min/max/last per bucket, default) or lttb keep spikes "
+                         "and blinks; stride is every Nth sample")
+parser.add_argument("--headless", action="store_true",
+                    help="no matplotlib/Tk: acquisition, band power and outputs only, with throughput stats")
+parser.add_argument("--stats-interval", type=float, default=10.0,
+                    help="seconds between throughput reports (default: 10)")
+parser.add_argument("--mqtt-broker", default=None,
+                    help="also publish each band-power update to this MQTT broker (default: off)")
+parser.add_argument("--mqtt-port", type=int, default=MQTT_PORT)
+parser.add_argument("--channel-broker", default=MQTT_BROKER, metavar="HOST[:PORT]",
+                    help=f"MQTT broker for per-channel raw/band-power data on {CHANNEL_TOPIC} (default: %(default)s, '' to disable)")
+parser.add_argument("--channel-batch", type=int, default=5, metavar="BLOCKS",
+                    help="100 ms blocks per channel-data message (default: %(default)s)")
+parser.add_argument("--udp-target", action="append", metavar="HOST[:PORT]", default=None,
+                    help="ESP32 receiving the control value over UDP; repeat for several (default: 172.21.128.229:4210)")
+parser.add_argument("--control-interval", type=float, default=100.0, metavar="MS",
+                    help="minimum gap between control sends per output, newest value wins (default: 100, as web/src/drone.ts)")
+parser.add_argument("--control-topic", default=CONTROL_TOPIC,
+                    help="MQTT topic for {v, arm, ts} control JSON when --mqtt-broker is set (default: %(default)s)")
+parser.add_argument("--arm", action="store_true",
+                    help="send armed control commands (arm: true spins the drone's motors; default: disarmed)")
+parser.add_argument("--udp-format", choices=("binary", "ascii"), default="binary",
+                    help="ESP32 control packet: 32-byte binary with seq/timestamp/bands (default) or the legacy ASCII value")
+parser.add_argument("--record", metavar="PATH", default=None,
+                    help="losslessly record every decoded sample (with timestamps and status) to PATH")
+parser.add_argument("--json-file", default=None, metavar="PATH",
+                    help="also write each update to PATH (e.g. /tmp/latest_eeg_data.json) for older readers (default: off)")
+parser.add_argument("--health-file", default="/tmp/pieeg_health.json",
+                    help="JSON health/throughput summary rewritten every --stats-interval (default: %(default)s, '' to disable)")
+args = parser.parse_args()
+
+if not args.headless:
+    import matplotlib
+    matplotlib.use('TkAgg')  # Use GUI backend
+    from pieeg.filters import StreamingFilter, chain_sos
+    from pieeg.liveplot import LivePlot
+
+# ヘッドレスでは1ウィンドウごとのログを省き、定期的なスループット表示のみ
+verbose = not args.headless
 
 #GPIO.setwarnings(False) 
 #GPIO.setmode(GPIO.BOARD)
 
-button_pin_1 =  26 #13
-button_pin_2 =  13
-cs_pin = 19
-#chip = gpiod.Chip("gpiochip4")
-# chip = gpiod.chip("/dev/gpiochip4")
+button_pin_1 = int(gpio_config.get('button_pin_1', 26))  # DRDY
+button_pin_2 = int(gpio_config.get('button_pin_2', 13))
+# 取得は pieeg.open_device に任せる: バックエンドを開き、全チップを同じレジスタ表で設定し、
+# 取得スレッド（DRDY→SPI→デコード→リングバッファ）を起動する
+# --backend sim はハードウェア不要（web/src/simulator.ts と同じ合成EEGを27バイトのADS1299フレームとして出す）
 try:
-    chip = gpiod.chip("0")
-    cs_line = chip.get_line(cs_pin)
-    cs_request = gpiod.line_request()
-    cs_request.consumer = "SPI_CS"
-    cs_request.request_type = gpiod.line_request.DIRECTION_OUTPUT
-    cs_line.request(cs_request)
-
-    cs_line.set_value(1)  # Set CS high initially
-
-    line_1 = chip.get_line(button_pin_1)
-    btn_request = gpiod.line_request()
-    btn_request.consumer = "Button"
-    btn_request.request_type = gpiod.line_request.DIRECTION_INPUT
-    line_1.request(btn_request)
-    
-    print("✅ GPIO initialization successful")
-    
+    stream = open_device(args.backend, args.rate, spi=args.spi, drdy=args.drdy, drdy_pin=button_pin_1,
+                         gpio_chip=args.gpio_chip, sim_speed=args.sim_speed or None)
 except OSError as e:
     if e.errno == 16:  # Device or resource busy
         print("❌ GPIO Error: Device or resource busy")
@@ -52,22 +113,33 @@ except OSError as e:
         print(f"❌ GPIO Error: {e}")
         sys.exit(1)
 
+device = stream.device
+health = stream.health  # チップ別ステータス異常、DRDY取りこぼし、実効サンプルレート、各段の処理時間
+if args.backend == "sim":
+    print(f"🧪 Simulated PiEEG ({args.sim_speed or 'free-run'} x real time)")
+else:
+    print(f"✅ GPIO initialization successful (DRDY mode: {stream.drdy.mode})")
+print(f"✅ {device.chips} x ADS1299 configured: {device.channels} channels at {args.rate} SPS")
+
 # GPIO cleanup function
 def cleanup_gpio():
     """Clean up GPIO resources"""
-    global cs_line, line_1, spi, spi_2, udp_socket
+    global stream
     try:
         print("Cleaning up GPIO resources...")
-        if 'cs_line' in globals():
-            cs_line.release()
-        if 'line_1' in globals():
-            line_1.release()
-        if 'spi' in globals():
-            spi.close()
-        if 'spi_2' in globals():
-            spi_2.close()
-        if 'udp_socket' in globals():
-            udp_socket.close()
+        if 'stream' in globals():
+            stream.close()
+        if globals().get('recording') is not None:
+            recording.stop()
+        if 'control' in globals():
+            control.stop()  # v=0・disarm を即送信してから各出力を閉じる
+        if 'band_channel' in globals():
+            band_channel.close()
+        if globals().get('channel_publisher') is not None:
+            channel_publisher.stop()
+        for client in {globals().get('mqtt_client'), globals().get('channel_client')} - {None}:
+            client.loop_stop()
+            client.disconnect()
         print("GPIO cleanup completed")
     except Exception as e:
         print(f"Error during GPIO cleanup: {e}")
@@ -91,652 +163,209 @@ signal.signal(signal.SIGTERM, signal_handler)
 #button_line_2.request_type = gpiod.line_request.DIRECTION_INPUT
 #line_2.request(button_line_2)
 
-spi = spidev.SpiDev()
-spi.open(0,0)
-spi.max_speed_hz  = 4000000#600000
-spi.lsbfirst=False
-spi.mode=0b01
-spi.bits_per_word = 8
-
-spi_2 = spidev.SpiDev()
-spi_2.open(0,1)
-spi_2.max_speed_hz=4000000#600000
-spi_2.lsbfirst=False
-spi_2.mode=0b01
-spi_2.bits_per_word = 8
-
-who_i_am=0x00
-config1=0x01
-config2=0X02
-config3=0X03
-
-reset=0x06
-stop=0x0A
-start=0x08
-sdatac=0x11
-rdatac=0x10
-wakeup=0x02
-rdata = 0x12
-
-ch1set=0x05
-ch2set=0x06
-ch3set=0x07
-ch4set=0x08
-ch5set=0x09
-ch6set=0x0A
-ch7set=0x0B
-ch8set=0x0C
-
-data_test= 0x7FFFFF
-data_check=0xFFFFFF
-
-def read_byte(register):
- write=0x20
- register_write=write|register
- data = [register_write,0x00,register]
- read_reg=spi.xfer(data)
- print ("data", read_reg)
- 
-def send_command(command):
- send_data = [command]
- com_reg=spi.xfer(send_data)
- 
-def write_byte(register,data):
- write=0x40
- register_write=write|register
- data = [register_write,0x00,data]
- print (data)
- spi.xfer(data)
-
-def read_byte_2(register):
- write=0x20
- register_write=write|register
- data = [register_write,0x00,register]
- cs_line.set_value(0)
- read_reg=spi.xfer(data)
- cs_line.set_value(1)
- print ("data", read_reg)
- 
-def send_command_2(command):
- send_data = [command]
- cs_line.set_value(0)
- spi_2.xfer(send_data)
- cs_line.set_value(1)
- 
-def write_byte_2(register,data):
- write=0x40
- register_write=write|register
- data = [register_write,0x00,data]
- print (data)
-
- cs_line.set_value(0)
- spi_2.xfer(data)
- cs_line.set_value(1)
-
- 
-
-send_command (wakeup)
-send_command (stop)
-send_command (reset)
-send_command (sdatac)
-
-write_byte (0x14, 0x80) #GPIO 80
-write_byte (config1, 0x96)
-write_byte (config2, 0xD4)
-write_byte (config3, 0xFF)
-write_byte (0x04, 0x00)
-write_byte (0x0D, 0x00)
-write_byte (0x0E, 0x00)
-write_byte (0x0F, 0x00)
-write_byte (0x10, 0x00)
-write_byte (0x11, 0x00)
-write_byte (0x15, 0x20)
-#
-write_byte (0x17, 0x00)
-write_byte (ch1set, 0x00)
-write_byte (ch2set, 0x00)
-write_byte (ch3set, 0x00)
-write_byte (ch4set, 0x00)
-write_byte (ch5set, 0x00)
-write_byte (ch6set, 0x00)
-write_byte (ch7set, 0x00)
-write_byte (ch8set, 0x00)
-
-send_command (rdatac)
-send_command (start)
-
-
-send_command_2 (wakeup)
-send_command_2 (stop)
-send_command_2 (reset)
-send_command_2 (sdatac)
-
-write_byte_2 (0x14, 0x80) #GPIO 80
-write_byte_2 (config1, 0x96)
-write_byte_2 (config2, 0xD4)
-write_byte_2 (config3, 0xFF)
-write_byte_2 (0x04, 0x00)
-write_byte_2 (0x0D, 0x00)
-write_byte_2 (0x0E, 0x00)
-write_byte_2 (0x0F, 0x00)
-write_byte_2 (0x10, 0x00)
-write_byte_2 (0x11, 0x00)
-write_byte_2 (0x15, 0x20)
-#
-write_byte_2 (0x17, 0x00)
-write_byte_2 (ch1set, 0x00)
-write_byte_2 (ch2set, 0x00)
-write_byte_2 (ch3set, 0x00)
-write_byte_2 (ch4set, 0x00)
-write_byte_2 (ch5set, 0x00)
-write_byte_2 (ch6set, 0x00)
-write_byte_2 (ch7set, 0x00)
-write_byte_2 (ch8set, 0x00)
-
-send_command_2 (rdatac)
-send_command_2 (start)
-
 DRDY=1
 
-result=[0]*27
-result_2=[0]*27
-
-
-data_1ch_test = []
-data_2ch_test = []
-data_3ch_test = []
-data_4ch_test = []
-data_5ch_test = []
-data_6ch_test = []
-data_7ch_test = []
-data_8ch_test = []
-
-data_9ch_test = []
-data_10ch_test = []
-data_11ch_test = []
-data_12ch_test = []
-data_13ch_test = []
-data_14ch_test = []
-data_15ch_test = []
-data_16ch_test = []
-
-axis_x=0
-y_minus_graph=100
-y_plus_graph=100
-x_minux_graph=5000
-x_plus_graph=250
-sample_len = 250
-
-fig, axis = plt.subplots(4, 4, figsize=(5, 5))
-plt.subplots_adjust(hspace=1)
-ch_name = 0
-ch_name_title = [1,5,2,6,3,7,4,8]
-axi = [(i, j) for i in range(4) for j in range(2)]
-for ax_row, ax_col in axi:
-    axis[ax_row, ax_col].set_xlabel('Time')
-    axis[ax_row, ax_col].set_ylabel('Amplitude')
-    axis[ax_row, ax_col].set_title('Data after pass filter Ch-' + str(ch_name_title[ch_name]))
-    ch_name = ch_name + 1    
-    
-test_DRDY = 5 
-test_DRDY_2 = 5
 #1.2 Band-pass filter
-data_before = []
-data_after =  []
-just_one_time = 0
-data_lenght_for_Filter = 2     # how much we read data for filter, all lenght  [_____] + [_____] + [_____]
-read_data_lenght_one_time = 1   # for one time how much read  [_____]
-sample_len = 250
-sample_lens = 250
-fps = 250
-theta_lowcut = 4
-theta_highcut = 8
-alpha_lowcut = 8
-alpha_highcut = 12
-beta_lowcut = 13
-beta_highcut = 30
-gamma_lowcut = 30
-gamma_highcut = 100
-data_before_1 = data_before_2 = data_before_3 = data_before_4 = data_before_5 = data_before_6 = data_before_7 = data_before_8 = [0]*250
-data_before_9 = data_before_10 = data_before_11 = data_before_12 = data_before_13 = data_before_14 = data_before_15 = data_before_16 = [0]*250
-
-print (data_lenght_for_Filter*read_data_lenght_one_time-read_data_lenght_one_time)
-
-def butter_lowpass(cutoff, fs, order=5):
-    nyq = 0.5 * fs
-    normal_cutoff = cutoff / nyq
-    b, a = scipy_signal.butter(order, normal_cutoff, btype='low', analog=False)
-    return b, a
-def butter_lowpass_filter(data, cutoff, fs, order=5):
-    b, a = butter_lowpass(cutoff, fs, order=order)
-    y = scipy_signal.lfilter(b, a, data)
-    return y
-def butter_highpass(cutoff, fs, order=3):
-    nyq = 0.5 * fs
-    normal_cutoff = cutoff / nyq
-    b, a = scipy_signal.butter(order, normal_cutoff, btype='high', analog=False)
-    return b, a
-def butter_highpass_filter(data, cutoff, fs, order=5):
-    b, a = butter_highpass(cutoff, fs, order=order)
-    y = scipy_signal.filtfilt(b, a, data)
-    return y
-
-def butter_bandpass(lowcut, highcut, fs, order=5):
-    nyq = 0.5 * fs
-    low = lowcut / nyq
-    high = highcut / nyq
-    b, a = scipy_signal.butter(order, [low, high], btype='band')
-    return b, a
-
-def butter_bandpass_filter(data, lowcut, highcut, fs, order=5):
-    b, a = butter_bandpass(lowcut, highcut, fs, order=order)
-    y = scipy_signal.filtfilt(b, a, data)
-    return y
-
-def detect_all_brainwaves(data, fs):
-    theta_filtered = butter_bandpass_filter(data, theta_lowcut, theta_highcut, fs)
-    alpha_filtered = butter_bandpass_filter(data, alpha_lowcut, alpha_highcut, fs)
-    beta_filtered = butter_bandpass_filter(data, beta_lowcut, beta_highcut, fs)
-    gamma_filtered = butter_bandpass_filter(data, gamma_lowcut, gamma_highcut, fs)
-    
-    theta_power = np.mean(theta_filtered**2)
-    alpha_power = np.mean(alpha_filtered**2)
-    beta_power = np.mean(beta_filtered**2)
-    gamma_power = np.mean(gamma_filtered**2)
-    
-    return theta_power, alpha_power, beta_power, gamma_power
+fps = args.rate  # 以下の窓長・フィルタ・帯域パワーはすべてこのレートから決まる
+sample_len = fps  # 帯域パワーの窓: 1秒
+plot_seconds = 20  # 表示する時間幅 (s)
 
-import socket
+# フィルタ: SOSを一度だけ設計し、全chを状態(zi)付きで連続処理する（表示用 1 Hz high-pass → 10 Hz low-pass）
+if not args.headless:
+    display_filter = StreamingFilter(chain_sos(fps, ('highpass', 1, 5), ('lowpass', 10, 5)), channels=device.channels)
 
 # UDP設定（ESP32-S3に直接送信）
 UDP_IP = "172.21.128.229"  # ESP32-S3のIPアドレス（環境に応じて変更）
 UDP_PORT = 4210
-udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
-print(f"UDP client configured to send to {UDP_IP}:{UDP_PORT}")
-
-def send_brainwave_powers_udp(theta_power, alpha_power, beta_power, gamma_power):
+def brainwave_control_value(theta_power, alpha_power, beta_power, gamma_power):
     """
-    脳波パワー（α、β、θ、γ）の比率をUDPで送信
+    脳波パワー（α、β、θ、γ）の比率から制御値(0-10)を計算
     """
-    try:
-        # 脳波パワーの合計値を計算
-        total_power = theta_power + alpha_power + beta_power + gamma_power
+    # 脳波パワーの合計値を計算
+    total_power = theta_power + alpha_power + beta_power + gamma_power
+    
+    # ゼロ除算を防ぐ
+    if total_power == 0:
+        scaled_power = 2.5  # デフォルト値（中央）
+    else:
+        # 各脳波の比率を計算
+        theta_ratio = theta_power / total_power
+        alpha_ratio = alpha_power / total_power
+        beta_ratio = beta_power / total_power
+        gamma_ratio = gamma_power / total_power
         
-        # ゼロ除算を防ぐ
-        if total_power == 0:
-            scaled_power = 2.5  # デフォルト値（中央）
+        # 最も強い脳波に基づいて0-10の値にマッピング
+        if theta_ratio > 0.4:  # Theta優勢
+            scaled_power = 0.5 + theta_ratio * 1.5  # 0.5-2.0の範囲
+        elif alpha_ratio > 0.4:  # Alpha優勢
+            scaled_power = 2.0 + alpha_ratio * 2.0  # 2.0-4.0の範囲
+        elif beta_ratio > 0.4:  # Beta優勢
+            scaled_power = 4.0 + beta_ratio * 2.0  # 4.0-6.0の範囲
+        elif gamma_ratio > 0.4:  # Gamma優勢
+            scaled_power = 6.0 + gamma_ratio * 3.0  # 6.0-9.0の範囲
         else:
-            # 各脳波の比率を計算
-            theta_ratio = theta_power / total_power
-            alpha_ratio = alpha_power / total_power
-            beta_ratio = beta_power / total_power
-            gamma_ratio = gamma_power / total_power
-            
-            # 最も強い脳波に基づいて0-10の値にマッピング
-            if theta_ratio > 0.4:  # Theta優勢
-                scaled_power = 0.5 + theta_ratio * 1.5  # 0.5-2.0の範囲
-            elif alpha_ratio > 0.4:  # Alpha優勢
-                scaled_power = 2.0 + alpha_ratio * 2.0  # 2.0-4.0の範囲
-            elif beta_ratio > 0.4:  # Beta優勢
-                scaled_power = 4.0 + beta_ratio * 2.0  # 4.0-6.0の範囲
-            elif gamma_ratio > 0.4:  # Gamma優勢
-                scaled_power = 6.0 + gamma_ratio * 3.0  # 6.0-9.0の範囲
-            else:
-                # 混在状態
-                scaled_power = 2.5 + (beta_ratio + gamma_ratio) * 2.5  # 集中度に応じて2.5-5.0
-        
-        # 範囲を0-10に制限
-        scaled_power = max(0.0, min(scaled_power, 10.0))
-        
-        # UDP送信
-        message = f"{scaled_power:.2f}"
-        udp_socket.sendto(message.encode(), (UDP_IP, UDP_PORT))
-        
-        print(f"Sent brainwave data: Total={total_power:.6f} -> Scaled={scaled_power:.2f}")
-        print(f"  Ratios - θ:{theta_ratio:.3f} α:{alpha_ratio:.3f} β:{beta_ratio:.3f} γ:{gamma_ratio:.3f}")
-        
-    except Exception as e:
-        print(f"Failed to send UDP data: {e}")
+            # 混在状態
+            scaled_power = 2.5 + (beta_ratio + gamma_ratio) * 2.5  # 集中度に応じて2.5-5.0
+    
+    # 範囲を0-10に制限
+    return max(0.0, min(scaled_power, 10.0))
+
+# MQTT（--mqtt-broker 指定時のみ）: ダッシュボード(app.py)が購読するトピックへ送信
+MQTT_TOPIC = "pieeg/m5stamp/commands"
+mqtt_client = None
+if args.mqtt_broker:
+    mqtt_client = connect_mqtt(args.mqtt_broker, args.mqtt_port)
+    print(f"MQTT publishing to {args.mqtt_broker}:{args.mqtt_port} topic {MQTT_TOPIC}")
+
+# chごとのデータ（間引いた生波形＋ch別帯域パワー）を pieeg/channels/data へ: 別マシンのダッシュボード用
+# 接続は1本を使い回し（--mqtt-broker と同じブローカーなら共用）、QoS 0、100 msブロックを --channel-batch 個ずつまとめて送る
+channel_client = None
+if args.channel_broker:
+    host, _, port = args.channel_broker.partition(':')
+    port = int(port or args.mqtt_port)
+    try:
+        channel_client = mqtt_client if (host, port) == (args.mqtt_broker, args.mqtt_port) else connect_mqtt(host, port)
+        print(f"Channel data published to {host}:{port} topic {CHANNEL_TOPIC} ({args.channel_batch} blocks/message)")
+    except ImportError:
+        print("⚠️  paho-mqtt not installed: channel data not published")
+
+# ダッシュボードへの受け渡し: 共有メモリのリング（pieeg.shm）。全更新を順番通り・欠落なしで読める
+try:
+    band_channel = ShmPublisher(BAND_CHANNEL)
+except FileExistsError as e:  # 別のスクリプトが配信中: 乗っ取らずに終了
+    sys.exit(f"✗ {e}")
+print(f"Band powers published on shared memory channel '{BAND_CHANNEL}'")
 
-def send_mqtt_command(theta_power, alpha_power, beta_power, gamma_power):
+def publish_dashboard(cmd):
     """
-    Dashboard用データ保存（ファイル競合対策版）
+    互換用のJSONファイル/MQTT（制御出力の送信スレッドで実行）
+    """
+    command = band_dict(np.array(band_record(cmd.ts / 1000, dict(zip(BAND_KEYS, cmd.bands))), dtype=BAND_RECORD))
+    if args.json_file:
+        # 旧来のJSONファイル（一時ファイル経由でatomicに置き換え）
+        write_json(args.json_file, command)
+    if mqtt_client is not None:
+        mqtt_client.publish(MQTT_TOPIC, json.dumps(command), qos=0)
+
+# 制御値の出力: 出力ごとの送信スレッドが最新値だけを保持し、--control-interval 以上の間隔で送る
+# （遅い・落ちている出力があっても取得・解析ループは待たない。送れずに上書きされた値は破棄して数える）
+def udp_sink(target):
+    host, _, port = target.partition(':')
+    return UdpSink(host, int(port or UDP_PORT), args.udp_format)
+
+control_sinks = [udp_sink(t) for t in (args.udp_target or [f"{UDP_IP}:{UDP_PORT}"])]
+if mqtt_client is not None:
+    control_sinks.append(MqttSink(mqtt_client, args.control_topic))
+control_sinks.append(ShmSink())
+if args.json_file or mqtt_client is not None:
+    control_sinks.append(CallbackSink("dashboard", publish_dashboard))
+control = ControlPublisher(control_sinks, min_interval=args.control_interval / 1000)
+print(f"Control outputs ({args.udp_format} UDP, >= {args.control_interval:.0f} ms apart, "
+      f"{'ARMED' if args.arm else 'disarmed'}): {', '.join(sink.name for sink in control_sinks)}")
+
+def publish_outputs(powers):
+    """
+    帯域パワーの配信: 共有メモリへはその場で書き、ネットワーク/ファイルへは制御出力に最新値を渡すだけ
     """
-    powers = {
-        "theta": theta_power,
-        "alpha": alpha_power,
-        "beta": beta_power,
-        "gamma": gamma_power
-    }
-    
-    dominant_wave = max(powers, key=powers.get)
-    
-    command = {
-        "timestamp": time.time(),
-        "theta_power": float(theta_power),
-        "alpha_power": float(alpha_power),
-        "beta_power": float(beta_power),
-        "gamma_power": float(gamma_power),
-        "dominant_wave": dominant_wave,
-        "command": dominant_wave
-    }
-    
     try:
-        # Dashboard用のローカルファイル保存（一時ファイル経由で安全に）
-        import json
-        import tempfile
-        import os
-        
-        # 一時ファイルに書き込んでから移動（atomic operation）
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as tmp_file:
-            json.dump(command, tmp_file, indent=2)
-            tmp_path = tmp_file.name
-        
-        # 元のファイルに移動
-        os.rename(tmp_path, '/tmp/latest_eeg_data.json')
-        
-        print(f"✓ Dashboard updated: {dominant_wave.upper()}")
-        print(f"  θ:{theta_power:.6f} α:{alpha_power:.6f} β:{beta_power:.6f} γ:{gamma_power:.6f}")
-        
+        band_channel.publish(band_record(time.time(), powers))
     except Exception as e:
         print(f"✗ Dashboard update failed: {e}")
 
-while 1:
-    
-    
-    #print ("1", button_state)
-    #print("2", button_state_2)
-
-        #print ("ok3")
-        button_state = line_1.get_value()
-        #print (button_state)
-        if button_state == 1:
-            test_DRDY = 10
-        if test_DRDY == 10 and button_state == 0:
-            test_DRDY = 0 
-
-            output=spi.readbytes(27)
-            
-            cs_line.set_value(0)
-            output_2=spi_2.readbytes(27)
-            cs_line.set_value(1)
-
-#            print (output[0],output[1],output[2])
-            if output_2[0]==192 and output_2[1] == 0 and output_2[2] == 8:
-                #print ("ok4")
-                for a in range (3,25,3):
-                    voltage_1=(output[a]<<8)| output[a+1]
-                    voltage_1=(voltage_1<<8)| output[a+2]
-                    convert_voktage=voltage_1|data_test
-                    if convert_voktage==data_check:
-                        voltage_1_after_convert=(voltage_1-16777214)
-                    else:
-                       voltage_1_after_convert=voltage_1
-                    channel_num =  (a/3)
-
-                    result[int (channel_num)]=round(1000000*4.5*(voltage_1_after_convert/16777215),2)
-
-                data_1ch_test.append(result[1])
-                data_2ch_test.append(result[2])
-                data_3ch_test.append(result[3])
-                data_4ch_test.append(result[4])
-                data_5ch_test.append(result[5])
-                data_6ch_test.append(result[6])
-                data_7ch_test.append(result[7])
-                data_8ch_test.append(result[8])
-
-
-                for a in range (3,25,3):
-                    voltage_1=(output_2[a]<<8)| output_2[a+1]
-                    voltage_1=(voltage_1<<8)| output_2[a+2]
-                    convert_voktage=voltage_1|data_test
-                    if convert_voktage==data_check:
-                        voltage_1_after_convert=(voltage_1-16777214)
-                    else:
-                       voltage_1_after_convert=voltage_1
-                    channel_num =  (a/3)
-
-                    result_2[int (channel_num)]=round(1000000*4.5*(voltage_1_after_convert/16777215),2)
-
-                data_9ch_test.append(result_2[1])
-                data_10ch_test.append(result_2[2])
-                data_11ch_test.append(result_2[3])
-                data_12ch_test.append(result_2[4])
-                data_13ch_test.append(result_2[5])
-                data_14ch_test.append(result_2[6])
-                data_15ch_test.append(result_2[7])
-                data_16ch_test.append(result_2[8])
-
-
-                
-                
-                if len(data_9ch_test)==sample_len:
-
-
-                    data_after_1 = data_1ch_test        
-                    dataset_1 =  data_before_1 + data_after_1
-                    data_before_1 = dataset_1[250:]
-                    data_for_graph_1 = dataset_1
-
-                    data_filt_numpy_high_1 = butter_highpass_filter(data_for_graph_1, 1, fps)
-                    data_for_graph_1 = butter_lowpass_filter(data_filt_numpy_high_1, 10, fps)
-
-                    axis[0,0].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_1[250:], color = '#0a0b0c')  
-                    axis[0,0].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_1[50]-y_minus_graph, data_for_graph_1[150]+y_plus_graph])
-                    
-                    theta_power_1, alpha_power_1, beta_power_1, gamma_power_1 = detect_all_brainwaves(data_for_graph_1, fps)
-
-                    # 2
-                    data_after_2 = data_2ch_test        
-                    dataset_2 =  data_before_2 + data_after_2
-                    data_before_2 = dataset_2[250:]
-                    data_for_graph_2 = dataset_2
-
-                    data_filt_numpy_high_2 = butter_highpass_filter(data_for_graph_2, 1, fps)
-                    data_for_graph_2 = butter_lowpass_filter(data_filt_numpy_high_2, 10, fps)
-
-                    axis[1,0].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_2[250:], color = '#0a0b0c')  
-                    axis[1,0].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_2[50]-y_minus_graph, data_for_graph_2[150]+y_plus_graph])
-
-                    # 3
-                    data_after_3 = data_3ch_test        
-                    dataset_3 =  data_before_3 + data_after_3
-                    data_before_3 = dataset_3[250:]
-                    data_for_graph_3 = dataset_3
-
-                    data_filt_numpy_high_3 = butter_highpass_filter(data_for_graph_3, 1, fps)
-                    data_for_graph_3 = butter_lowpass_filter(data_filt_numpy_high_3, 10, fps)
-
-                    axis[2,0].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_3[250:], color = '#0a0b0c')  
-                    axis[2,0].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_3[50]-y_minus_graph, data_for_graph_3[150]+y_plus_graph])
-
-                    # 4
-                    data_after_4 = data_4ch_test        
-                    dataset_4 =  data_before_4 + data_after_4
-                    data_before_4 = dataset_4[250:]
-                    data_for_graph_4 = dataset_4
-
-                    data_filt_numpy_high_4 = butter_highpass_filter(data_for_graph_4, 1, fps)
-                    data_for_graph_4 = butter_lowpass_filter(data_filt_numpy_high_4, 10, fps)
-
-                    axis[3,0].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_4[250:], color = '#0a0b0c')  
-                    axis[3,0].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_4[50]-y_minus_graph, data_for_graph_4[150]+y_plus_graph])
-
-                    #5
-                    data_after_5 = data_5ch_test        
-                    dataset_5 =  data_before_5 + data_after_5
-                    data_before_5 = dataset_5[250:]
-                    data_for_graph_5 = dataset_5
-
-                    data_filt_numpy_high_5 = butter_highpass_filter(data_for_graph_5, 1, fps)
-                    data_for_graph_5 = butter_lowpass_filter(data_filt_numpy_high_5, 10, fps)
-
-                    axis[0,1].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_5[250:], color = '#0a0b0c')  
-                    axis[0,1].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_5[50]-y_minus_graph, data_for_graph_5[150]+y_plus_graph])
-                     
-                    #6
-                    data_after_6 = data_6ch_test        
-                    dataset_6 =  data_before_6 + data_after_6
-                    data_before_6 = dataset_6[250:]
-                    data_for_graph_6 = dataset_6
-
-                    data_filt_numpy_high_6 = butter_highpass_filter(data_for_graph_6, 1, fps)
-                    data_for_graph_6 = butter_lowpass_filter(data_filt_numpy_high_6, 10, fps)
-
-                    axis[1,1].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_6[250:], color = '#0a0b0c')  
-                    axis[1,1].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_6[50]-y_minus_graph, data_for_graph_6[150]+y_plus_graph])
-
-                    #7
-                    data_after_7 = data_7ch_test        
-                    dataset_7 =  data_before_7 + data_after_7
-                    data_before_7 = dataset_7[250:]
-                    data_for_graph_7 = dataset_7
-
-                    data_filt_numpy_high_7 = butter_highpass_filter(data_for_graph_7, 1, fps)
-                    data_for_graph_7 = butter_lowpass_filter(data_filt_numpy_high_7, 10, fps)
-
-                    axis[2,1].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_7[250:], color = '#0a0b0c')  
-                    axis[2,1].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_7[50]-y_minus_graph, data_for_graph_1[150]+y_plus_graph])
-
-                    #8
-                    data_after_8 = data_8ch_test        
-                    dataset_8 =  data_before_8 + data_after_8
-                    data_before_8 = dataset_8[250:]
-                    data_for_graph_8 = dataset_8
-
-                    data_filt_numpy_high_8 = butter_highpass_filter(data_for_graph_8, 1, fps)
-                    data_for_graph_8 = butter_lowpass_filter(data_filt_numpy_high_8, 10, fps)
-
-                    axis[3,1].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_8[250:], color = '#0a0b0c')  
-                    axis[3,1].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_8[50]-y_minus_graph, data_for_graph_8[150]+y_plus_graph])
-                    
-                    # 9
-                    data_after_9 = data_9ch_test        
-                    dataset_9 =  data_before_9 + data_after_9
-                    data_before_9 = dataset_9[250:]
-                    data_for_graph_9 = dataset_9
-
-                    data_filt_numpy_high_9 = butter_highpass_filter(data_for_graph_9, 1, fps)
-                    data_for_graph_9 = butter_lowpass_filter(data_filt_numpy_high_9, 10, fps)
-
-                    axis[0,2].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_9[250:], color = '#0a0b0c')  
-                    axis[0,2].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_9[50]-y_minus_graph, data_for_graph_9[150]+y_plus_graph])
-
-                    # 10
-                    data_after_10 = data_10ch_test        
-                    dataset_10 =  data_before_10 + data_after_10
-                    data_before_10 = dataset_10[250:]
-                    data_for_graph_10 = dataset_10
-
-                    data_filt_numpy_high_10 = butter_highpass_filter(data_for_graph_10, 1, fps)
-                    data_for_graph_10 = butter_lowpass_filter(data_filt_numpy_high_10, 10, fps)
-
-                    axis[1,2].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_10[250:], color = '#0a0b0c')  
-                    axis[1,2].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_10[50]-y_minus_graph, data_for_graph_10[150]+y_plus_graph])
-
-                    # 11
-                    data_after_11 = data_11ch_test        
-                    dataset_11 =  data_before_11 + data_after_11
-                    data_before_11 = dataset_11[250:]
-                    data_for_graph_11 = dataset_11
-
-                    data_filt_numpy_high_11 = butter_highpass_filter(data_for_graph_11, 1, fps)
-                    data_for_graph_11 = butter_lowpass_filter(data_filt_numpy_high_11, 10, fps)
-
-                    axis[2,2].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_11[250:], color = '#0a0b0c')  
-                    axis[2,2].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_11[50]-y_minus_graph, data_for_graph_11[150]+y_plus_graph])
-
-                    # 12
-                    data_after_12 = data_12ch_test        
-                    dataset_12 =  data_before_12 + data_after_12
-                    data_before_12 = dataset_12[250:]
-                    data_for_graph_12 = dataset_12
-
-                    data_filt_numpy_high_12 = butter_highpass_filter(data_for_graph_12, 1, fps)
-                    data_for_graph_12 = butter_lowpass_filter(data_filt_numpy_high_12, 10, fps)
-
-                    axis[3,2].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_12[250:], color = '#0a0b0c')  
-                    axis[3,2].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_12[50]-y_minus_graph, data_for_graph_12[150]+y_plus_graph])
-
-                    # 13
-                    data_after_13 = data_13ch_test        
-                    dataset_13 =  data_before_13 + data_after_13
-                    data_before_13 = dataset_13[250:]
-                    data_for_graph_13 = dataset_13
-
-                    data_filt_numpy_high_13 = butter_highpass_filter(data_for_graph_13, 1, fps)
-                    data_for_graph_13 = butter_lowpass_filter(data_filt_numpy_high_13, 10, fps)
-
-                    axis[0,3].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_13[250:], color = '#0a0b0c')  
-                    axis[0,3].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_13[50]-y_minus_graph, data_for_graph_13[150]+y_plus_graph])
-                     
-                    # 14 
-                    data_after_14 = data_14ch_test        
-                    dataset_14 =  data_before_14 + data_after_14
-                    data_before_14 = dataset_14[250:]
-                    data_for_graph_14 = dataset_14
-
-                    data_filt_numpy_high_14 = butter_highpass_filter(data_for_graph_14, 1, fps)
-                    data_for_graph_14 = butter_lowpass_filter(data_filt_numpy_high_14, 10, fps)
-
-                    axis[1,3].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_14[250:], color = '#0a0b0c')  
-                    axis[1,3].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_14[50]-y_minus_graph, data_for_graph_14[150]+y_plus_graph])
-
-                    # 15
-                    data_after_15 = data_15ch_test        
-                    dataset_15 =  data_before_15 + data_after_15
-                    data_before_15 = dataset_15[250:]
-                    data_for_graph_15 = dataset_15
-
-                    data_filt_numpy_high_15 = butter_highpass_filter(data_for_graph_15, 1, fps)
-                    data_for_graph_15 = butter_lowpass_filter(data_filt_numpy_high_15, 10, fps)
-
-                    axis[2,3].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_15[250:], color = '#0a0b0c')  
-                    axis[2,3].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_15[50]-y_minus_graph, data_for_graph_15[150]+y_plus_graph])
-
-                    # 16
-                    data_after_16 = data_16ch_test        
-                    dataset_16 =  data_before_16 + data_after_16
-                    data_before_16 = dataset_16[250:]
-                    data_for_graph_16 = dataset_16
-
-                    data_filt_numpy_high_16 = butter_highpass_filter(data_for_graph_16, 1, fps)
-                    data_for_graph_16 = butter_lowpass_filter(data_filt_numpy_high_16, 10, fps)
-
-                    axis[3,3].plot(range(axis_x,axis_x+sample_lens,1),data_for_graph_16[250:], color = '#0a0b0c')  
-                    axis[3,3].axis([axis_x-x_minux_graph, axis_x+x_plus_graph, data_for_graph_16[50]-y_minus_graph, data_for_graph_16[150]+y_plus_graph])
-
-                    avg_theta_power = theta_power_1
-                    avg_alpha_power = alpha_power_1
-                    avg_beta_power = beta_power_1
-                    avg_gamma_power = gamma_power_1
-                    
-                    # Dashboard用データ保存（元のMQTT機能を復活）
-                    send_mqtt_command(avg_theta_power, avg_alpha_power, avg_beta_power, avg_gamma_power)
-                    
-                    # ESP32-S3へ脳波パワー合計値をUDP送信
-                    send_brainwave_powers_udp(avg_theta_power, avg_alpha_power, avg_beta_power, avg_gamma_power)
-
-                    plt.pause(0.0000000000001)
-                    
-                    axis_x=axis_x+sample_lens 
-                    data_1ch_test = []
-                    data_2ch_test = []
-                    data_3ch_test = []
-                    data_4ch_test = []
-                    data_5ch_test = []
-                    data_6ch_test = []
-                    data_7ch_test = []
-                    data_8ch_test = []
-                    data_9ch_test = []
-                    data_10ch_test = []
-                    data_11ch_test = []
-                    data_12ch_test = []
-                    data_13ch_test = []
-                    data_14ch_test = []
-                    data_15ch_test = []
-                    data_16ch_test = []
-                
-
-spi.close()
+    value = brainwave_control_value(powers['theta'], powers['alpha'], powers['beta'], powers['gamma'])
+    control.offer(value, bands=[powers[b] for b in BAND_KEYS], arm=args.arm)
+
+    if verbose:
+        dominant_wave = max(('theta', 'alpha', 'beta', 'gamma'), key=powers.get)
+        print(f"✓ {dominant_wave.upper()} -> control {value:.2f} | "
+              f"θ:{powers['theta']:.6f} α:{powers['alpha']:.6f} β:{powers['beta']:.6f} γ:{powers['gamma']:.6f}")
+
+# 録音: 専用スレッドがリングから直接mmapファイルへコピーする（取得・表示には影響しない）
+recording = None
+if args.record:
+    recorder = RawRecorder(args.record, sample_rate=fps, channels=device.channels, status_words=device.chips, meta={
+        'spi': args.spi,
+        'registers': [{f'0x{r:02X}': v for r, v in regs.items()} for regs in device.registers],
+    })
+    recording = RecordingThread(recorder, stream.reader(0))  # 取得開始直後のサンプルから
+    recording.start()
+    print(f"⏺  Recording raw samples to {args.record}")
+
+channel_publisher = None
+if channel_client is not None:
+    channel_publisher = ChannelPublisher(channel_client, stream.reader(), fps, device.channels, batch=args.channel_batch)
+    channel_publisher.start()
+
+display_window = stream.reader()   # 表示用: 小さなブロックで随時読み出す
+analysis_window = stream.reader()  # 帯域パワー用: 1秒(sample_len)ごと
+reported_overruns = 0
+
+# 1chあたり1本のLine2Dを使い回し、blitで線だけを再描画する（描画レートは取得レートと独立）
+# --headless では図を作らず、表示用フィルタも通さない
+# 表示点数は画素数に合わせて固定（--display-points）。M4は区間ごとに最初/最小/最大/最後を残すので
+# 瞬目やスパイクが間引きで消えず、描画コストもサンプルレートに依存しない
+display = Decimator(fps, args.display_points / plot_seconds, device.channels, args.display_mode)
+plot_rows = 4 if device.channels <= 16 else 8
+live_plot = None if args.headless else LivePlot(
+    fs=display.rate, channels=device.channels, rows=plot_rows, cols=-(-device.channels // plot_rows),
+    seconds=plot_seconds, redraw_hz=args.plot_hz)
+plot_hop = max(1, fps // 50)
+stats = ThroughputStats(args.stats_interval)
+first_window = True
+
+# with を抜けると（例外・Ctrl+C を含む）取得スレッドを止めてSPI/GPIOを解放する
+with stream:
+    while 1:
+        if live_plot is not None:
+            shown, _ = display_window.read(plot_hop, timeout=5.0)
+            with health.stage('filter'):
+                filtered = display.process(display_filter.process(shown))
+            with health.stage('plot'):
+                live_plot.push(filtered)
+                live_plot.draw()
+            if len(shown) and analysis_window.available < sample_len:
+                continue
+
+        block, data_ts = analysis_window.read(sample_len, timeout=5.0)
+        stream.raise_if_failed()
+        if len(block) < sample_len:
+            print(f"⚠️  No data from PiEEG (rejected frames: {stream.thread.rejected}, DRDY timeouts: {stream.thread.timeouts})")
+            continue
+        overruns = display_window.overruns + analysis_window.overruns
+        if overruns != reported_overruns:
+            print(f"⚠️  Processing fell behind: {overruns - reported_overruns} samples skipped")
+            reported_overruns = overruns
+        busy_from = time.perf_counter()
+
+        # 全chの帯域パワーを1回のrFFTで計算（web/src/fft.ts と同じ定義）し、ch平均を使う
+        with health.stage('bandpower'):
+            powers_per_ch, powers_mean = band_powers_mean(block, fps)
+        avg_powers = as_dict(powers_mean)
+        if channel_publisher is not None:
+            channel_publisher.offer_bands(powers_per_ch, time.time())
+
+        with health.stage('publish'):
+            # ダッシュボード（共有メモリ）とESP32-S3/MQTTへの制御値（送信スレッド経由）
+            publish_outputs(avg_powers)
+
+        stats.add(len(block), time.perf_counter() - busy_from)
+        if first_window:
+            first_window = False
+            print(f"🚀 First window processed {time.perf_counter() - launched_at:.2f}s after launch")
+        if stats.due():
+            processing = stats.summary()
+            acquisition = health.summary()
+            outputs = control.summary()
+            print(ThroughputStats.format_summary(processing))
+            print(AcquisitionHealth.format_summary(acquisition))
+            print(ControlPublisher.format_summary(outputs))
+            if channel_publisher is not None:
+                print(ChannelPublisher.format_summary(channel_publisher.summary()))
+            if args.health_file:
+                try:
+                    write_json(args.health_file, {'acquisition': acquisition, 'processing': processing,
+                                                  'rejected': stream.thread.rejected, 'drdy_timeouts': stream.thread.timeouts,
+                                                  'overruns': overruns, 'control': outputs})
+                except OSError as e:
+                    print(f"⚠️  Health file write error: {e}")
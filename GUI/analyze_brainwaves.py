@@ -2,16 +2,28 @@
 """
 Claude Code Brainwave Analysis Script
 This script analyzes saved brainwave data and generates AI insights
+
+  python3 analyze_brainwaves.py                          # latest_brainwave_data.json
+  python3 analyze_brainwaves.py --journal                # the whole latest dashboard session
+  python3 analyze_brainwaves.py --journal --follow 10    # re-analyze every 10 s as readings arrive
+  python3 analyze_brainwaves.py --recording recording_20250802_120000
 """
 
+import argparse
 import json
 import sys
+import time
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 import numpy as np
 
+from pieeg.journal import JournalReader
+from pieeg.rolling import BandStats
+
 # Data directory
 DATA_DIR = Path(__file__).parent / "brainwave_data"
+SESSIONS_DIR = DATA_DIR / "sessions"
 
 def load_latest_data():
     """Load the most recent brainwave data file"""
@@ -24,6 +36,62 @@ def load_latest_data():
     with open(data_file, 'r') as f:
         return json.load(f)
 
+def latest_session():
+    """The newest session journal directory (None if there is none)"""
+    sessions = sorted(p for p in SESSIONS_DIR.glob("*") if p.is_dir()) if SESSIONS_DIR.exists() else []
+    return sessions[-1] if sessions else None
+
+class JournalData:
+    """Incrementally loaded journal readings, in the latest_brainwave_data.json layout
+
+    Only the statistics and the last 100 readings are kept in memory, so a
+    session of any length can be followed.
+    """
+    
+    def __init__(self, directory, recording=None):
+        self.reader = JournalReader(directory)
+        self.recording = recording
+        self.active = recording is None  # inside the requested recording
+        self.stats = BandStats()
+        self.recent = deque(maxlen=100)
+    
+    def update(self):
+        """Read the readings appended since the last call; returns how many were new"""
+        new = 0
+        for line in self.reader.read_new():
+            if 'event' in line:
+                if self.recording is not None and line.get('name') == self.recording:
+                    self.active = line['event'] == 'recording_start'
+                continue
+            if self.active:
+                self.stats.push_record(line)
+                self.recent.append(line)
+                new += 1
+        return new
+    
+    def data(self):
+        return {
+            'data_points': self.stats.count,
+            'duration_seconds': self.stats.count * 0.1,  # Assuming 10Hz sampling
+            'brainwave_data': list(self.recent),
+            'statistics': self.stats.summary()
+        }
+
+def load_recording(name):
+    """Load a recording's readings from the session journal its summary file points to"""
+    summary_file = DATA_DIR / f"{name}.json"
+    if not summary_file.exists():
+        print(f"❌ Recording {name} not found in {DATA_DIR}")
+        return None
+    with open(summary_file, 'r') as f:
+        summary = json.load(f)
+    directory = (summary.get('journal') or {}).get('directory')
+    if not directory or not Path(directory).exists():
+        return summary  # older recordings hold all their readings
+    journal = JournalData(directory, recording=name)
+    journal.update()
+    return journal.data()
+
 def analyze_brainwave_patterns(data):
     """Analyze brainwave patterns and generate insights"""
     
@@ -237,16 +305,8 @@ def save_analysis(analysis):
     
     print(f"✅ Analysis saved to {analysis_file}")
 
-def main():
-    """Main analysis function"""
-    print("🧠 Claude Code Brainwave Analysis")
-    print("="*50)
-    
-    # Load data
-    data = load_latest_data()
-    if not data:
-        return
-    
+def report(data):
+    """Analyze one data set, print the results and save them for the dashboard"""
     print(f"📊 Loaded {data.get('data_points', 0)} data points")
     print(f"⏱️  Duration: {data.get('duration_seconds', 0):.1f} seconds")
     
@@ -279,5 +339,43 @@ def main():
     else:
         print("❌ Analysis failed. Please check your data.")
 
+def main():
+    """Main analysis function"""
+    parser = argparse.ArgumentParser(description="Analyze saved brainwave data")
+    parser.add_argument("--journal", nargs="?", const="", metavar="DIR",
+                        help="read a session journal (default: the latest session)")
+    parser.add_argument("--recording", metavar="NAME", help="analyze one recording (e.g. recording_20250802_120000)")
+    parser.add_argument("--follow", type=float, metavar="SECONDS",
+                        help="with --journal: keep reading and re-analyze every SECONDS")
+    args = parser.parse_args()
+    
+    print("🧠 Claude Code Brainwave Analysis")
+    print("="*50)
+    
+    if args.recording:
+        data = load_recording(args.recording)
+    elif args.journal is not None:
+        directory = Path(args.journal) if args.journal else latest_session()
+        if directory is None or not directory.exists():
+            print("❌ No session journal found! Start the dashboard first.")
+            return
+        print(f"📝 Journal: {directory}")
+        journal = JournalData(directory)
+        journal.update()
+        if args.follow:
+            try:
+                while True:
+                    report(journal.data())
+                    while not journal.update():
+                        time.sleep(args.follow)
+            except KeyboardInterrupt:
+                return
+        data = journal.data()
+    else:
+        data = load_latest_data()
+    if not data:
+        return
+    report(data)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -11,9 +11,12 @@ import threading
 from datetime import datetime
 from flask import Flask, render_template, jsonify, request
 from flask_socketio import SocketIO, emit
-import paho.mqtt.client as mqtt
 import anthropic
-from collections import deque
+from pieeg.rolling import BandStats
+from pieeg.broadcast import EMIT_HZ, EmitCoalescer
+from pieeg.ingest import MqttIngest
+from pieeg.decimate import MODES as DECIMATION_MODES
+from pieeg.history import BandHistory
 import numpy as np
 import os
 from typing import Dict, List, Optional
@@ -21,9 +24,12 @@ from typing import Dict, List, Optional
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'pieeg_dashboard_secret'
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Data events go out as coalesced frames (PIEEG_EMIT_HZ, default 10 Hz), not once per input message
+emitter = EmitCoalescer(socketio, rate=float(os.getenv('PIEEG_EMIT_HZ', EMIT_HZ)))
 
 # Global data storage
-brainwave_data = deque(maxlen=1000)  # Store last 1000 readings
+# Global data storage: band-power readings in NumPy columns (~41 bytes each), PIEEG_HISTORY deep
+brainwave_history = BandHistory(int(os.getenv('PIEEG_HISTORY', 100000)))
 current_state = {
     'theta_power': 0,
     'alpha_power': 0,
@@ -57,22 +63,28 @@ else:
 
 class BrainwaveAnalyzer:
     def __init__(self):
-        self.history = deque(maxlen=100)
+        # Rolling band statistics, O(1) per reading: trend (10 readings), history (100 readings), last minute
+        self.windows = {
+            'trend': BandStats(size=10),
+            'history': BandStats(size=100),
+            'minute': BandStats(seconds=60),
+        }
         
     def analyze_patterns(self, data: Dict) -> Dict:
         """Analyze brainwave patterns and generate insights"""
-        self.history.append(data)
+        for window in self.windows.values():
+            window.push_record(data)
         
-        if len(self.history) < 10:
+        if self.windows['trend'].count < 10:
             return {'analysis': 'Collecting data...', 'confidence': 0}
         
-        # Calculate trends
-        recent_data = list(self.history)[-10:]
+        # Calculate trends (running means of the last 10 readings)
+        trends = self.windows['trend'].means()
         
-        theta_trend = np.mean([d['theta_power'] for d in recent_data])
-        alpha_trend = np.mean([d['alpha_power'] for d in recent_data])
-        beta_trend = np.mean([d['beta_power'] for d in recent_data])
-        gamma_trend = np.mean([d['gamma_power'] for d in recent_data])
+        theta_trend = trends['theta']
+        alpha_trend = trends['alpha']
+        beta_trend = trends['beta']
+        gamma_trend = trends['gamma']
         
         # Generate analysis
         analysis = {
@@ -87,53 +99,11 @@ class BrainwaveAnalyzer:
         
         return analysis
 
-analyzer = BrainwaveAnalyzer()
-
-# MQTT Setup
-mqtt_client = None
-
-def on_mqtt_connect(client, userdata, flags, rc):
-    """MQTT connection callback"""
-    if rc == 0:
-        print(f"✅ Connected to MQTT broker: {MQTT_BROKER}")
-        client.subscribe(MQTT_TOPIC)
-        print(f"📡 Subscribed to topic: {MQTT_TOPIC}")
-    else:
-        print(f"❌ MQTT connection failed with code: {rc}")
-
-def on_mqtt_message(client, userdata, msg):
-    """MQTT message callback"""
-    global current_state
-    try:
-        data = json.loads(msg.payload.decode())
-        
-        # Update current state
-        current_state.update({
-            'theta_power': data.get('theta_power', 0),
-            'alpha_power': data.get('alpha_power', 0),
-            'beta_power': data.get('beta_power', 0),
-            'gamma_power': data.get('gamma_power', 0),
-            'dominant_wave': data.get('dominant_wave', 'unknown'),
-            'timestamp': data.get('timestamp', time.time())
-        })
-        
-        # Store in history
-        brainwave_data.append(current_state.copy())
-        
-        # Emit to connected clients
-        socketio.emit('brainwave_update', current_state)
-        
-        # Analyze patterns
-        analysis = analyzer.analyze_patterns(current_state)
-        socketio.emit('pattern_analysis', analysis)
-        
-    except Exception as e:
-        print(f"❌ Error processing MQTT message: {e}")
+    def statistics(self, window: str = 'history') -> Dict:
+        """Band statistics of one rolling window ('trend', 'history' or 'minute')"""
+        return self.windows[window].summary(now=time.time())
 
-# Initialize MQTT client
-mqtt_client = mqtt.Client(client_id="pieeg-dashboard", protocol=mqtt.MQTTv311)
-mqtt_client.on_connect = on_mqtt_connect
-mqtt_client.on_message = on_mqtt_message
+analyzer = BrainwaveAnalyzer()
 
 def get_claude_analysis(brainwave_data: List[Dict]) -> Dict:
     """Get AI analysis from Claude"""
@@ -238,47 +208,41 @@ Keep responses practical and evidence-based."""
             'mood_assessment': 'Unknown'
         }
 
-def on_mqtt_connect(client, userdata, flags, rc):
-    """MQTT connection callback"""
-    print(f"Connected to MQTT broker with result code {rc}")
-    client.subscribe(MQTT_TOPIC)
-    socketio.emit('mqtt_status', {'connected': True})
+def on_mqtt_status(connected):
+    """MQTT connection callback (from the ingest receive loop)"""
+    print(f"{'Connected to' if connected else 'Disconnected from'} MQTT broker {MQTT_BROKER}")
+    socketio.emit('mqtt_status', {'connected': connected})
 
-def on_mqtt_message(client, userdata, msg):
-    """Handle incoming MQTT messages"""
-    try:
-        data = json.loads(msg.payload.decode())
-        
-        # Update current state
-        current_state.update(data)
-        current_state['timestamp'] = time.time()
-        
-        # Store in history
-        brainwave_data.append(data)
-        
-        # Analyze patterns
-        analysis = analyzer.analyze_patterns(data)
-        
-        # Emit real-time data to clients
-        socketio.emit('brainwave_data', {
-            'current': current_state,
-            'analysis': analysis,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Trigger AI analysis every 10 readings
-        if len(brainwave_data) % 10 == 0:
-            threading.Thread(target=update_ai_analysis, daemon=True).start()
-        
-    except Exception as e:
-        print(f"Error processing MQTT message: {e}")
+def on_mqtt_message(topic, data):
+    """Handle one parsed MQTT message (ingest consumer thread)"""
+    # Update current state
+    current_state.update(data)
+    current_state['timestamp'] = time.time()
+    
+    # Store in history
+    brainwave_history.append(data)
+    
+    # Analyze patterns
+    analysis = analyzer.analyze_patterns(data)
+    
+    # Emit real-time data to clients
+    # The frame task serializes later, so hand it a copy of the live state
+    emitter.update('brainwave_data', {
+        'current': current_state.copy(),
+        'analysis': analysis,
+        'timestamp': datetime.now().isoformat()
+    })
+    
+    # Trigger AI analysis every 10 readings
+    if brainwave_history.head % 10 == 0:
+        threading.Thread(target=update_ai_analysis, daemon=True).start()
 
 def update_ai_analysis():
     """Update AI analysis in background"""
     global ai_insights
     
     try:
-        recent_data = list(brainwave_data)[-20:] if len(brainwave_data) >= 20 else list(brainwave_data)
+        recent_data = brainwave_history.records(20)
         ai_result = get_claude_analysis(recent_data)
         
         ai_insights.update(ai_result)
@@ -290,10 +254,9 @@ def update_ai_analysis():
     except Exception as e:
         print(f"Error updating AI analysis: {e}")
 
-# Initialize MQTT client
-mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
-mqtt_client.on_connect = on_mqtt_connect
-mqtt_client.on_message = on_mqtt_message
+# MQTT ingest: the receive loop only parses and queues; on_mqtt_message runs in its consumer thread
+mqtt_ingest = MqttIngest(MQTT_BROKER, MQTT_PORT, on_status=on_mqtt_status)
+mqtt_ingest.subscribe(MQTT_TOPIC, on_mqtt_message)
 
 # Routes
 @app.route('/')
@@ -306,10 +269,35 @@ def api_current():
     """Get current brainwave state"""
     return jsonify(current_state)
 
+@app.route('/api/statistics')
+def api_statistics():
+    """Get rolling band statistics (mean/std/min/max) of the analyzer's windows"""
+    return jsonify({name: analyzer.statistics(name) for name in analyzer.windows})
+
+@app.route('/api/emit')
+def api_emit():
+    """Get Socket.IO frame statistics (updates coalesced, emits, skipped clients)"""
+    return jsonify(emitter.summary(reset=False))
+
+@app.route('/api/mqtt')
+def api_mqtt():
+    """Get MQTT ingest statistics (queue depth, drops, per-message time)"""
+    return jsonify(mqtt_ingest.summary(reset=False))
+
 @app.route('/api/history')
 def api_history():
-    """Get brainwave history"""
-    return jsonify(list(brainwave_data)[-100:])
+    """Get brainwave history
+
+    ?points=N[&mode=lttb|m4|stride] returns the whole history decimated to
+    about N readings (peaks kept) instead of the latest 100.
+    """
+    points = request.args.get('points', type=int)
+    if not points:
+        return jsonify(brainwave_history.records(100))
+    mode = request.args.get('mode', 'lttb')
+    if mode not in DECIMATION_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(DECIMATION_MODES)}"}), 400
+    return jsonify(brainwave_history.records(points=points, mode=mode))
 
 @app.route('/api/ai-analysis')
 def api_ai_analysis():
@@ -326,6 +314,7 @@ def api_trigger_analysis():
 def handle_connect():
     """Handle client connection"""
     print('Client connected')
+    emitter.add_client(request.sid)
     emit('current_state', current_state)
     emit('ai_analysis', ai_insights)
 
@@ -333,25 +322,22 @@ def handle_connect():
 def handle_disconnect():
     """Handle client disconnection"""
     print('Client disconnected')
+    emitter.remove_client(request.sid)
+
+@socketio.on('set_rate')
+def handle_set_rate(data):
+    """Lower this client's frame rate ({'hz': N}, capped at the server rate)"""
+    emit('rate', {'hz': emitter.set_rate(request.sid, (data or {}).get('hz'))})
 
 @socketio.on('request_analysis')
 def handle_request_analysis():
     """Handle analysis request from client"""
     threading.Thread(target=update_ai_analysis, daemon=True).start()
 
-def start_mqtt_client():
-    """Start MQTT client in background"""
-    try:
-        print(f"🔄 Connecting to MQTT broker {MQTT_BROKER}...")
-        mqtt_client.connect(MQTT_BROKER, MQTT_PORT, 60)
-        mqtt_client.loop_forever()
-    except Exception as e:
-        print(f"MQTT connection error: {e}")
-
-# Initialize MQTT client when module is imported
-print(f"📡 Initializing MQTT client for topic: {MQTT_TOPIC}")
-mqtt_thread = threading.Thread(target=start_mqtt_client, daemon=True)
-mqtt_thread.start()
+# Start MQTT ingest when module is imported
+print(f"📡 Initializing MQTT ingest for topic: {MQTT_TOPIC} ({MQTT_BROKER})")
+mqtt_ingest.start()
+emitter.start()
 
 if __name__ == '__main__':
     print("🧠 PiEEG Brainwave Dashboard Starting...")
@@ -5,31 +5,40 @@ A dynamic web dashboard for real-time brainwave visualization that saves data fo
 """
 
 import asyncio
+import atexit
 import json
 import time
 import threading
 from datetime import datetime
 from flask import Flask, render_template, jsonify, request
 from flask_socketio import SocketIO, emit
-import paho.mqtt.client as mqtt
-from collections import deque
 import numpy as np
 import os
-import re
 from typing import Dict, List, Optional
 from pathlib import Path
 
+from pieeg.channels import CHANNEL_TOPIC, MQTT_BROKER as CHANNEL_BROKER, MQTT_PORT as CHANNEL_PORT
+from pieeg.rolling import BandStats
+from pieeg.broadcast import EMIT_HZ, EmitCoalescer
+from pieeg.ingest import MqttIngest
+from pieeg.decimate import MODES as DECIMATION_MODES
+from pieeg.history import BandHistory
+from pieeg.journal import JournalWriter
+from pieeg.shm import BAND_CHANNEL, ShmSubscriber, band_dict
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'pieeg_dashboard_secret'
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Data events go out as coalesced frames (PIEEG_EMIT_HZ, default 10 Hz), not once per input message
+emitter = EmitCoalescer(socketio, rate=float(os.getenv('PIEEG_EMIT_HZ', EMIT_HZ)))
 
 # Create data directory
 DATA_DIR = Path(__file__).parent / "brainwave_data"
 DATA_DIR.mkdir(exist_ok=True)
 
-# Global data storage
-brainwave_data = deque(maxlen=1000)  # Store last 1000 readings
-channel_data = deque(maxlen=100)  # Store last 100 channel readings
+# Global data storage: band-power readings in NumPy columns (~41 bytes each), PIEEG_HISTORY deep
+brainwave_history = BandHistory(int(os.getenv('PIEEG_HISTORY', 100000)))
+channel_history = BandHistory(int(os.getenv('PIEEG_CHANNEL_HISTORY', 10000)))  # with per-channel powers
 current_state = {
     'theta_power': 0,
     'alpha_power': 0,
@@ -55,31 +64,43 @@ ai_insights = {
 }
 
 # MQTT Configuration
-MQTT_BROKER = "broker.hivemq.com"
-MQTT_PORT = 1883
+# The acquisition script publishes per-channel data (pieeg.channels) to a broker on the Pi;
+# set PIEEG_MQTT_BROKER to the Pi's address when the dashboard runs on another machine.
+MQTT_BROKER = os.getenv('PIEEG_MQTT_BROKER', CHANNEL_BROKER)
+MQTT_PORT = int(os.getenv('PIEEG_MQTT_PORT', CHANNEL_PORT))
 MQTT_TOPIC = "pieeg/m5stamp/commands"
-MQTT_CHANNEL_TOPIC = "pieeg/channels/data"
+MQTT_CHANNEL_TOPIC = CHANNEL_TOPIC
+shm_active = False  # band powers come from shared memory; channel messages then only update current_channels
 
 class BrainwaveAnalyzer:
     def __init__(self):
-        self.history = deque(maxlen=100)
-        self.recording_data = []
+        # Rolling band statistics, O(1) per reading: trend (10 readings), history (100 readings), last minute
+        self.windows = {
+            'trend': BandStats(size=10),
+            'history': BandStats(size=100),
+            'minute': BandStats(seconds=60),
+        }
+        # A recording is a marked range of the session journal; only its statistics stay in memory
         self.is_recording = False
+        self.recording_name = None
+        self.recording_first = 0  # brainwave_history.head when it started
+        self.recording_stats = BandStats()
         
     def analyze_patterns(self, data: Dict) -> Dict:
         """Analyze brainwave patterns and generate insights"""
-        self.history.append(data)
+        for window in self.windows.values():
+            window.push_record(data)
         
-        if len(self.history) < 10:
+        if self.windows['trend'].count < 10:
             return {'analysis': 'Collecting data...', 'confidence': 0}
         
-        # Calculate trends
-        recent_data = list(self.history)[-10:]
+        # Calculate trends (running means of the last 10 readings)
+        trends = self.windows['trend'].means()
         
-        theta_trend = np.mean([d['theta_power'] for d in recent_data])
-        alpha_trend = np.mean([d['alpha_power'] for d in recent_data])
-        beta_trend = np.mean([d['beta_power'] for d in recent_data])
-        gamma_trend = np.mean([d['gamma_power'] for d in recent_data])
+        theta_trend = trends['theta']
+        alpha_trend = trends['alpha']
+        beta_trend = trends['beta']
+        gamma_trend = trends['gamma']
         
         # Generate analysis
         analysis = {
@@ -93,67 +114,44 @@ class BrainwaveAnalyzer:
         }
         
         return analysis
+
+    def statistics(self, window: str = 'history') -> Dict:
+        """Band statistics of one rolling window ('trend', 'history' or 'minute')"""
+        return self.windows[window].summary(now=time.time())
     
-    def save_data_for_analysis(self, data: List[Dict], filename: str = "latest_brainwave_data.json"):
-        """Save brainwave data to file for Claude Code analysis"""
+    def save_data_for_analysis(self, data: List[Dict], filename: str = "latest_brainwave_data.json",
+                               statistics: Optional[Dict] = None, data_points: Optional[int] = None,
+                               recording: Optional[str] = None):
+        """Save a snapshot of brainwave data for Claude Code analysis
+
+        The snapshot holds the given (recent) readings; every reading of the
+        session is in the journal it points to.
+        """
         filepath = DATA_DIR / filename
+        data_points = len(data) if data_points is None else data_points
         
         # Prepare data with metadata
         save_data = {
             'timestamp': datetime.now().isoformat(),
-            'data_points': len(data),
-            'duration_seconds': len(data) * 0.1 if data else 0,  # Assuming 10Hz sampling
+            'data_points': data_points,
+            'duration_seconds': data_points * 0.1,  # Assuming 10Hz sampling
             'brainwave_data': data,
-            'statistics': self.calculate_statistics(data) if data else {}
+            'statistics': self.calculate_statistics(data) if statistics is None else statistics,
+            'journal': journal.describe(),
+            'recording': recording
         }
         
-        with open(filepath, 'w') as f:
-            json.dump(save_data, f, indent=2)
+        # Replace the file in one step so readers never see a partial snapshot
+        tmp = filepath.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(save_data, f, separators=(',', ':'))
+        os.replace(tmp, filepath)
         
         return filepath
     
     def calculate_statistics(self, data: List[Dict]) -> Dict:
-        """Calculate statistics for the data"""
-        if not data:
-            return {}
-        
-        stats = {
-            'theta': {
-                'mean': np.mean([d.get('theta_power', 0) for d in data]),
-                'std': np.std([d.get('theta_power', 0) for d in data]),
-                'min': np.min([d.get('theta_power', 0) for d in data]),
-                'max': np.max([d.get('theta_power', 0) for d in data])
-            },
-            'alpha': {
-                'mean': np.mean([d.get('alpha_power', 0) for d in data]),
-                'std': np.std([d.get('alpha_power', 0) for d in data]),
-                'min': np.min([d.get('alpha_power', 0) for d in data]),
-                'max': np.max([d.get('alpha_power', 0) for d in data])
-            },
-            'beta': {
-                'mean': np.mean([d.get('beta_power', 0) for d in data]),
-                'std': np.std([d.get('beta_power', 0) for d in data]),
-                'min': np.min([d.get('beta_power', 0) for d in data]),
-                'max': np.max([d.get('beta_power', 0) for d in data])
-            },
-            'gamma': {
-                'mean': np.mean([d.get('gamma_power', 0) for d in data]),
-                'std': np.std([d.get('gamma_power', 0) for d in data]),
-                'min': np.min([d.get('gamma_power', 0) for d in data]),
-                'max': np.max([d.get('gamma_power', 0) for d in data])
-            }
-        }
-        
-        # Find dominant wave
-        means = {
-            'theta': stats['theta']['mean'],
-            'alpha': stats['alpha']['mean'],
-            'beta': stats['beta']['mean'],
-            'gamma': stats['gamma']['mean']
-        }
-        stats['dominant_wave'] = max(means, key=means.get)
-        
-        return stats
+        """Calculate statistics for the data (one pass over the readings)"""
+        return BandStats.of(data).summary()
 
 analyzer = BrainwaveAnalyzer()
 
@@ -168,56 +166,72 @@ def load_claude_analysis():
             pass
     return None
 
-def on_mqtt_connect(client, userdata, flags, rc, properties=None):
-    """MQTT connection callback"""
-    print(f"Connected to MQTT broker with result code {rc}")
-    client.subscribe(MQTT_TOPIC)
-    client.subscribe(MQTT_CHANNEL_TOPIC)
-    print(f"Subscribed to topics: {MQTT_TOPIC} and {MQTT_CHANNEL_TOPIC}")
-    socketio.emit('mqtt_status', {'connected': True})
+def on_mqtt_status(connected):
+    """MQTT connection callback (from the ingest receive loop)"""
+    print(f"{'Connected to' if connected else 'Disconnected from'} MQTT broker {MQTT_BROKER}:{MQTT_PORT}")
+    socketio.emit('mqtt_status', {'connected': connected})
 
-def on_mqtt_message(client, userdata, msg):
-    """Handle incoming MQTT messages"""
-    try:
-        data = json.loads(msg.payload.decode())
-        
-        # Update current state
-        current_state.update(data)
-        current_state['timestamp'] = time.time()
-        
-        # Store in history
-        brainwave_data.append(data)
-        
-        # If recording, add to recording data
+def process_channel_data(topic, data):
+    """Apply one pieeg/channels/data message (decimated raw rows, per-channel band powers)"""
+    current_channels['raw'] = data.get('raw', [])
+    current_channels['display_hz'] = data.get('display_hz')
+    current_channels['timestamp'] = data.get('ts') or time.time()
+    if 'bands_per_ch' in data:
+        current_channels['channels'] = data['bands_per_ch']
+    emitter.update('channel_data', dict(current_channels))
+    if 'bands' not in data:
+        return
+
+    record = {'timestamp': data['bands_ts']}
+    record.update({f'{b}_power': data['bands'][b] for b in ('theta', 'alpha', 'beta', 'gamma')})
+    record['dominant_wave'] = max(('theta', 'alpha', 'beta', 'gamma'), key=lambda b: record[f'{b}_power'])
+    channel_history.append(dict(record, bands_per_ch=data.get('bands_per_ch')))
+
+    # Without the Pi's shared memory (dashboard on another machine) the channel mean drives the dashboard
+    if not shm_active:
+        process_eeg_data(record, channel_history.head)
+
+def on_mqtt_message(topic, data):
+    """Handle one parsed MQTT band-power message (ingest consumer thread)"""
+    # Update current state
+    current_state.update(data)
+    current_state['timestamp'] = time.time()
+    
+    # Store in history and the session journal, unless shared memory already delivered this reading
+    if not shm_active:
+        store_reading(data)
+    
+    # Analyze patterns
+    analysis = analyzer.analyze_patterns(data)
+    
+    # Update AI insights with analysis
+    ai_insights['stress_level'] = analysis.get('stress_level', 0)
+    ai_insights['focus_level'] = analysis.get('focus_level', 0)
+    ai_insights['relaxation_level'] = analysis.get('relaxation_level', 0)
+    
+    # Emit real-time data to clients
+    # The frame task serializes later, so hand it a copy of the live state
+    emitter.update('brainwave_data', {
+        'current': current_state.copy(),
+        'analysis': analysis,
+        'timestamp': datetime.now().isoformat()
+    })
+
+# Readings arrive on the MQTT consumer thread and on the shared-memory/file monitor thread
+store_lock = threading.Lock()
+
+def store_reading(record):
+    """Keep one band-power reading: history, session journal and the recording in progress"""
+    with store_lock:
+        brainwave_history.append(record)
+        journal.append(record)
         if analyzer.is_recording:
-            analyzer.recording_data.append(data)
-        
-        # Analyze patterns
-        analysis = analyzer.analyze_patterns(data)
-        
-        # Update AI insights with analysis
-        ai_insights['stress_level'] = analysis.get('stress_level', 0)
-        ai_insights['focus_level'] = analysis.get('focus_level', 0)
-        ai_insights['relaxation_level'] = analysis.get('relaxation_level', 0)
-        
-        # Emit real-time data to clients
-        socketio.emit('brainwave_data', {
-            'current': current_state,
-            'analysis': analysis,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Auto-save data every 100 readings
-        if len(brainwave_data) % 100 == 0:
-            threading.Thread(target=save_latest_data, daemon=True).start()
-        
-    except Exception as e:
-        print(f"Error processing MQTT message: {e}")
+            analyzer.recording_stats.push_record(record)
 
 def save_latest_data():
-    """Save the latest brainwave data for Claude Code analysis"""
+    """Save the latest brainwave data for Claude Code analysis (journal writer thread, every 100 readings)"""
     try:
-        recent_data = list(brainwave_data)[-100:] if len(brainwave_data) >= 100 else list(brainwave_data)
+        recent_data = brainwave_history.records(100)
         filepath = analyzer.save_data_for_analysis(recent_data)
         print(f"Saved brainwave data to {filepath}")
         
@@ -230,14 +244,17 @@ def save_latest_data():
     except Exception as e:
         print(f"Error saving data: {e}")
 
-# Initialize MQTT client
-try:
-    mqtt_client = mqtt.Client(callback_api_version=mqtt.CallbackAPIVersion.VERSION2)
-except:
-    # Fallback for older paho-mqtt versions
-    mqtt_client = mqtt.Client()
-mqtt_client.on_connect = on_mqtt_connect
-mqtt_client.on_message = on_mqtt_message
+# Session journal: readings are appended as they arrive by one writer thread, which also
+# refreshes latest_brainwave_data.json every 100 readings
+SESSION_DIR = DATA_DIR / "sessions" / datetime.now().strftime("%Y%m%d_%H%M%S")
+journal = JournalWriter(SESSION_DIR, segment_bytes=int(os.getenv('PIEEG_JOURNAL_MB', 16)) << 20,
+                        segment_seconds=60 * float(os.getenv('PIEEG_JOURNAL_MINUTES', 60)),
+                        snapshot=save_latest_data)
+
+# MQTT ingest: the receive loop only parses and queues; the handlers above run in its consumer thread
+mqtt_ingest = MqttIngest(MQTT_BROKER, MQTT_PORT, on_status=on_mqtt_status)
+mqtt_ingest.subscribe(MQTT_TOPIC, on_mqtt_message)
+mqtt_ingest.subscribe(MQTT_CHANNEL_TOPIC, process_channel_data)
 
 # Routes
 @app.route('/')
@@ -250,10 +267,53 @@ def api_current():
     """Get current brainwave state"""
     return jsonify(current_state)
 
+@app.route('/api/statistics')
+def api_statistics():
+    """Get rolling band statistics (mean/std/min/max) of the analyzer's windows"""
+    return jsonify({name: analyzer.statistics(name) for name in analyzer.windows})
+
+@app.route('/api/emit')
+def api_emit():
+    """Get Socket.IO frame statistics (updates coalesced, emits, skipped clients)"""
+    return jsonify(emitter.summary(reset=False))
+
+@app.route('/api/mqtt')
+def api_mqtt():
+    """Get MQTT ingest statistics (queue depth, drops, per-message time)"""
+    return jsonify(mqtt_ingest.summary(reset=False))
+
+@app.route('/api/journal')
+def api_journal():
+    """Get session journal statistics (lines written and synced, queue depth, drops)"""
+    return jsonify(journal.summary(reset=False))
+
+@app.route('/api/channels')
+def api_channels():
+    """Get the latest per-channel data (pieeg/channels/data)"""
+    return jsonify(current_channels)
+
+@app.route('/api/channels/history')
+def api_channels_history():
+    """Get the latest ?count=N (default 100) per-channel band-power readings"""
+    count = request.args.get('count', 100, type=int)
+    return jsonify({'bands': channel_history.bands,
+                    'records': channel_history.records(count),
+                    'per_channel': channel_history.channel_columns(count).tolist()})
+
 @app.route('/api/history')
 def api_history():
-    """Get brainwave history"""
-    return jsonify(list(brainwave_data)[-100:])
+    """Get brainwave history
+
+    ?points=N[&mode=lttb|m4|stride] returns the whole history decimated to
+    about N readings (peaks kept) instead of the latest 100.
+    """
+    points = request.args.get('points', type=int)
+    if not points:
+        return jsonify(brainwave_history.records(100))
+    mode = request.args.get('mode', 'lttb')
+    if mode not in DECIMATION_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(DECIMATION_MODES)}"}), 400
+    return jsonify(brainwave_history.records(points=points, mode=mode))
 
 @app.route('/api/ai-analysis')
 def api_ai_analysis():
@@ -268,7 +328,7 @@ def api_ai_analysis():
 def api_save_for_analysis():
     """Save current data for Claude Code analysis"""
     try:
-        recent_data = list(brainwave_data)[-200:] if len(brainwave_data) >= 200 else list(brainwave_data)
+        recent_data = brainwave_history.records(200)
         filepath = analyzer.save_data_for_analysis(recent_data)
         
         instructions = {
@@ -289,24 +349,37 @@ def api_save_for_analysis():
 @app.route('/api/start-recording', methods=['POST'])
 def api_start_recording():
     """Start recording brainwave data"""
-    analyzer.is_recording = True
-    analyzer.recording_data = []
-    return jsonify({'status': 'recording_started'})
+    analyzer.recording_name = f"recording_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    with store_lock:  # the recording starts exactly at the next stored reading
+        analyzer.recording_first = brainwave_history.head
+        analyzer.recording_stats = BandStats()
+        journal.mark('recording_start', name=analyzer.recording_name)
+        analyzer.is_recording = True
+    return jsonify({'status': 'recording_started', 'journal': str(journal.directory),
+                    'recording': analyzer.recording_name})
 
 @app.route('/api/stop-recording', methods=['POST'])
 def api_stop_recording():
     """Stop recording and save data"""
-    analyzer.is_recording = False
+    if not analyzer.is_recording:
+        return jsonify({'status': 'no_data'})
+    with store_lock:
+        analyzer.is_recording = False
+        journal.mark('recording_stop', name=analyzer.recording_name)
     
-    if analyzer.recording_data:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"recording_{timestamp}.json"
-        filepath = analyzer.save_data_for_analysis(analyzer.recording_data, filename)
+    stats = analyzer.recording_stats
+    if stats.count:
+        # The readings are already in the journal: write a summary with the latest 100 of them
+        recent_data = brainwave_history.records(100, since=analyzer.recording_first)
+        filepath = analyzer.save_data_for_analysis(recent_data, f"{analyzer.recording_name}.json",
+                                                   statistics=stats.summary(), data_points=stats.count,
+                                                   recording=analyzer.recording_name)
         
         return jsonify({
             'status': 'recording_saved',
             'filepath': str(filepath),
-            'data_points': len(analyzer.recording_data)
+            'journal': str(journal.directory),
+            'data_points': stats.count
         })
     else:
         return jsonify({'status': 'no_data'})
@@ -315,6 +388,7 @@ def api_stop_recording():
 def handle_connect():
     """Handle client connection"""
     print('Client connected')
+    emitter.add_client(request.sid)
     emit('current_state', current_state)
     emit('ai_analysis', ai_insights)
 
@@ -322,12 +396,18 @@ def handle_connect():
 def handle_disconnect():
     """Handle client disconnection"""
     print('Client disconnected')
+    emitter.remove_client(request.sid)
+
+@socketio.on('set_rate')
+def handle_set_rate(data):
+    """Lower this client's frame rate ({'hz': N}, capped at the server rate)"""
+    emit('rate', {'hz': emitter.set_rate(request.sid, (data or {}).get('hz'))})
 
 @socketio.on('request_analysis')
 def handle_request_analysis():
     """Handle analysis request from client"""
     # Save data and provide instructions
-    recent_data = list(brainwave_data)[-200:] if len(brainwave_data) >= 200 else list(brainwave_data)
+    recent_data = brainwave_history.records(200)
     filepath = analyzer.save_data_for_analysis(recent_data)
     
     emit('analysis_instructions', {
@@ -359,60 +439,22 @@ def load_gpio_config():
     }
 
 def save_gpio_config(config):
-    """Save GPIO configuration to file and update all scripts"""
+    """Save GPIO configuration to the file the acquisition script reads at start-up
+
+    2.Graph_Gpio_D_1_5_4.py takes cs_pin (its --spi default), button_pin_1/2
+    (DRDY) and gpio_chip (its --gpio-chip default) from it; the scripts
+    themselves are no longer rewritten.
+    """
     try:
-        # Save to config file
-        with open(GPIO_CONFIG_FILE, 'w') as f:
+        tmp = GPIO_CONFIG_FILE.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
             json.dump(config, f, indent=2)
-        
-        # Update all PiEEG scripts
-        scripts_to_update = [
-            'GUI/2.Graph_Gpio_D_1_5_4.py',
-            'GUI/2.Graph_Gpio_D_1_5_4_MQTT.py',
-            'GUI/2.Graph_Gpio_D_1_5_4_MQTT_Auto.py',
-            'GUI/1.Graph_Gpio_D _1_6_3.py',
-            'GUI/2.Graph_Gpio_D _1_5_4_OS.py',
-            'GUI/Graph_Gpio_D _1_5_4_not_spike.py'
-        ]
-        
-        gui_path = Path(__file__).parent.parent
-        
-        for script_name in scripts_to_update:
-            script_path = gui_path / script_name.replace('GUI/', '')
-            if script_path.exists():
-                update_script_gpio_config(script_path, config)
-        
+        os.replace(tmp, GPIO_CONFIG_FILE)
         return True
     except Exception as e:
         print(f"Error saving GPIO config: {e}")
         return False
 
-def update_script_gpio_config(script_path, config):
-    """Update GPIO configuration in a specific script"""
-    try:
-        with open(script_path, 'r') as f:
-            content = f.read()
-        
-        # Update pin assignments
-        content = re.sub(r'button_pin_1\s*=\s*\d+', f'button_pin_1 = {config["button_pin_1"]}', content)
-        content = re.sub(r'button_pin_2\s*=\s*\d+', f'button_pin_2 = {config["button_pin_2"]}', content)
-        content = re.sub(r'cs_pin\s*=\s*\d+', f'cs_pin = {config["cs_pin"]}', content)
-        
-        # Update GPIO chip
-        if config['gpio_chip'] == '/dev/gpiochip4':
-            content = re.sub(r'chip\s*=\s*gpiod\.chip\(["\']0["\']\)', 
-                           'chip = gpiod.chip("/dev/gpiochip4")', content)
-        else:
-            content = re.sub(r'chip\s*=\s*gpiod\.chip\(["\'][^"\']+["\']\)', 
-                           'chip = gpiod.chip("0")', content)
-        
-        with open(script_path, 'w') as f:
-            f.write(content)
-            
-        print(f"Updated GPIO config in {script_path.name}")
-    except Exception as e:
-        print(f"Error updating {script_path.name}: {e}")
-
 @app.route('/api/gpio-config', methods=['GET', 'POST'])
 def api_gpio_config():
     """Get or set GPIO configuration"""
@@ -434,26 +476,72 @@ def api_gpio_config():
             for pin_key in ['cs_pin', 'button_pin_1', 'button_pin_2']:
                 if config[pin_key] not in valid_pins:
                     return jsonify({'status': 'error', 'message': f'Invalid pin {config[pin_key]}'}), 400
+            if not isinstance(config['gpio_chip'], str) or not config['gpio_chip']:
+                return jsonify({'status': 'error', 'message': f"Invalid gpio_chip {config['gpio_chip']!r}"}), 400
             
-            # Save configuration
+            # Save configuration (applied when the acquisition script next starts)
             if save_gpio_config(config):
-                return jsonify({'status': 'success', 'message': 'Configuration saved'})
+                return jsonify({'status': 'success',
+                                'message': f'Configuration saved to {GPIO_CONFIG_FILE.name}: restart the acquisition script to apply'})
             else:
                 return jsonify({'status': 'error', 'message': 'Failed to save configuration'}), 500
                 
         except Exception as e:
             return jsonify({'status': 'error', 'message': str(e)}), 500
 
+def process_eeg_data(data, source_count):
+    """Apply one band-power update (the latest_eeg_data.json schema) to the dashboard"""
+    global current_state
+    current_state = {
+        'theta_power': data.get('theta_power', 0),
+        'alpha_power': data.get('alpha_power', 0),
+        'beta_power': data.get('beta_power', 0),
+        'gamma_power': data.get('gamma_power', 0),
+        'dominant_wave': data.get('dominant_wave', 'alpha'),
+        'timestamp': data.get('timestamp', time.time())
+    }
+
+    store_reading(current_state.copy())
+
+    # Emit to dashboard
+    emitter.update('brainwave_update', current_state.copy())
+
+    if source_count % 10 == 0:  # 10回に1回ログ出力
+        print(f"📊 Dashboard updated #{source_count}: {current_state['dominant_wave'].upper()} "
+              f"(θ:{current_state['theta_power']:.4f} α:{current_state['alpha_power']:.4f})")
+
+def monitor_eeg_shm(subscriber):
+    """Receive every band-power update from the acquisition script's shared-memory channel"""
+    global shm_active
+    data_count = 0
+    shm_active = True
+    print(f"🔍 Reading EEG updates from shared memory '{subscriber.name}'")
+    while True:
+        try:
+            for record in subscriber.wait(timeout=1.0):
+                data_count += 1
+                process_eeg_data(band_dict(record), data_count)
+        except Exception as e:
+            print(f"⚠️  Shared memory monitor error: {e}")
+            time.sleep(0.05)
+
 def monitor_eeg_file():
-    """Monitor local EEG data file instead of MQTT"""
+    """Monitor local EEG data (shared memory, or the JSON file from --json-file as a fallback)"""
     import os
     last_modified = 0
     data_count = 0
     
-    print("🔍 Starting EEG file monitor...")
+    print(f"🔍 Starting EEG file monitor (until shared memory '{BAND_CHANNEL}' appears)...")
     
     while True:
         try:
+            # 取得スクリプトが（再）起動して共有メモリが現れたらそちらへ切り替える
+            try:
+                monitor_eeg_shm(ShmSubscriber(BAND_CHANNEL))
+                return
+            except FileNotFoundError:
+                pass
+
             if os.path.exists('/tmp/latest_eeg_data.json'):
                 # ファイルの更新時刻をチェック
                 current_modified = os.path.getmtime('/tmp/latest_eeg_data.json')
@@ -464,54 +552,32 @@ def monitor_eeg_file():
                     with open('/tmp/latest_eeg_data.json', 'r') as f:
                         data = json.load(f)
                     
-                    # Process the data like MQTT message
-                    global current_state, brainwave_data
-                    current_state = {
-                        'theta_power': data.get('theta_power', 0),
-                        'alpha_power': data.get('alpha_power', 0),
-                        'beta_power': data.get('beta_power', 0),
-                        'gamma_power': data.get('gamma_power', 0),
-                        'dominant_wave': data.get('dominant_wave', 'alpha'),
-                        'timestamp': data.get('timestamp', time.time())
-                    }
-                    
-                    brainwave_data.append(current_state.copy())
-                    
-                    # Emit to dashboard
-                    socketio.emit('brainwave_update', current_state)
-                    
                     data_count += 1
-                    if data_count % 10 == 0:  # 10回に1回ログ出力
-                        print(f"📊 Dashboard updated #{data_count}: {current_state['dominant_wave'].upper()} "
-                              f"(θ:{current_state['theta_power']:.4f} α:{current_state['alpha_power']:.4f})")
+                    process_eeg_data(data, data_count)
                         
         except Exception as e:
             print(f"⚠️  File monitor error: {e}")
         
         time.sleep(0.05)  # Check every 50ms for better responsiveness
 
-def start_mqtt_client():
-    """Start MQTT client in background"""
-    try:
-        mqtt_client.connect(MQTT_BROKER, MQTT_PORT, 60)
-        mqtt_client.loop_forever()
-    except Exception as e:
-        print(f"MQTT connection error: {e}")
-
 if __name__ == '__main__':
     # Start file monitor
     file_thread = threading.Thread(target=monitor_eeg_file, daemon=True)
     file_thread.start()
     
-    # Start MQTT client in background thread
-    mqtt_thread = threading.Thread(target=start_mqtt_client, daemon=True)
-    mqtt_thread.start()
+    # Start MQTT ingest (receive loop + consumer threads)
+    mqtt_ingest.start()
+    emitter.start()
+    journal.start()
+    atexit.register(journal.stop)
     
     print("🧠 PiEEG Brainwave Dashboard Starting (Claude Code Edition)...")
     print("📊 Dashboard available at: http://localhost:5001")
     print("🤖 AI Analysis powered by Claude Code (no API key needed!)")
-    print("📡 Data Source: File monitoring + MQTT backup")
+    print("📡 Data Source: Shared memory (file monitoring fallback) + MQTT backup")
+    print(f"📡 Channel data: {MQTT_CHANNEL_TOPIC} on {MQTT_BROKER}:{MQTT_PORT} (PIEEG_MQTT_BROKER to change)")
     print("\n📁 Brainwave data will be saved to:", DATA_DIR)
+    print("📝 Session journal:", SESSION_DIR)
     print("💡 Use 'claude dashboard/analyze_brainwaves.py' for AI analysis")
     
     # Run the app
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Check that coalesced Socket.IO frames keep the dashboard server's cost flat.
+
+Runs a Flask-SocketIO server (threading mode, as the dashboards) with N
+Socket.IO clients in a separate process, and feeds 'brainwave_data' updates
+at each --input-rate either:
+
+* ``direct``: one socketio.emit per update, as the dashboards used to do, or
+* ``coalesced``: through pieeg.broadcast.EmitCoalescer at --emit-hz.
+
+It reports the events each client got per second, the server's CPU use (per
+client), frames skipped for backed-up clients and the end-to-end latency
+(update -> client receive).
+
+  python3 benchmark_emit.py                         # 10 clients, 10/100/1000 updates/s
+  python3 benchmark_emit.py --clients 50 --input-rate 100 1000 --emit-hz 5
+"""
+import argparse
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+
+from pieeg.broadcast import EMIT_HZ, EmitCoalescer
+
+
+def run_clients(url: str, count: int, seconds: float, slow: int, results) -> None:
+    """Client process: ``count`` connections counting 'brainwave_data' events and latency."""
+    import socketio
+
+    latencies, counts, clients = [], [0] * count, []
+    for i in range(count):
+        client = socketio.Client(reconnection=False)
+
+        def on_data(data, i=i):
+            latencies.append(time.time() - data['timestamp'])
+            counts[i] += 1
+            if i < slow:  # a client that takes 50 ms per event
+                time.sleep(0.05)
+
+        client.on('brainwave_data', on_data)
+        client.connect(url, transports=['websocket'])
+        clients.append(client)
+    results.put('connected')
+    time.sleep(seconds)
+    for client in clients:
+        client.disconnect()
+    results.put({'counts': counts, 'latency': latencies})
+
+
+def serve(port: int, mode: str, emit_hz: float):
+    import logging
+
+    from flask import Flask, request
+    from flask_socketio import SocketIO
+
+    logging.getLogger('werkzeug').setLevel(logging.CRITICAL)  # the clients' close frames log as bad requests
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+    emitter = EmitCoalescer(socketio, rate=emit_hz)
+
+    @socketio.on('connect')
+    def connect():
+        emitter.add_client(request.sid)
+
+    @socketio.on('disconnect')
+    def disconnect():
+        emitter.remove_client(request.sid)
+
+    threading.Thread(target=socketio.run, args=(app,), kwargs={'host': '127.0.0.1', 'port': port,
+                     'allow_unsafe_werkzeug': True, 'log_output': False}, daemon=True).start()
+    if mode == "coalesced":
+        emitter.start()
+    return socketio, emitter
+
+
+def feed(socketio, emitter, mode: str, rate: float, seconds: float) -> None:
+    rng = np.random.default_rng(0)
+    start = time.monotonic()
+    sent = 0
+    while (now := time.monotonic()) - start < seconds:
+        for _ in range(int((now - start) * rate) - sent):
+            p = rng.random(4) * 1e-3
+            data = {'current': {'theta_power': p[0], 'alpha_power': p[1], 'beta_power': p[2], 'gamma_power': p[3],
+                                'dominant_wave': 'alpha'},
+                    'analysis': {'stress_level': 1.0, 'focus_level': 2.0, 'relaxation_level': 3.0},
+                    'timestamp': time.time()}
+            if mode == "direct":
+                socketio.emit('brainwave_data', data)
+            else:
+                emitter.update('brainwave_data', data)
+            sent += 1
+        time.sleep(0.001)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=10)
+    ap.add_argument("--slow", type=int, default=1, help="clients that take 50 ms per event (default: 1)")
+    ap.add_argument("--input-rate", type=float, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--emit-hz", type=float, default=EMIT_HZ)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--port", type=int, default=5099)
+    ap.add_argument("--modes", nargs="+", choices=("direct", "coalesced"), default=["direct", "coalesced"])
+    args = ap.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{args.clients} clients ({args.slow} slow), {args.seconds:.0f} s per run, frames at {args.emit_hz:g} Hz")
+    print(f"{'mode':>9} {'input/s':>7} {'ev/s/cl':>7} {'CPU%':>5} {'CPU%/cl':>7} {'skipped':>7} "
+          f"{'lat p50':>8} {'lat p99':>8}")
+    port = args.port
+    for mode in args.modes:
+        for rate in args.input_rate:
+            socketio, emitter = serve(port, mode, args.emit_hz)
+            time.sleep(0.5)
+            results = ctx.Queue()
+            proc = ctx.Process(target=run_clients, daemon=True,
+                               args=(f"http://127.0.0.1:{port}", args.clients, args.seconds, args.slow, results))
+            proc.start()
+            results.get(timeout=60)
+            emitter.summary()
+            cpu_from = time.process_time()
+            feed(socketio, emitter, mode, rate, args.seconds)
+            cpu = 100 * (time.process_time() - cpu_from) / args.seconds
+            s = emitter.summary()
+            emitter.stop()
+            r = results.get(timeout=args.seconds + 60)
+            proc.join(5)
+            lat = np.array(r['latency'] or [0.0]) * 1000
+            fast = r['counts'][args.slow:] or r['counts']
+            print(f"{mode:>9} {rate:>7.0f} {np.mean(fast) / args.seconds:>7.1f} {cpu:>5.1f} "
+                  f"{cpu / args.clients:>7.2f} {s['skipped']:>7} "
+                  f"{np.percentile(lat, 50):>8.1f} {np.percentile(lat, 99):>8.1f}")
+            port += 1  # the previous server keeps its port until the process exits
+
+
+if __name__ == "__main__":
+    main()
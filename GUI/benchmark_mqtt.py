@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Check that the dashboards' MQTT ingest keeps up with sustained message rates.
+
+A local broker stand-in (a minimal MQTT 3.1.1 server in a separate process,
+no mosquitto needed) publishes band-power messages to one subscriber at
+--rate messages/s. Like a real broker, it drops the client when no PINGREQ
+arrives within 1.5 x keepalive. The subscriber runs the dashboards' per-message work (the
+BrainwaveAnalyzer trend computation plus a JSON-encoded emit, and optionally
+--handler-ms more) either:
+
+* ``inline``: in paho's own network thread (loop_start / loop_forever with
+  everything in on_message), as the dashboards used to do, or
+* ``ingest``: through pieeg.ingest.MqttIngest (asyncio receive loop, bounded
+  queue, consumer thread).
+
+For each it reports messages received and handled per second, drops (by the
+ingest queue; by the broker once the client's socket backlog exceeds 1 MB,
+as mosquitto's max_queued_messages would, or while it reconnects), how often
+the client reconnected, the queue depth, handler time, end-to-end latency
+(publish -> handler done), the longest gap between keepalive pings and how
+often the broker cut the client off. paho disconnects by itself when a
+PINGRESP does not arrive within keepalive, e.g. because it is queued behind
+a backlog of messages the network thread has not read yet.
+
+  python3 benchmark_mqtt.py                          # 1 kHz for 10 s, both modes
+  python3 benchmark_mqtt.py --rate 2000 --handler-ms 1
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import struct
+import time
+
+import numpy as np
+
+from pieeg.ingest import MqttIngest
+from pieeg.rolling import BandStats
+
+TOPIC = "pieeg/m5stamp/commands"
+BROKER_QUEUE_BYTES = 1 << 20
+
+
+# ---- broker stand-in --------------------------------------------------------
+
+async def _read_packet(reader):
+    first = (await reader.readexactly(1))[0]
+    length, shift = 0, 0
+    while True:
+        b = (await reader.readexactly(1))[0]
+        length |= (b & 0x7F) << shift
+        shift += 7
+        if not b & 0x80:
+            break
+    return first, await reader.readexactly(length)
+
+
+def _publish_packet(topic: bytes, payload: bytes) -> bytes:
+    body = struct.pack('>H', len(topic)) + topic + payload
+    n, length = len(body), bytearray()
+    while True:
+        n, b = n >> 7, n & 0x7F
+        length.append(b | (0x80 if n else 0))
+        if not n:
+            break
+    return bytes([0x30]) + bytes(length) + body
+
+
+def run_broker(port: int, rate: float, seconds: float, ready, results) -> None:
+    """Broker process: publish ``rate`` messages/s for ``seconds`` to whichever client is subscribed."""
+    stats = {'published': 0, 'queue_full': 0, 'lost': 0, 'connections': 0, 'cut_off': 0, 'max_ping_gap': 0.0}
+    current = {'writer': None}
+    writers = set()
+    subscribed = None
+
+    async def session(reader, writer):
+        stats['connections'] += 1
+        writers.add(writer)
+        keepalive, last_ping = None, time.monotonic()
+
+        async def watchdog():
+            while True:
+                await asyncio.sleep(0.1)
+                if keepalive and time.monotonic() - last_ping > 1.5 * keepalive:
+                    stats['cut_off'] += 1
+                    writer.close()
+                    return
+
+        guard = asyncio.create_task(watchdog())
+        try:
+            while True:
+                kind, body = await _read_packet(reader)
+                if kind >> 4 == 1:  # CONNECT: keepalive is after the protocol name, level and flags
+                    name_len = struct.unpack_from('>H', body)[0]
+                    keepalive = struct.unpack_from('>H', body, 2 + name_len + 2)[0]
+                    writer.write(b'\x20\x02\x00\x00')
+                elif kind >> 4 == 8:  # SUBSCRIBE
+                    writer.write(b'\x90\x03' + body[:2] + b'\x00')
+                    current['writer'] = writer
+                    subscribed.set()
+                elif kind >> 4 == 12:  # PINGREQ
+                    now = time.monotonic()
+                    stats['max_ping_gap'] = max(stats['max_ping_gap'], now - last_ping)
+                    last_ping = now
+                    writer.write(b'\xd0\x00')
+                elif kind >> 4 == 14:  # DISCONNECT
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            guard.cancel()
+            writer.close()
+            writers.discard(writer)
+
+    async def publish():
+        await subscribed.wait()
+        start = time.monotonic()
+        topic = TOPIC.encode()
+        rng = np.random.default_rng(0)
+        sent = 0
+        while (now := time.monotonic()) - start < seconds:
+            due = int((now - start) * rate) - sent
+            sent += due
+            writer = current['writer']
+            for _ in range(due):
+                if writer is None or writer.is_closing():  # reconnecting: a real broker has no session to queue for
+                    stats['lost'] += 1
+                # like mosquitto's max_queued_messages: QoS 0 beyond the client's backlog is discarded
+                elif writer.transport.get_write_buffer_size() > BROKER_QUEUE_BYTES:
+                    stats['queue_full'] += 1
+                else:
+                    p = rng.random(4) * 1e-3
+                    payload = json.dumps({'theta_power': p[0], 'alpha_power': p[1], 'beta_power': p[2],
+                                          'gamma_power': p[3], 'dominant_wave': 'alpha', 'timestamp': time.time()})
+                    writer.write(_publish_packet(topic, payload.encode()))
+                    stats['published'] += 1
+            await asyncio.sleep(0.001)
+
+    async def main():
+        nonlocal subscribed
+        subscribed = asyncio.Event()
+        server = await asyncio.start_server(session, "127.0.0.1", port)
+        ready.set()
+        async with server:
+            await publish()
+            await asyncio.sleep(1.0)  # let the client drain
+            stats['reconnects'] = stats['connections'] - 1
+            server.close()  # no new sessions
+            for writer in list(writers):
+                writer.close()
+            while writers:
+                await asyncio.sleep(0.01)
+        results.put(stats)
+
+    asyncio.run(main())
+
+
+# ---- subscriber -------------------------------------------------------------
+
+class Work:
+    """The dashboards' per-message work: BrainwaveAnalyzer.analyze_patterns and an emit."""
+
+    def __init__(self, handler_ms: float):
+        self.windows = [BandStats(size=10), BandStats(size=100), BandStats(seconds=60)]
+        self.handler_s = handler_ms / 1000
+        self.latency = []
+        self.busy = 0.0
+        self.handled = 0
+
+    def __call__(self, topic, data):
+        start = time.perf_counter()
+        for window in self.windows:
+            window.push_record(data)
+        analysis = {f'{b}_trend': m for b, m in self.windows[0].means().items()}
+        json.dumps({'current': data, 'analysis': analysis})
+        while time.perf_counter() - start < self.handler_s:
+            pass
+        self.handled += 1
+        self.busy += time.perf_counter() - start
+        self.latency.append(time.time() - data['timestamp'])
+
+
+def run_inline(port: int, work: Work, seconds: float, keepalive: int) -> dict:
+    import paho.mqtt.client as mqtt
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    client.on_connect = lambda c, *a: c.subscribe(TOPIC)
+    client.on_message = lambda c, u, msg: work(msg.topic, json.loads(msg.payload))
+    client.connect("127.0.0.1", port, keepalive)
+    client.loop_start()
+    time.sleep(seconds + 1.5)
+    client.loop_stop()
+    return {}
+
+
+def run_ingest(port: int, work: Work, seconds: float, keepalive: int, queue_size: int) -> dict:
+    ingest = MqttIngest("127.0.0.1", port, keepalive=keepalive, queue_size=queue_size)
+    ingest.subscribe(TOPIC, work)
+    ingest.start()
+    time.sleep(seconds + 1.5)
+    s = ingest.summary()
+    ingest.stop()
+    return s
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=float, default=1000.0, help="messages/s published (default: 1000)")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--handler-ms", type=float, default=0.0, help="extra work per message (default: 0)")
+    ap.add_argument("--keepalive", type=int, default=2, help="client keepalive in s (default: 2)")
+    ap.add_argument("--queue", type=int, default=1024, help="ingest queue size (default: 1024)")
+    ap.add_argument("--port", type=int, default=18830)
+    ap.add_argument("--modes", nargs="+", choices=("inline", "ingest"), default=["inline", "ingest"])
+    args = ap.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{args.rate:.0f} msg/s for {args.seconds:.0f} s, handler +{args.handler_ms} ms, "
+          f"keepalive {args.keepalive} s")
+    print(f"{'mode':>7} {'recv/s':>7} {'done/s':>7} {'dropped':>7} {'broker':>7} {'reconn':>7} {'depth':>5} {'handler ms':>10} "
+          f"{'lat p50':>8} {'lat p99':>8} {'ping gap':>8} {'cut off':>7}")
+    for mode in args.modes:
+        ready, results = ctx.Event(), ctx.Queue()
+        broker = ctx.Process(target=run_broker, args=(args.port, args.rate, args.seconds, ready, results), daemon=True)
+        broker.start()
+        ready.wait(10)
+        work = Work(args.handler_ms)
+        if mode == "inline":
+            s = run_inline(args.port, work, args.seconds, args.keepalive)
+        else:
+            s = run_ingest(args.port, work, args.seconds, args.keepalive, args.queue)
+        b = results.get(timeout=30)
+        broker.join(5)
+        lat = np.array(work.latency or [0.0]) * 1000
+        received = s.get('received', work.handled)  # inline: the network thread only reads what it handled
+        print(f"{mode:>7} {received / args.seconds:>7.0f} {work.handled / args.seconds:>7.0f} "
+              f"{s.get('dropped', 0):>7} {b['queue_full'] + b['lost']:>7} {b['reconnects']:>7} {s.get('max_depth', 0):>5} "
+              f"{1000 * work.busy / max(1, work.handled):>10.3f} "
+              f"{np.percentile(lat, 50):>8.1f} {np.percentile(lat, 99):>8.1f} "
+              f"{b['max_ping_gap']:>8.2f} {b['cut_off']:>7}")
+
+
+if __name__ == "__main__":
+    main()
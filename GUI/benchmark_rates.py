@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Check that the acquisition/processing pipeline keeps up at each data rate.
+
+Runs the same path as 2.Graph_Gpio_D_1_5_4.py -- reader thread, decode,
+SampleRing, streaming display filter, 1 s band-power windows -- against the
+real-time simulator backend (pieeg.simulator) instead of the ADS1299s, and reports for each rate the
+effective sample rate, DRDY edges that were missed (the ADS1299 overwrites an
+unread frame at the next DRDY, so a late reader loses it), ring overruns and
+per-stage latency. "baseline" is the number of edges missed by the reader
+thread alone over the same time -- scheduler jitter that no amount of
+pipeline work can remove -- so the pipeline's own cost is missed - baseline.
+
+  python3 benchmark_rates.py                      # 250/500/1000/2000 SPS, 10 s each
+  python3 benchmark_rates.py --rates 2000 --seconds 30
+  python3 benchmark_rates.py --spi-us 0           # no simulated SPI transfer time
+
+Run it on the Pi itself: the numbers on a desktop say little about a Pi 4/5.
+"""
+import argparse
+import time
+
+from pieeg import DATA_RATES, AcquisitionThread, SampleRing, decode_chained, status_words
+from pieeg.bandpower import band_powers_mean
+from pieeg.decimate import Decimator
+from pieeg.filters import StreamingFilter, chain_sos
+from pieeg.health import AcquisitionHealth
+from pieeg.simulator import SimulatedDevice
+
+# Two 27-byte transfers at the script's 4 MHz SPI clock
+DEFAULT_SPI_US = 2 * 27 * 8 / 4e6 * 1e6
+
+
+def run_rate(rate: int, seconds: float, spi_us: float, process: bool = True) -> dict:
+    device = SimulatedDevice(chips=2, rate=rate, seed=rate)
+    health = AcquisitionHealth(sample_rate=rate, chips=device.chips)
+    spi_s = spi_us / 1e6
+
+    def read_sample():
+        with health.stage('spi'):
+            raw = device.read_raw()
+            until = time.perf_counter() + spi_s
+            while time.perf_counter() < until:
+                pass
+        status = status_words(raw)
+        if not health.check_status(status):
+            return None
+        with health.stage('decode'):
+            return decode_chained(raw, device.chips)[0], status
+
+    ring = SampleRing(capacity=rate * 10, channels=16, status_words=2)
+    display_filter = StreamingFilter(chain_sos(rate, ('highpass', 1, 5), ('lowpass', 10, 5)), channels=16)
+    reader = AcquisitionThread(device.drdy, read_sample, ring, health=health)
+    display_window = ring.reader()
+    analysis_window = ring.reader()
+    plot_hop = max(1, rate // 50)
+    display = Decimator(rate, 400 / 20, 16)  # the script's default --display-points over its 20 s plot
+
+    health.summary()  # start the measurement period now
+    cpu_from = time.process_time()
+    reader.start()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if not process:  # reader only: what the OS scheduler alone costs
+            time.sleep(0.05)
+            continue
+        shown, _ = display_window.read(plot_hop, timeout=1.0)
+        with health.stage('filter'):
+            display.process(display_filter.process(shown))
+        if analysis_window.available < rate:
+            continue
+        block, _ = analysis_window.read(rate, timeout=1.0)
+        with health.stage('bandpower'):
+            band_powers_mean(block, rate)
+    reader.stop()
+    if reader.error is not None:
+        raise reader.error
+
+    summary = health.summary()
+    summary['cpu_percent'] = 100 * (time.process_time() - cpu_from) / summary['period_s']
+    summary['overruns'] = display_window.overruns + analysis_window.overruns
+    return summary
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rates", type=int, nargs="+", choices=DATA_RATES, default=list(DATA_RATES))
+    ap.add_argument("--seconds", type=float, default=10.0, help="run time per rate")
+    ap.add_argument("--spi-us", type=float, default=DEFAULT_SPI_US,
+                    help="busy-wait per DRDY standing in for the SPI transfers (default: %(default).0f)")
+    args = ap.parse_args()
+
+    print(f"{'SPS':>5} {'effective':>9} {'missed':>6} {'baseline':>8} {'overruns':>8} {'CPU%':>5}  "
+          f"stage ms mean/p99/max")
+    for rate in args.rates:
+        baseline = run_rate(rate, args.seconds, args.spi_us, process=False)['missed_drdy']
+        s = run_rate(rate, args.seconds, args.spi_us)
+        stages = "  ".join(f"{name} {st['mean_ms']:.3f}/{st['p99_ms']:.3f}/{st['max_ms']:.2f}"
+                           for name, st in s['stages'].items() if st['count'])
+        print(f"{rate:>5} {s['effective_sps']:>9.1f} {s['missed_drdy']:>6} {baseline:>8} {s['overruns']:>8} "
+              f"{s['cpu_percent']:>5.1f}  {stages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Check that the WebSocket frame server keeps up with many browser clients.
+
+Runs pieeg.frameserver.FrameServer on the real-time simulator backend, and
+connects N WebSocket clients from a separate process (browsers are not on
+the Pi, but here they share its CPU, so the numbers are pessimistic). It
+first compares the JSON and binary (f32) encodings of one frame: size,
+encode and decode time. Then, for each N, it reports the frames each client got per second, the delivery
+latency (frame timestamp -> client receive), the server's per-frame build
+and fan-out time, CPU use, and the DRDY edges the acquisition missed. As in
+benchmark_rates.py, "baseline" is the missed count with no server running.
+
+  python3 benchmark_ws.py                          # 0/1/10/50 clients at 250 SPS, 10 s each
+  python3 benchmark_ws.py --clients 50 100 --rate 500
+  python3 benchmark_ws.py --format json           # clients that do not ask for binary frames
+
+Run it on the Pi itself: the numbers on a desktop say little about a Pi 4/5.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+
+import numpy as np
+
+from pieeg import DATA_RATES, open_device
+from pieeg.frameserver import ENCODERS, FORMATS, HOP_MS, RAW_SECONDS, WS_PATH, FrameBuilder, FrameServer, decode_binary
+from pieeg.simulator import SimulatedPiEEG16
+
+DECODERS = {'f32': decode_binary, 'json': json.loads}
+
+
+def codec_table(rate: int, repeat: int = 200) -> None:
+    builder = FrameBuilder(rate, 16)
+    builder.push(SimulatedPiEEG16(rate).read_chunk(int(rate * RAW_SECONDS)).astype(np.float32))
+    frame = builder.frame()
+    print(f"{'format':>6} {'bytes':>7} {'encode ms':>9} {'decode ms':>9}")
+    for fmt in FORMATS:
+        encode, decode = ENCODERS[fmt], DECODERS[fmt]
+        message = encode(frame)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            encode(frame)
+        encode_ms = (time.perf_counter() - start) / repeat * 1000
+        start = time.perf_counter()
+        for _ in range(repeat):
+            decode(message)
+        decode_ms = (time.perf_counter() - start) / repeat * 1000
+        print(f"{fmt:>6} {len(message):>7} {encode_ms:>9.3f} {decode_ms:>9.3f}")
+
+
+def frame_ts(message) -> float:
+    if isinstance(message, bytes):
+        return decode_binary(message).ts
+    return json.loads(message)['ts']
+
+
+def run_clients(url: str, count: int, seconds: float, fmt: str, results) -> None:
+    """Client process: ``count`` connections counting frames and latency."""
+    from websockets.asyncio.client import connect
+
+    async def client(latencies, stats):
+        async with connect(url, max_size=None, compression=None) as ws:
+            if fmt != "json":
+                await ws.send(json.dumps({'formats': [fmt]}))
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                try:
+                    message = await asyncio.wait_for(ws.recv(), deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    break
+                latencies.append(time.time() - frame_ts(message))
+                stats[0] += 1
+                stats[1] += len(message)
+
+    async def main():
+        latencies, per_client = [], [[0, 0] for _ in range(count)]
+        await asyncio.gather(*(client(latencies, s) for s in per_client))
+        results.put({'frames': [s[0] for s in per_client], 'bytes': sum(s[1] for s in per_client),
+                     'latency': latencies})
+
+    asyncio.run(main())
+
+
+async def run_server(rate: int, clients: int, seconds: float, port: int, fmt: str = "f32") -> dict:
+    stream = open_device("sim", rate)
+    with stream:
+        health = stream.health
+        if clients == 0:  # baseline: acquisition alone
+            health.summary()
+            await asyncio.sleep(seconds)
+            return {'health': health.summary()}
+        server = FrameServer(stream, host="127.0.0.1", port=port)
+        server.ready = asyncio.Event()
+        task = asyncio.create_task(server.serve())
+        await asyncio.wait([task, asyncio.create_task(server.ready.wait())], return_when=asyncio.FIRST_COMPLETED)
+        if task.done():
+            task.result()  # the server failed to start
+        ctx = multiprocessing.get_context("spawn")  # forking a threaded process can deadlock the child
+        results = ctx.Queue()
+        proc = ctx.Process(target=run_clients, daemon=True,
+                           args=(f"ws://127.0.0.1:{port}{WS_PATH}", clients, seconds, fmt, results))
+        proc.start()
+        while len(server.clients) < clients and proc.is_alive():
+            await asyncio.sleep(0.05)
+        health.summary()
+        server.summary()
+        cpu_from = time.process_time()
+        await asyncio.sleep(seconds)
+        out = {'health': health.summary(), 'server': server.summary(),
+               'cpu_percent': 100 * (time.process_time() - cpu_from) / seconds}
+        out['clients'] = await asyncio.to_thread(results.get, True, seconds + 30)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        proc.join(5)
+        return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50])
+    ap.add_argument("--rate", type=int, choices=DATA_RATES, default=250)
+    ap.add_argument("--seconds", type=float, default=10.0, help="run time per client count")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--format", choices=FORMATS, default="f32", help="frame format the clients ask for")
+    args = ap.parse_args()
+
+    codec_table(args.rate)
+
+    baseline = asyncio.run(run_server(args.rate, 0, args.seconds, args.port))['health']['missed_drdy']
+    print(f"{args.rate} SPS, {args.format} frames, {1000 / HOP_MS:.0f} frames/s expected, "
+          f"baseline missed DRDY {baseline}")
+    print(f"{'clients':>7} {'fps/client':>10} {'min':>5} {'MB/s':>6} {'lat p50':>8} {'lat p99':>8} "
+          f"{'build ms':>8} {'fanout ms':>9} {'CPU%':>5} {'skipped':>7} {'missed':>6}")
+    for n in args.clients:
+        r = asyncio.run(run_server(args.rate, n, args.seconds, args.port, args.format))
+        frames = np.array(r['clients']['frames']) / args.seconds
+        lat = np.array(r['clients']['latency']) * 1000
+        s = r['server']
+        print(f"{n:>7} {frames.mean():>10.2f} {frames.min():>5.1f} "
+              f"{r['clients']['bytes'] / args.seconds / 1e6:>6.2f} "
+              f"{np.percentile(lat, 50):>8.1f} {np.percentile(lat, 99):>8.1f} "
+              f"{s['build']['mean_ms']:>8.2f} {s['fanout']['mean_ms']:>9.2f} {r['cpu_percent']:>5.1f} "
+              f"{s['skipped']:>7} {r['health']['missed_drdy']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ import time
 import os
 from datetime import datetime
 
+from pieeg.shm import BAND_CHANNEL, ShmSubscriber, band_dict
+
 class BrainwaveDashboardHandler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, dashboard_instance=None, **kwargs):
         self.dashboard = dashboard_instance
@@ -469,14 +471,15 @@ class BrainwaveDashboardHandler(http.server.SimpleHTTPRequestHandler):
         self.wfile.write(html_content.encode('utf-8'))
     
     def serve_brainwave_api(self):
-        # 脳波データファイルを読み取り
+        # 共有メモリの最新値（取得スクリプトが動いていなければ脳波データファイル）
         data_file = '/tmp/latest_eeg_data.json'
         
         try:
-            if os.path.exists(data_file):
+            data = self.dashboard.latest_band_data() if self.dashboard else None
+            if data is None and os.path.exists(data_file):
                 with open(data_file, 'r') as f:
                     data = json.load(f)
-            else:
+            elif data is None:
                 # ファイルが存在しない場合のデフォルトデータ
                 data = {
                     'theta_power': 0.0,
@@ -507,6 +510,17 @@ class BrainwaveDashboardHandler(http.server.SimpleHTTPRequestHandler):
 class BrainwaveDashboard:
     def __init__(self, port=8081):
         self.port = port
+        self.subscriber = None
+
+    def latest_band_data(self):
+        """Newest band-power update from shared memory, or None if not available"""
+        if self.subscriber is None:
+            try:
+                self.subscriber = ShmSubscriber(BAND_CHANNEL)
+            except FileNotFoundError:
+                return None
+        record = self.subscriber.latest()
+        return None if record is None else band_dict(record)
         
     def run(self):
         def handler(*args, **kwargs):
@@ -520,7 +534,7 @@ class BrainwaveDashboard:
                     print("🧠 PiEEG Brainwave Dashboard")
                     print("=" * 50)
                     print(f"🌐 Web UI: http://localhost:{port_tried}")
-                    print(f"📁 Data File: /tmp/latest_eeg_data.json")
+                    print(f"📁 Data: shared memory '{BAND_CHANNEL}' (fallback /tmp/latest_eeg_data.json)")
                     print("📊 Real-time brainwave visualization")
                     print("=" * 50)
                     print("Ctrl+C to stop")
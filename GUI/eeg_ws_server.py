@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Live PiEEG frames for the web UI (ServerSource, default ws://localhost:8000/ws).
+
+  python3 eeg_ws_server.py                        # PiEEG-16 at 250 SPS
+  python3 eeg_ws_server.py --backend sim          # no hardware needed
+  python3 eeg_ws_server.py --rate 500 --port 8765
+
+Every 100 ms each connected browser gets the last 4 s of raw data at 50
+points/s (M4-decimated) and the band powers of the last 1 s (see pieeg.frameserver).
+"""
+import argparse
+import asyncio
+import sys
+
+from pieeg import BACKENDS, DATA_RATES, DRDY_MODES, open_device
+from pieeg.device import PIEEG16
+from pieeg.decimate import MODES
+from pieeg.frameserver import DISPLAY_HZ, WS_PATH, WS_PORT, FrameServer
+from pieeg.health import AcquisitionHealth
+
+
+async def report(server: FrameServer, health: AcquisitionHealth, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        print(FrameServer.format_summary(server.summary()))
+        print(AcquisitionHealth.format_summary(health.summary()))
+
+
+async def main(args) -> None:
+    stream = open_device(args.backend, args.rate, spi=args.spi, drdy=args.drdy,
+                         sim_speed=args.sim_speed or None)
+    with stream:
+        print(f"✅ {stream.chips} x ADS1299 ({args.backend}): {stream.channels} channels at {args.rate} SPS")
+        server = FrameServer(stream, host=args.host, port=args.port, display_hz=args.display_hz,
+                             display_mode=args.display_mode)
+        print(f"🌐 Serving frames on ws://{args.host}:{args.port}{WS_PATH}")
+        reporter = asyncio.create_task(report(server, stream.health, args.stats_interval))
+        try:
+            await server.serve()
+        finally:
+            reporter.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebSocket frame server for the PiEEG web UI")
+    parser.add_argument("--backend", choices=BACKENDS, default="ads1299")
+    parser.add_argument("--rate", type=int, choices=DATA_RATES, default=250)
+    parser.add_argument("--sim-speed", type=float, default=1.0,
+                        help="simulator pace as a multiple of real time (default: 1)")
+    parser.add_argument("--spi", default=PIEEG16, metavar="PORTS",
+                        help="ADS1299 chips as BUS.DEV[:GPIO_CS][xDAISY],... (default: %(default)s)")
+    parser.add_argument("--drdy", choices=DRDY_MODES, default="edge")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=WS_PORT)
+    parser.add_argument("--display-hz", type=int, default=DISPLAY_HZ,
+                        help="points per second of the raw traces sent to the browser (default: %(default)s)")
+    parser.add_argument("--display-mode", choices=MODES, default="m4",
+                        help="trace decimation: m4/lttb keep spikes and blinks, stride is every Nth sample (default: m4)")
+    parser.add_argument("--stats-interval", type=float, default=10.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,43 @@
+"""PiEEG-16 acquisition and DSP helpers shared by the GUI scripts and dashboards.
+
+``open_device`` is the entry point for embedding acquisition in another program.
+"""
+
+from .acquire import AcquisitionThread
+from .ads1299 import (
+    CHANNELS_PER_CHIP,
+    DATA_RATES,
+    FRAME_BYTES,
+    UV_PER_LSB,
+    config1_for_rate,
+    decode_chained,
+    decode_frames,
+    frames_to_array,
+    status_words,
+)
+from .drdy import DRDY_MODES, EdgeDrdy, PollingDrdy, request_drdy
+from .ring import RingReader, SampleRing
+from .stream import BACKENDS, Block, EEGStream, open_device
+
+__all__ = [
+    "AcquisitionThread",
+    "BACKENDS",
+    "Block",
+    "CHANNELS_PER_CHIP",
+    "DATA_RATES",
+    "DRDY_MODES",
+    "EEGStream",
+    "EdgeDrdy",
+    "FRAME_BYTES",
+    "PollingDrdy",
+    "RingReader",
+    "SampleRing",
+    "UV_PER_LSB",
+    "config1_for_rate",
+    "decode_chained",
+    "decode_frames",
+    "frames_to_array",
+    "open_device",
+    "request_drdy",
+    "status_words",
+]
@@ -0,0 +1,62 @@
+"""Background acquisition: DRDY → SPI read → decode → SampleRing.
+
+The reader thread does nothing but service DRDY and store samples, so slow
+consumers (filtering, plotting, network output) can never make it miss an
+edge. Consumers pull from the ring through their own RingReader.
+"""
+import threading
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .health import AcquisitionHealth
+from .ring import SampleRing
+
+
+class AcquisitionThread(threading.Thread):
+    """Reads one sample per DRDY edge into a SampleRing.
+
+    ``read_sample`` performs the SPI transfer(s) for one DRDY and returns
+    ``(sample, status)`` -- the decoded (channels,) sample and each chip's
+    24-bit status word -- or ``None`` when the frame fails its status check.
+    """
+
+    def __init__(self, drdy,
+                 read_sample: Callable[[], Optional[Tuple[np.ndarray, Sequence[int]]]],
+                 ring: SampleRing, timeout: float = 1.0,
+                 health: Optional[AcquisitionHealth] = None):
+        super().__init__(name="pieeg-reader", daemon=True)
+        self.drdy = drdy
+        self.read_sample = read_sample
+        self.ring = ring
+        self.timeout = timeout
+        self.health = health
+        self.rejected = 0  # frames dropped by the status check
+        self.timeouts = 0  # DRDY waits that saw no edge
+        self.error: Optional[BaseException] = None
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                ts = self.drdy.wait(self.timeout)
+                if ts is None:
+                    self.timeouts += 1
+                    continue
+                if self.health is not None:
+                    self.health.observe_edge(ts, getattr(self.drdy, 'last_skipped', 0))
+                result = self.read_sample()
+                if result is None:
+                    self.rejected += 1
+                    continue
+                self.ring.append(result[0], ts, result[1])
+                if self.health is not None:
+                    self.health.samples += 1
+        except BaseException as e:  # surface to the consumer instead of dying silently
+            self.error = e
+            raise
+
+    def stop(self, join: bool = True) -> None:
+        self._stop_event.set()
+        if join and self.is_alive() and threading.current_thread() is not self:
+            self.join(self.timeout + 1.0)
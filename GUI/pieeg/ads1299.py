@@ -0,0 +1,102 @@
+"""ADS1299 RDATAC frame decoding.
+
+In continuous-read mode every DRDY yields one 27-byte frame per chip:
+3 status bytes (1100 + LOFF_STATP + LOFF_STATN + GPIO) followed by eight
+24-bit big-endian two's-complement channel words. The helpers here decode any
+number of such frames at once with NumPy instead of a per-byte Python loop.
+"""
+from typing import Union
+
+import numpy as np
+
+FRAME_BYTES = 27
+STATUS_BYTES = 3
+CHANNELS_PER_CHIP = 8
+
+# Same scale the acquisition script always used: 4.5 V reference over the
+# full 24-bit code range, expressed in μV.
+UV_PER_LSB = 1000000 * 4.5 / 16777215
+
+# CONFIG1 value per data rate (SPS): 0b10010 + DR[2:0]. Bit 6 (DAISY_EN) = 0
+# selects daisy-chain mode, which decode_chained expects for stacked boards;
+# bit 5 = 0 disables the oscillator clock output. 0x96 (250 SPS) is what the
+# script always wrote.
+CONFIG1_BY_RATE = {250: 0x96, 500: 0x95, 1000: 0x94, 2000: 0x93}
+DATA_RATES = tuple(sorted(CONFIG1_BY_RATE))
+
+RawFrames = Union[bytes, bytearray, memoryview, list, np.ndarray]
+
+
+def frames_to_array(raw: RawFrames) -> np.ndarray:
+    """View one chip's raw frames as a (n_frames, 27) uint8 array.
+
+    Accepts a single frame (e.g. the list from ``spi.readbytes(27)``) or many
+    frames concatenated back to back. bytes-like input is not copied.
+    """
+    if isinstance(raw, np.ndarray):
+        buf = raw.astype(np.uint8, copy=False).reshape(-1)
+    else:
+        if isinstance(raw, list):
+            raw = bytes(raw)
+        buf = np.frombuffer(raw, dtype=np.uint8)
+    if buf.size % FRAME_BYTES:
+        raise ValueError(f"raw length {buf.size} is not a multiple of {FRAME_BYTES}")
+    return buf.reshape(-1, FRAME_BYTES)
+
+
+def _decode_chip(frames: np.ndarray) -> np.ndarray:
+    words = frames[:, STATUS_BYTES:].reshape(-1, CHANNELS_PER_CHIP, 3)
+    # Place the three bytes in the top of a big-endian int32 and shift back
+    # down arithmetically: the shift performs the 24 → 32 bit sign extension.
+    padded = np.zeros(words.shape[:2] + (4,), dtype=np.uint8)
+    padded[..., :3] = words
+    counts = padded.view(">i4")[..., 0] >> 8
+    return counts.astype(np.float32) * np.float32(UV_PER_LSB)
+
+
+def decode_frames(*chips: RawFrames) -> np.ndarray:
+    """Decode raw frames from one or more chips into μV.
+
+    Each positional argument is one chip's frames (single or concatenated);
+    all chips must carry the same number of frames. Returns a float32 array
+    of shape (n_frames, 8 * len(chips)) with chip 1's channels first, i.e.
+    ``decode_frames(output, output_2)`` gives the 16 PiEEG-16 channels.
+    """
+    if not chips:
+        raise ValueError("decode_frames needs at least one chip's frames")
+    arrays = [frames_to_array(c) for c in chips]
+    n = arrays[0].shape[0]
+    if any(a.shape[0] != n for a in arrays):
+        raise ValueError("all chips must provide the same number of frames")
+    if len(arrays) == 1:
+        return _decode_chip(arrays[0])
+    # Interleave the chips frame by frame so a single vectorised pass decodes
+    # them all and the result already has the (n, 8 * chips) layout.
+    return _decode_chip(np.hstack(arrays).reshape(-1, FRAME_BYTES)).reshape(n, -1)
+
+
+def decode_chained(raw: RawFrames, chips: int) -> np.ndarray:
+    """Decode DRDYs whose ``chips`` frames are stored back to back.
+
+    This is the layout of one daisy-chain read (``27 * chips`` bytes per DRDY)
+    or of several chips' reads gathered into one buffer. Returns a float32
+    array of shape (n_drdy, 8 * chips) with chip 1's channels first.
+    """
+    frames = frames_to_array(raw)
+    if frames.shape[0] % chips:
+        raise ValueError(f"{frames.shape[0]} frames do not split into DRDYs of {chips} chips")
+    return _decode_chip(frames).reshape(-1, CHANNELS_PER_CHIP * chips)
+
+
+def status_words(raw: RawFrames) -> np.ndarray:
+    """Return the 24-bit status word of every frame as uint32 (n_frames,)."""
+    head = frames_to_array(raw)[:, :STATUS_BYTES].astype(np.uint32)
+    return (head[:, 0] << 16) | (head[:, 1] << 8) | head[:, 2]
+
+
+def config1_for_rate(rate: int) -> int:
+    """CONFIG1 register value selecting ``rate`` samples per second."""
+    try:
+        return CONFIG1_BY_RATE[rate]
+    except KeyError:
+        raise ValueError(f"unsupported ADS1299 data rate {rate} SPS (choose from {DATA_RATES})") from None
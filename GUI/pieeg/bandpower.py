@@ -0,0 +1,68 @@
+"""EEG band power for all channels from one batched rFFT.
+
+Python twin of web/src/fft.ts so the acquisition scripts, dashboards and the
+web UI report comparable numbers: per-channel mean removal, Hann taper,
+zero-padding to the next power of two, one-sided PSD in μV²/Hz and
+trapezoidal integration over the same δ/θ/α/β/γ edges.
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+
+BANDS: Dict[str, Tuple[float, float]] = {
+    "delta": (1.0, 4.0),
+    "theta": (4.0, 8.0),
+    "alpha": (8.0, 13.0),
+    "beta": (13.0, 30.0),
+    "gamma": (30.0, 45.0),
+}
+BAND_NAMES = tuple(BANDS)
+
+
+def _next_pow2(n: int) -> int:
+    return 1 << (n - 1).bit_length()
+
+
+def psd(window: np.ndarray, srate: float) -> Tuple[np.ndarray, np.ndarray]:
+    """One-sided PSD of every column of an (n, channels) window.
+
+    Returns ``(freqs, psd)`` with shapes (nfft/2 + 1,) and (nfft/2 + 1, channels).
+    """
+    x = np.asarray(window, dtype=np.float64)
+    if x.ndim == 1:
+        x = x[:, None]
+    n = x.shape[0]
+    if n < 2:
+        raise ValueError("need >= 2 samples")
+    nfft = _next_pow2(n)
+    w = np.hanning(n)  # 0.5 - 0.5 cos(2πi / (n - 1)), as in fft.ts
+    tapered = (x - x.mean(axis=0)) * w[:, None]
+    spec = np.fft.rfft(tapered, n=nfft, axis=0)
+    p = (spec.real ** 2 + spec.imag ** 2) / (np.dot(w, w) * srate)
+    p[1:-1] *= 2  # one-sided: every bin except DC and Nyquist
+    return np.arange(nfft // 2 + 1) * (srate / nfft), p
+
+
+def _band_matrix(freqs: np.ndarray) -> np.ndarray:
+    # (bands, segments) weights: a trapezoid segment counts towards a band
+    # when it overlaps [lo, hi] at all, exactly like integrate() in fft.ts.
+    f0, f1 = freqs[:-1], freqs[1:]
+    return np.array([((f1 >= lo) & (f0 <= hi)) * (f1 - f0) for lo, hi in BANDS.values()])
+
+
+def band_powers(window: np.ndarray, srate: float) -> np.ndarray:
+    """Band power per channel as a (channels, len(BANDS)) array in μV²."""
+    freqs, p = psd(window, srate)
+    segments = (p[:-1] + p[1:]) / 2
+    return (_band_matrix(freqs) @ segments).T
+
+
+def band_powers_mean(window: np.ndarray, srate: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(per_channel, mean)``: the (channels, bands) array and its channel mean."""
+    per_ch = band_powers(window, srate)
+    return per_ch, per_ch.mean(axis=0)
+
+
+def as_dict(powers: np.ndarray) -> Dict[str, float]:
+    """Name a (bands,) vector of powers, e.g. the mean from band_powers_mean."""
+    return {name: float(v) for name, v in zip(BAND_NAMES, powers)}
@@ -0,0 +1,168 @@
+"""Coalesced Socket.IO broadcasts for the dashboards.
+
+Emitting on every input message ties the browser's event rate to the input
+rate. The dashboard's Chart.js view adds one point per event, so anything
+above its redraw rate is wasted work for the server, the network and the
+page. Handlers call ``EmitCoalescer.update(event, data)`` instead. That
+only stores the newest payload per event. A background task sends frames at
+``rate`` Hz (10 by default): per event, the latest payload, if it changed
+since the client's previous frame.
+
+Each client may ask for a lower rate (``set_rate``; the dashboard page sends
+``?hz=N`` from its URL). Every payload goes out as one emit to the list of
+clients due for it. python-socketio encodes a multi-recipient emit once, so
+the server cost per frame does not grow with the number of clients and does
+not depend on the input rate. A client whose engine.io send queue still
+holds ``max_queue`` packets skips the frame. It gets the newest data once
+it catches up rather than a growing backlog, as in pieeg.frameserver.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .health import LatencyHistogram, PeriodReport
+
+EMIT_HZ = 10.0
+MAX_QUEUE = 8
+
+
+class _Client:
+    __slots__ = ('interval', 'next_due', 'seen')
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.next_due = 0.0
+        self.seen: Dict[str, int] = {}  # event -> version last sent
+
+
+class EmitCoalescer:
+    """Latest-value-wins frames of Socket.IO events at ``rate`` Hz, per client at most its own rate."""
+
+    def __init__(self, socketio, rate: float = EMIT_HZ, max_queue: int = MAX_QUEUE, namespace: str = '/'):
+        self.socketio = socketio
+        self.rate = rate
+        self.max_queue = max_queue
+        self.namespace = namespace
+        self._latest: Dict[str, Any] = {}
+        self._version: Dict[str, int] = {}
+        self._clients: Dict[str, _Client] = {}
+        self._lock = threading.Lock()
+        self._running = False
+        # Cumulative: updates under the lock, the rest by the frame task; summary() reports deltas
+        self.updates = 0
+        self.frames = 0
+        self.emits = 0
+        self.skipped = 0  # client frames not sent because the client was backed up
+        self.frame_time = LatencyHistogram()
+        self.report = PeriodReport(self, counters=('updates', 'frames', 'emits', 'skipped'),
+                                   histograms=('frame_time',))
+
+    # ---- producers ----------------------------------------------------------
+
+    def update(self, event: str, data: Any) -> None:
+        """Make ``data`` the payload of ``event`` in the next frame (replacing any unsent one).
+
+        ``data`` is kept by reference and serialized later by the frame task:
+        pass a copy of anything the caller keeps changing.
+        """
+        with self._lock:
+            self._latest[event] = data
+            self._version[event] = self._version.get(event, 0) + 1
+            self.updates += 1
+
+    # ---- clients ------------------------------------------------------------
+
+    def add_client(self, sid: str, rate: Optional[float] = None) -> None:
+        with self._lock:
+            self._clients[sid] = _Client(1.0 / self._clamp(rate))
+
+    def set_rate(self, sid: str, rate: Optional[float]) -> float:
+        """Set a client's frame rate (capped at ``rate``); returns the rate in effect."""
+        rate = self._clamp(rate)
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is not None:
+                client.interval = 1.0 / rate
+        return rate
+
+    def remove_client(self, sid: str) -> None:
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    def _clamp(self, rate: Optional[float]) -> float:
+        try:
+            rate = float(rate)
+        except (TypeError, ValueError):
+            return self.rate
+        return min(self.rate, rate) if rate > 0 else self.rate
+
+    def _backlog(self, sid: str) -> int:
+        """Packets queued for ``sid`` by engine.io and not yet written (0 if unknown)."""
+        server = self.socketio.server
+        try:
+            socket = server.eio.sockets.get(server.manager.eio_sid_from_sid(sid, self.namespace))
+            return socket.queue.qsize() if socket is not None else 0
+        except AttributeError:
+            return 0
+
+    # ---- frames -------------------------------------------------------------
+
+    def flush(self, now: Optional[float] = None) -> int:
+        """Send one frame to every client that is due; returns the number of emits."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            latest = dict(self._latest)
+            version = dict(self._version)
+            due = [(sid, c) for sid, c in self._clients.items() if now >= c.next_due]
+        recipients: Dict[str, List[str]] = {}
+        for sid, client in due:
+            client.next_due = max(client.next_due + client.interval, now)
+            if self.max_queue and self._backlog(sid) >= self.max_queue:
+                self.skipped += 1
+                continue
+            for event, v in version.items():
+                if client.seen.get(event, 0) < v:
+                    recipients.setdefault(event, []).append(sid)
+                    client.seen[event] = v
+        for event, sids in recipients.items():
+            self.socketio.emit(event, latest[event], to=sids, namespace=self.namespace)
+        self.emits += len(recipients)
+        if recipients:
+            self.frames += 1
+        return len(recipients)
+
+    def run(self) -> None:
+        """Frame loop (run with ``socketio.start_background_task``)."""
+        period = 1.0 / self.rate
+        due = time.monotonic()
+        while self._running:
+            start = time.perf_counter()
+            if self.flush():
+                self.frame_time.add(time.perf_counter() - start)
+            due += period
+            delay = due - time.monotonic()
+            if delay < 0:  # fell behind: skip the missed frames rather than bursting
+                due = time.monotonic()
+                delay = 0
+            self.socketio.sleep(delay)
+
+    def start(self) -> "EmitCoalescer":
+        if not self._running:
+            self._running = True
+            self.socketio.start_background_task(self.run)
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+
+    def summary(self, reset: bool = True) -> Dict:
+        """Updates, frames, emits, skips and frame time since the previous reset."""
+        out = self.report.take(reset)
+        out.update(clients=len(self._clients), rate=self.rate, frame=out.pop('frame_time'))
+        return out
+
+    @staticmethod
+    def format_summary(s: Dict) -> str:
+        return (f"📤 {s['clients']} clients at <= {s['rate']:g} Hz | {s['updates']} updates -> {s['frames']} frames, "
+                f"{s['emits']} emits | frame {s['frame']['mean_ms']:.2f}/{s['frame']['max_ms']:.2f} ms | "
+                f"skipped {s['skipped']}")
@@ -0,0 +1,134 @@
+"""Per-channel data over MQTT for dashboards that do not share the Pi's memory.
+
+``ChannelPublisher`` drains its own RingReader every ``BLOCK_SEC``, decimates
+the block to ``display_hz`` points/s (pieeg.decimate, M4 by default) and
+publishes ``batch`` blocks per message on ``CHANNEL_TOPIC`` (QoS 0) through
+one persistent paho client:
+
+    {"ts": first row (wall clock, s), "srate", "channels", "display_hz", "raw": [[μV] * channels] * N,
+     "bands_ts", "bands": {band: μV²}, "bands_per_ch": {band: [μV²] * channels}}
+
+The ``raw``, ``bands`` and ``bands_per_ch`` fields mean the same as in
+pieeg.frameserver's frames. Row i of ``raw`` was acquired at about
+``ts + i / display_hz``. The band fields are only present when the
+processing loop offered new powers (``offer_bands``) since the previous
+message. Publishing runs in this thread, so a missing broker never stalls
+acquisition or the processing loop: paho reconnects in the background, and
+messages sent meanwhile are dropped and counted.
+"""
+import json
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from .bandpower import BAND_NAMES
+from .decimate import Decimator
+from .health import PeriodReport
+from .ring import RingReader
+
+CHANNEL_TOPIC = "pieeg/channels/data"
+MQTT_BROKER = "localhost"
+MQTT_PORT = 1883
+BLOCK_SEC = 0.1
+BATCH = 5
+DISPLAY_HZ = 50
+
+
+def mqtt_client(broker: str, port: int = MQTT_PORT):
+    """A paho client connecting (and reconnecting) to ``broker`` in its own network thread."""
+    import paho.mqtt.client as mqtt
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    client.connect_async(broker, port, 60)
+    client.loop_start()
+    return client
+
+
+class ChannelPublisher(threading.Thread):
+    """Publishes one stream's decimated raw blocks and per-channel band powers on ``topic``."""
+
+    def __init__(self, client, reader: RingReader, srate: float, channels: int,
+                 topic: str = CHANNEL_TOPIC, block: float = BLOCK_SEC, batch: int = BATCH,
+                 display_hz: float = DISPLAY_HZ, display_mode: str = "m4", qos: int = 0):
+        super().__init__(name="pieeg-channels", daemon=True)
+        self.client = client
+        self.reader = reader
+        self.srate = srate
+        self.channels = channels
+        self.topic = topic
+        self.block = block
+        self.batch = max(1, batch)
+        self.qos = qos
+        self.decimator = Decimator(srate, display_hz, channels, display_mode)
+        self._rows = []
+        self._t0: Optional[float] = None
+        self._blocks = 0
+        self._bands = None  # (ts, per_ch) offered since the last message
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.messages = 0
+        self.bytes_sent = 0
+        self.dropped = 0  # not handed to the broker (disconnected, queue full)
+        self.report = PeriodReport(self, counters=('messages', 'bytes_sent', 'dropped'))  # this thread counts
+
+    def offer_bands(self, per_ch: np.ndarray, ts: float) -> None:
+        """Attach a (channels, bands) band-power array, computed at wall-clock ``ts``, to the next message."""
+        with self._lock:
+            self._bands = (ts, per_ch)
+
+    def _message(self) -> bytes:
+        raw = np.concatenate(self._rows) if self._rows else np.empty((0, self.channels), dtype=np.float32)
+        out = {'ts': self._t0, 'srate': self.srate, 'channels': self.channels,
+               'display_hz': self.decimator.rate, 'raw': np.round(raw, 2).tolist()}
+        with self._lock:
+            bands, self._bands = self._bands, None
+        if bands is not None:
+            ts, per_ch = bands
+            out['bands_ts'] = ts
+            out['bands'] = {name: float(v) for name, v in zip(BAND_NAMES, per_ch.mean(axis=0))}
+            out['bands_per_ch'] = {name: per_ch[:, i].tolist() for i, name in enumerate(BAND_NAMES)}
+        return json.dumps(out, separators=(',', ':')).encode()
+
+    def _collect(self) -> None:
+        data, _ = self.reader.read_available()
+        if len(data) == 0:
+            return
+        if self._t0 is None:  # wall clock (acquisition timestamps are per-backend), the newest sample being now
+            self._t0 = time.time() - (len(data) - 1) / self.srate
+        self._rows.append(self.decimator.process(data))
+        self._blocks += 1
+
+    def _publish(self) -> None:
+        payload = self._message()
+        self._rows, self._t0, self._blocks = [], None, 0
+        info = self.client.publish(self.topic, payload, qos=self.qos)
+        if info.rc == 0:
+            self.messages += 1
+            self.bytes_sent += len(payload)
+        else:
+            self.dropped += 1
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.block):
+            self._collect()
+            if self._blocks >= self.batch:
+                self._publish()
+        self._collect()
+        if self._blocks:
+            self._publish()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+    def summary(self, reset: bool = True) -> Dict:
+        """Messages, bytes and drops since the previous reset."""
+        return dict(self.report.take(reset), topic=self.topic)
+
+    @staticmethod
+    def format_summary(s: Dict) -> str:
+        return (f"📨 {s['topic']}: {s['messages']} messages, {s['bytes_sent'] / 1e3:.1f} kB | "
+                f"dropped {s['dropped']}")
@@ -0,0 +1,241 @@
+"""Control output stage: latest-value-wins fan-out to UDP, MQTT and IPC sinks.
+
+The processing loop calls ``ControlPublisher.offer`` with each new control
+value (0-10, the contract of web/src/drone.ts and the StampFly firmware).
+``offer`` only stores the command and returns, so network I/O never blocks
+it. Each sink has its own sender thread, and that thread holds only the
+newest command. A command replaced before its sink was ready is dropped and
+counted, never queued. A slow or failing sink delays no other sink.
+
+Sends to one sink are at least ``min_interval`` apart (100 ms by default,
+the minimum gap DroneController in drone.ts enforces). The exception is
+forced commands: ``stop()`` sends v=0 disarmed right away, like
+``DroneController.stop()``. Like the web UI and ``DroneController``, commands
+start disarmed: ``offer`` sends ``arm: true`` only when asked to.
+"""
+import json
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from .health import LatencyHistogram, PeriodReport
+from .packet import PacketEncoder
+from .shm import CONTROL_CHANNEL, CONTROL_RECORD, ShmPublisher
+
+CONTROL_TOPIC = "stampfly/demo/control"
+MIN_INTERVAL = 0.1
+UDP_PORT = 4210
+
+
+class ControlCommand(NamedTuple):
+    v: float  # control value 0..10
+    arm: bool  # motors enabled only when true
+    ts: int  # wall-clock emit time in ms, like drone.ts
+    bands: Optional[Sequence[float]] = None  # delta, theta, alpha, beta, gamma
+    offered: float = 0.0  # time.monotonic() of offer(), for latency
+    force: bool = False  # bypass min_interval (disarm / stop)
+
+
+def control_json(cmd: ControlCommand) -> str:
+    """The ``{"v", "arm", "ts"}`` payload drone.ts publishes."""
+    return json.dumps({'v': cmd.v, 'arm': cmd.arm, 'ts': cmd.ts})
+
+
+class UdpSink:
+    """The ESP32 firmware's UDP port: binary pieeg.packet packets or legacy ASCII."""
+
+    def __init__(self, host: str, port: int = UDP_PORT, fmt: str = "binary"):
+        if fmt not in ("binary", "ascii"):
+            raise ValueError(f"unknown UDP format {fmt!r}, expected 'binary' or 'ascii'")
+        self.name = f"udp:{host}:{port}"
+        self.address = (host, port)
+        self.fmt = fmt
+        self.encoder = PacketEncoder()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, cmd: ControlCommand) -> None:
+        if self.fmt == "binary":
+            payload = self.encoder.encode(cmd.v, cmd.bands)
+        else:
+            payload = f"{cmd.v:.2f}".encode()
+        self.sock.sendto(payload, self.address)
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+class MqttSink:
+    """``control_json`` on ``topic`` through a connected paho client (owned by the caller)."""
+
+    def __init__(self, client, topic: str = CONTROL_TOPIC, qos: int = 0):
+        self.name = f"mqtt:{topic}"
+        self.client = client
+        self.topic = topic
+        self.qos = qos
+
+    def send(self, cmd: ControlCommand) -> None:
+        self.client.publish(self.topic, control_json(cmd), qos=self.qos)
+
+    def close(self) -> None:
+        pass
+
+
+class ShmSink:
+    """Local IPC: CONTROL_RECORD (timestamp s, v, arm) on a pieeg.shm channel."""
+
+    def __init__(self, name: str = CONTROL_CHANNEL, capacity: int = 64):
+        self.name = f"shm:{name}"
+        self.publisher = ShmPublisher(name, CONTROL_RECORD, capacity)
+
+    def send(self, cmd: ControlCommand) -> None:
+        self.publisher.publish((cmd.ts / 1000, cmd.v, cmd.arm))
+
+    def close(self) -> None:
+        self.publisher.close()
+
+
+class CallbackSink:
+    """Any ``fn(cmd)``, e.g. a file writer, run on its own sender thread."""
+
+    def __init__(self, name: str, fn: Callable[[ControlCommand], None]):
+        self.name = name
+        self.fn = fn
+
+    def send(self, cmd: ControlCommand) -> None:
+        self.fn(cmd)
+
+    def close(self) -> None:
+        pass
+
+
+class _SinkWorker(threading.Thread):
+    """Sender thread for one sink, holding at most one pending command."""
+
+    def __init__(self, sink, min_interval: float):
+        super().__init__(name=f"pieeg-control-{sink.name}", daemon=True)
+        self.sink = sink
+        self.min_interval = min_interval
+        self.sent = 0
+        self.dropped = 0  # superseded before they could be sent
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.latency = LatencyHistogram()  # offer() -> send() returned, cumulative
+        self.report = PeriodReport(self, histograms=('latency',))
+        self._cond = threading.Condition()
+        self._pending: Optional[ControlCommand] = None
+        self._closing = False
+        self._last_sent = float('-inf')
+
+    def put(self, cmd: ControlCommand) -> None:
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+                # A pending disarm keeps its urgency even if a value overtakes it
+                cmd = cmd._replace(force=cmd.force or self._pending.force)
+            self._pending = cmd
+            self._cond.notify()
+
+    def close(self, timeout: float) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self.join(timeout)
+
+    def run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closing:
+                    self._cond.wait()
+                cmd = self._pending
+                if cmd is None:
+                    return
+                wait = self._last_sent + self.min_interval - time.monotonic()
+                if wait > 0 and not (cmd.force or self._closing):
+                    self._cond.wait(wait)  # a newer value may replace it meanwhile
+                    continue
+                self._pending = None
+            try:
+                self.sink.send(cmd)
+            except Exception as e:  # counted; the next value is tried again
+                self.errors += 1
+                self.last_error = repr(e)
+            else:
+                self.sent += 1
+                self.latency.add(time.monotonic() - cmd.offered)
+            self._last_sent = time.monotonic()
+
+
+class ControlPublisher:
+    """Hands the newest control command to every sink's sender thread."""
+
+    def __init__(self, sinks: Sequence, min_interval: float = MIN_INTERVAL):
+        self.min_interval = min_interval
+        self.offered = 0
+        self.closed = False
+        self._workers: List[_SinkWorker] = [_SinkWorker(sink, min_interval) for sink in sinks]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def sinks(self) -> List:
+        return [w.sink for w in self._workers]
+
+    def offer(self, v: float, bands: Optional[Sequence[float]] = None, arm: bool = False,
+              force: bool = False) -> ControlCommand:
+        """Make ``v`` the value every sink sends next; never blocks on I/O.
+
+        Commands are disarmed unless the caller explicitly passes ``arm=True``
+        (the drone firmware spins the motors on an armed command).
+        """
+        cmd = ControlCommand(float(v), bool(arm), int(time.time() * 1000),
+                             None if bands is None else tuple(float(b) for b in bands),
+                             time.monotonic(), force)
+        if not self.closed:
+            for worker in self._workers:
+                worker.put(cmd)
+            self.offered += 1
+        return cmd
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Send v=0 disarmed immediately, flush it and close every sink."""
+        if self.closed:
+            return
+        self.offer(0.0, arm=False, force=True)
+        self.closed = True
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.close(max(0.0, deadline - time.monotonic()))
+        for worker in self._workers:
+            try:
+                worker.sink.close()
+            except Exception as e:
+                print(f"Error closing control sink {worker.sink.name}: {e}")
+
+    def summary(self, reset: bool = True) -> Dict:
+        """Per-sink totals, plus send latency since the previous call.
+
+        The sender threads own their histograms: the period is a delta from
+        the previous call, nothing is reset here.
+        """
+        out = {'offered': self.offered, 'min_interval_s': self.min_interval, 'sinks': {}}
+        for w in self._workers:
+            out['sinks'][w.sink.name] = dict(w.report.take(reset), sent=w.sent, dropped=w.dropped,
+                                             errors=w.errors, last_error=w.last_error)
+        return out
+
+    def format(self, reset: bool = True) -> str:
+        return self.format_summary(self.summary(reset))
+
+    @staticmethod
+    def format_summary(summary: Dict) -> str:
+        sinks = ' | '.join(f"{name} {s['sent']} sent, {s['dropped']} dropped, {s['errors']} errors, "
+                           f"p99 {s['latency']['p99_ms']:.2f} ms"
+                           for name, s in summary['sinks'].items())
+        return f"📡 {summary['offered']} control values | {sinks or 'no sinks'}"
+
+    def __enter__(self) -> "ControlPublisher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
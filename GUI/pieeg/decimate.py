@@ -0,0 +1,167 @@
+"""Display decimation that keeps peaks: M4 and LTTB, streaming and multichannel.
+
+Taking every Nth sample aliases a blink or an electrode pop away whenever it
+falls between the kept samples. Both modes here keep them:
+
+* ``m4``: each bucket of ``bucket`` samples becomes 4 points per channel:
+  first, min, max and last, with min and max in the order they occurred.
+  With one bucket per pixel column the line looks exactly like the full data.
+* ``lttb``: Largest-Triangle-Three-Buckets. Each bucket becomes the one point
+  that makes the largest triangle with the previously chosen point and the
+  next bucket's mean. This costs one bucket of latency.
+* ``stride``: every ``bucket``-th sample, as before. Cheapest, not peak safe.
+
+``Decimator`` works on (n, channels) blocks of any size. Buckets are counted
+from the first sample ever pushed, so their boundaries never depend on how
+the stream was split into blocks. Every channel is processed in the same
+NumPy operations. The output is evenly spaced at ``rate`` points/s: plotted
+on a shared time axis, each point lands within its own bucket.
+
+``decimate_indices`` picks whole records from an in-memory series, e.g. a
+history of band-power readings.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+MODES = ("m4", "lttb", "stride")
+POINTS_PER_BUCKET = {"m4": 4, "lttb": 1, "stride": 1}
+
+
+class Decimator:
+    """Streaming ``mode`` decimation of ``fs`` Hz to about ``points_per_second``."""
+
+    def __init__(self, fs: float, points_per_second: float, channels: int, mode: str = "m4"):
+        if mode not in MODES:
+            raise ValueError(f"unknown decimation mode {mode!r}, expected one of {MODES}")
+        per_bucket = POINTS_PER_BUCKET[mode]
+        self.mode = mode
+        self.channels = channels
+        # An M4 bucket under 4 samples would add points: pass everything through instead.
+        self.bucket = max(per_bucket, int(round(per_bucket * fs / points_per_second)))
+        self.passthrough = self.bucket <= per_bucket and mode != "stride"
+        self.rate = fs if self.passthrough else per_bucket * fs / self.bucket
+        self._held = np.empty((0, channels), dtype=np.float32)  # samples of the unfinished bucket
+        # LTTB: the bucket waiting for its successor, and the point chosen before
+        # it (values and offsets from the start of the pending bucket)
+        self._pending: Optional[np.ndarray] = None
+        self._anchor: Optional[np.ndarray] = None
+        self._anchor_x: Optional[np.ndarray] = None
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Decimate the next (n, channels) block; returns (k, channels) float32."""
+        block = np.asarray(block, dtype=np.float32).reshape(-1, self.channels)
+        if self.passthrough:
+            return block
+        x = np.concatenate((self._held, block)) if len(self._held) else block
+        nb = len(x) // self.bucket
+        self._held = x[nb * self.bucket:].copy()
+        if nb == 0:
+            return np.empty((0, self.channels), dtype=np.float32)
+        buckets = x[:nb * self.bucket].reshape(nb, self.bucket, self.channels)
+        if self.mode == "m4":
+            return _m4(buckets)
+        if self.mode == "lttb":
+            return self._lttb(buckets)
+        return buckets[:, 0].copy()
+
+    def _lttb(self, buckets: np.ndarray) -> np.ndarray:
+        if self._pending is not None:
+            buckets = np.concatenate((self._pending[None], buckets))
+        out = np.empty((len(buckets) - 1, self.channels), dtype=np.float32)
+        means = buckets.mean(axis=1)
+        offsets = np.arange(self.bucket, dtype=np.float64)[:, None]
+        xc = self.bucket + (self.bucket - 1) / 2  # the next bucket's mean
+        cols = np.arange(self.channels)
+        for j in range(len(buckets) - 1):
+            cand = buckets[j]
+            if self._anchor is None:  # the very first bucket starts at its first sample
+                idx = np.zeros(self.channels, dtype=int)
+            else:
+                ya, xa, yc = self._anchor, self._anchor_x, means[j + 1]
+                area = np.abs((xa - xc) * (cand - ya) - (xa - offsets) * (yc - ya))
+                idx = area.argmax(axis=0)
+            out[j] = cand[idx, cols]
+            self._anchor = out[j]
+            self._anchor_x = idx - self.bucket
+        self._pending = buckets[-1].copy()
+        return out
+
+    def reset(self) -> None:
+        self._held = self._held[:0]
+        self._pending = None
+        self._anchor = None
+        self._anchor_x = None
+
+
+def _m4(buckets: np.ndarray) -> np.ndarray:
+    nb, _, channels = buckets.shape
+    imin = buckets.argmin(axis=1)
+    imax = buckets.argmax(axis=1)
+    vmin = np.take_along_axis(buckets, imin[:, None], axis=1)[:, 0]
+    vmax = np.take_along_axis(buckets, imax[:, None], axis=1)[:, 0]
+    min_first = imin <= imax
+    out = np.empty((nb, 4, channels), dtype=np.float32)
+    out[:, 0] = buckets[:, 0]
+    out[:, 1] = np.where(min_first, vmin, vmax)
+    out[:, 2] = np.where(min_first, vmax, vmin)
+    out[:, 3] = buckets[:, -1]
+    return out.reshape(nb * 4, channels)
+
+
+def decimate_indices(values: np.ndarray, points: int, mode: str = "lttb") -> np.ndarray:
+    """Sorted indices of about ``points`` rows of an (n,) or (n, channels) series to keep.
+
+    For records that have to stay whole (e.g. history dicts): ``lttb`` keeps
+    exactly ``points`` rows, ranking triangles by their area summed over
+    range-normalised channels. ``m4`` keeps first/last and each channel's
+    min/max of ``points // 4`` buckets, so it may keep up to 2 + 2 * channels
+    rows per bucket. ``stride`` keeps every n/points-th row.
+    """
+    if mode not in MODES:
+        raise ValueError(f"unknown decimation mode {mode!r}, expected one of {MODES}")
+    y = np.asarray(values, dtype=np.float64)
+    y = y.reshape(len(y), -1)
+    n = len(y)
+    if n <= points or points < 3:
+        return np.arange(n)
+    if mode == "stride":
+        return np.unique(np.linspace(0, n - 1, points).round().astype(int))
+    if mode == "m4":
+        edges = np.linspace(0, n, max(1, points // 4) + 1).round().astype(int)
+        keep = [np.array([0, n - 1])]
+        for lo, hi in zip(edges[:-1], edges[1:]):
+            if hi > lo:
+                seg = y[lo:hi]
+                keep.append(np.array([lo, hi - 1]))
+                keep.append(lo + seg.argmin(axis=0))
+                keep.append(lo + seg.argmax(axis=0))
+        return np.unique(np.concatenate(keep))
+    span = np.ptp(y, axis=0)
+    y = (y - y.min(axis=0)) / np.where(span > 0, span, 1.0)
+    # First and last rows are always kept; the rest fill points - 2 buckets.
+    edges = np.linspace(1, n - 1, points - 1).round().astype(int)
+    out = [0]
+    for j in range(points - 2):
+        lo, hi = edges[j], edges[j + 1]
+        nlo, nhi = hi, edges[j + 2] if j + 2 < len(edges) else n
+        xc, yc = (nlo + nhi - 1) / 2, y[nlo:nhi].mean(axis=0)
+        xa, ya = out[-1], y[out[-1]]
+        xs = np.arange(lo, hi)
+        area = np.abs((xa - xc) * (y[lo:hi] - ya) - (xa - xs[:, None]) * (yc - ya)).sum(axis=1)
+        out.append(lo + int(area.argmax()))
+    out.append(n - 1)
+    return np.array(out)
+
+
+BAND_POWER_KEYS = ('theta_power', 'alpha_power', 'beta_power', 'gamma_power')
+
+
+def decimate_records(records: Sequence[Dict], points: int, mode: str = "lttb",
+                     keys: Sequence[str] = BAND_POWER_KEYS) -> List[Dict]:
+    """About ``points`` of ``records`` (e.g. dashboard history dicts), judged on the numeric ``keys``."""
+    records = list(records)
+    if len(records) <= points:
+        return records
+    values = np.array([[float(r.get(k) or 0.0) for k in keys] for r in records])
+    return [records[i] for i in decimate_indices(values, points, mode)]
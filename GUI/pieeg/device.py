@@ -0,0 +1,210 @@
+"""N-chip ADS1299 arrays over spidev.
+
+A rig is described as a list of SPI ports. Each port is one spidev bus/CE
+pair, optionally with an extra GPIO chip-select held low around transfers,
+and carries one chip or a daisy chain of several. Every chip is configured
+from one register table. A DRDY is read as one buffer of ``27 * chips``
+bytes, so decode and status checks are single vectorised passes whatever
+the chip count; only the spidev transfer itself is per port.
+
+The PiEEG-16 is ``"0.0,0.1:19"``: chip 1 on CE0, chip 2 on CE1 with GPIO 19
+as its chip-select.
+"""
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ads1299 import CHANNELS_PER_CHIP, FRAME_BYTES, config1_for_rate, decode_chained, status_words
+
+# Opcodes
+WAKEUP = 0x02
+START = 0x08
+STOP = 0x0A
+RESET = 0x06
+RDATAC = 0x10
+SDATAC = 0x11
+WREG = 0x40
+
+CONFIG1 = 0x01
+
+# Register table written, in this order, to every chip. CONFIG1 is replaced
+# by the requested data rate in configure().
+DEFAULT_REGISTERS: Tuple[Tuple[int, int], ...] = (
+    (0x14, 0x80),  # GPIO
+    (CONFIG1, 0x96),  # 250 SPS
+    (0x02, 0xD4),  # CONFIG2
+    (0x03, 0xFF),  # CONFIG3: internal reference, bias on
+    (0x04, 0x00),  # LOFF
+    (0x0D, 0x00),  # BIAS_SENSP
+    (0x0E, 0x00),  # BIAS_SENSN
+    (0x0F, 0x00),  # LOFF_SENSP
+    (0x10, 0x00),  # LOFF_SENSN
+    (0x11, 0x00),  # LOFF_FLIP
+    (0x15, 0x20),  # MISC1: SRB1 to all inverting inputs
+    (0x17, 0x00),  # CONFIG4
+    (0x05, 0x00), (0x06, 0x00), (0x07, 0x00), (0x08, 0x00),  # CH1SET-CH4SET
+    (0x09, 0x00), (0x0A, 0x00), (0x0B, 0x00), (0x0C, 0x00),  # CH5SET-CH8SET
+)
+
+
+class SpiPort(NamedTuple):
+    """One spidev chip-select carrying ``chips`` daisy-chained ADS1299s."""
+
+    bus: int
+    device: int
+    gpio_cs: Optional[int] = None
+    chips: int = 1
+
+
+_PORT_RE = re.compile(r"^(\d+)\.(\d+)(?::(\d+))?(?:x(\d+))?$")
+
+
+def parse_ports(spec: str) -> List[SpiPort]:
+    """Parse ``"BUS.DEV[:GPIO_CS][xCHIPS],..."``, e.g. ``"0.0,0.1:19"`` or ``"0.0x4"``."""
+    ports = []
+    for item in spec.split(","):
+        m = _PORT_RE.match(item.strip())
+        if not m:
+            raise ValueError(f"bad SPI port {item!r}, expected BUS.DEV[:GPIO_CS][xCHIPS]")
+        bus, dev, cs, chips = m.groups()
+        ports.append(SpiPort(int(bus), int(dev), None if cs is None else int(cs),
+                             1 if chips is None else int(chips)))
+    return ports
+
+
+def pieeg16(cs_pin: int = 19) -> str:
+    """The PiEEG-16 ports with chip 2's GPIO chip-select on ``cs_pin``."""
+    return f"0.0,0.1:{cs_pin}"
+
+
+PIEEG16 = pieeg16()
+
+
+def _open_spidev(bus: int, device: int, speed_hz: int):
+    import spidev
+
+    spi = spidev.SpiDev()
+    spi.open(bus, device)
+    spi.max_speed_hz = speed_hz
+    spi.lsbfirst = False
+    spi.mode = 0b01
+    spi.bits_per_word = 8
+    return spi
+
+
+def _request_cs(gpio_chip, pin: int):
+    import gpiod
+
+    line = gpio_chip.get_line(pin)
+    req = gpiod.line_request()
+    req.consumer = "SPI_CS"
+    req.request_type = gpiod.line_request.DIRECTION_OUTPUT
+    line.request(req)
+    line.set_value(1)  # deselected
+    return line
+
+
+class ADS1299Array:
+    """All ADS1299s of one rig, configured together and read per DRDY.
+
+    ``gpio_chip`` (a gpiod chip) is only needed when a port uses a GPIO
+    chip-select. ``open_spi(bus, device, speed_hz)`` can be swapped out to
+    drive something other than spidev.
+    """
+
+    def __init__(self, ports: Sequence[SpiPort], gpio_chip=None, speed_hz: int = 4000000,
+                 open_spi: Callable = _open_spidev):
+        if not ports:
+            raise ValueError("an ADS1299Array needs at least one SPI port")
+        self.ports = list(ports)
+        self.chips = sum(p.chips for p in self.ports)
+        self.channels = CHANNELS_PER_CHIP * self.chips
+        # Register values as written, per chip (saved in recording headers)
+        self.registers: List[Dict[int, int]] = [{} for _ in range(self.chips)]
+        self._spis = []
+        self._cs_lines = []
+        self._plan = []  # (spi, cs_line, offset, nbytes) per port
+        self._buf = bytearray(FRAME_BYTES * self.chips)
+        try:
+            offset = 0
+            for port in self.ports:
+                spi = open_spi(port.bus, port.device, speed_hz)
+                self._spis.append(spi)
+                cs = None
+                if port.gpio_cs is not None:
+                    if gpio_chip is None:
+                        raise ValueError(f"port {port} needs a gpio_chip for its GPIO chip-select")
+                    cs = _request_cs(gpio_chip, port.gpio_cs)
+                    self._cs_lines.append(cs)
+                nbytes = FRAME_BYTES * port.chips
+                self._plan.append((spi, cs, offset, nbytes))
+                offset += nbytes
+        except BaseException:
+            self.close()
+            raise
+
+    def _xfer(self, index: int, data: List[int]) -> None:
+        spi, cs, _, _ = self._plan[index]
+        if cs is not None:
+            cs.set_value(0)
+        spi.xfer(list(data))
+        if cs is not None:
+            cs.set_value(1)
+
+    def _port_chips(self, index: int) -> range:
+        first = sum(p.chips for p in self.ports[:index])
+        return range(first, first + self.ports[index].chips)
+
+    def configure(self, rate: Optional[int] = None,
+                  registers: Sequence[Tuple[int, int]] = DEFAULT_REGISTERS) -> None:
+        """Reset every chip, write the register table and start RDATAC.
+
+        Daisy-chained chips share DIN and chip-select, so each write reaches
+        every chip on the port at once. Ports are brought up one after another,
+        as the original two-chip script did.
+        """
+        table = [(reg, config1_for_rate(rate) if reg == CONFIG1 and rate is not None else value)
+                 for reg, value in registers]
+        for index in range(len(self._plan)):
+            for opcode in (WAKEUP, STOP, RESET, SDATAC):
+                self._xfer(index, [opcode])
+            for reg, value in table:
+                self._xfer(index, [WREG | reg, 0x00, value])
+                for chip in self._port_chips(index):
+                    self.registers[chip][reg] = value
+            self._xfer(index, [RDATAC])
+            self._xfer(index, [START])
+
+    def read_raw(self) -> bytearray:
+        """Read one DRDY from every port into a shared ``27 * chips`` byte buffer.
+
+        The buffer is reused by the next call; decode or copy it first.
+        """
+        buf = self._buf
+        for spi, cs, offset, nbytes in self._plan:
+            if cs is not None:
+                cs.set_value(0)
+            buf[offset:offset + nbytes] = spi.readbytes(nbytes)
+            if cs is not None:
+                cs.set_value(1)
+        return buf
+
+    def read(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Read one DRDY: the (8 * chips,) μV sample and each chip's status word."""
+        raw = self.read_raw()
+        return decode_chained(raw, self.chips)[0], status_words(raw)
+
+    def close(self) -> None:
+        for line in self._cs_lines:
+            line.release()
+        for spi in self._spis:
+            spi.close()
+        self._cs_lines = []
+        self._spis = []
+
+    def __enter__(self) -> "ADS1299Array":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,96 @@
+"""DRDY (data ready) detection for the ADS1299.
+
+Two interchangeable waiters share one interface: ``wait(timeout)`` blocks
+until the next falling edge and returns its timestamp in seconds, or ``None``
+on timeout.
+
+* ``EdgeDrdy`` requests the line for kernel falling-edge events and sleeps in
+  ``event_wait``; the timestamp is the kernel's event time, so it reflects
+  when DRDY actually fell rather than when Python got around to looking.
+  If the reader fell behind, every queued edge is drained and only the
+  newest is returned: the older ones would only re-read the current frame
+  with stale timestamps. They are counted in ``last_skipped``.
+* ``PollingDrdy`` is the original busy loop (wait for a 1, then a 0) kept as a
+  fallback for kernels/boards where edge events are unavailable.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+DRDY_MODES = ("edge", "poll")
+
+
+def event_seconds(stamp) -> float:
+    """Convert a gpiod line_event timestamp to float seconds."""
+    if isinstance(stamp, datetime):
+        return stamp.timestamp()
+    if isinstance(stamp, timedelta):
+        return stamp.total_seconds()
+    # Raw nanosecond counters (newer bindings)
+    return stamp / 1e9 if isinstance(stamp, int) else float(stamp)
+
+
+class PollingDrdy:
+    """Busy-poll the DRDY line for a high → low transition."""
+
+    mode = "poll"
+
+    def __init__(self, line):
+        self.line = line
+        self._armed = False
+        self.last_skipped = 0  # edges are never queued while polling
+        self.skipped = 0
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[float]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.line.get_value() == 1:
+                self._armed = True
+            elif self._armed:
+                self._armed = False
+                return time.monotonic()
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+
+class EdgeDrdy:
+    """Sleep until the kernel reports a DRDY falling edge."""
+
+    mode = "edge"
+
+    def __init__(self, line):
+        self.line = line
+        self.last_skipped = 0  # older queued edges dropped by the last wait
+        self.skipped = 0  # ... and in total
+
+    def wait(self, timeout: Optional[float] = 1.0) -> Optional[float]:
+        # gpiod needs a finite timeout; loop so None still means "forever".
+        span = timedelta(seconds=1.0 if timeout is None else timeout)
+        self.last_skipped = 0
+        while not self.line.event_wait(span):
+            if timeout is not None:
+                return None
+        events = list(self.line.event_read_multiple())
+        while self.line.event_wait(timedelta(0)):  # more than one read's worth queued
+            events.extend(self.line.event_read_multiple())
+        self.last_skipped = len(events) - 1
+        self.skipped += self.last_skipped
+        return event_seconds(events[-1].timestamp)
+
+
+def request_drdy(chip, pin: int, mode: str = "edge", consumer: str = "DRDY"):
+    """Request ``pin`` on ``chip`` as the DRDY input and return its waiter."""
+    import gpiod
+
+    if mode not in DRDY_MODES:
+        raise ValueError(f"unknown DRDY mode {mode!r}, expected one of {DRDY_MODES}")
+    line = chip.get_line(pin)
+    req = gpiod.line_request()
+    req.consumer = consumer
+    if mode == "edge":
+        req.request_type = gpiod.line_request.EVENT_FALLING_EDGE
+        line.request(req)
+        return EdgeDrdy(line)
+    req.request_type = gpiod.line_request.DIRECTION_INPUT
+    line.request(req)
+    return PollingDrdy(line)
@@ -0,0 +1,87 @@
+"""Causal, stateful Butterworth filtering for multichannel sample blocks.
+
+Coefficients are designed once as second-order sections and cached per
+(type, cutoff, fs, order). Each StreamingFilter keeps its own ``sosfilt``
+state for every channel, so consecutive blocks filter exactly as one long
+signal would: no window overlap has to be recomputed and a block can be as
+short as a single sample.
+"""
+from functools import lru_cache
+from typing import Dict, Sequence, Tuple, Union
+
+import numpy as np
+from scipy import signal as scipy_signal
+
+Cutoff = Union[float, Tuple[float, float]]
+Stage = Tuple[str, Cutoff, int]  # (btype, cutoff Hz, order)
+
+
+@lru_cache(maxsize=None)
+def _design(btype: str, cutoff: Cutoff, fs: float, order: int) -> np.ndarray:
+    sos = scipy_signal.butter(order, cutoff, btype=btype, fs=fs, output="sos")
+    sos.setflags(write=False)
+    return sos
+
+
+def design_sos(btype: str, cutoff: Cutoff, fs: float, order: int = 5) -> np.ndarray:
+    """Butterworth SOS for ``btype`` ('lowpass', 'highpass', 'bandpass', ...), cached."""
+    if not np.isscalar(cutoff):
+        cutoff = tuple(float(c) for c in cutoff)
+    return _design(btype, cutoff, float(fs), int(order))
+
+
+def chain_sos(fs: float, *stages: Stage) -> np.ndarray:
+    """Cascade several designed stages into one SOS array (applied in order)."""
+    return np.vstack([design_sos(btype, cutoff, fs, order) for btype, cutoff, order in stages])
+
+
+class StreamingFilter:
+    """Apply one SOS filter causally to (n, channels) blocks, keeping ``zi``."""
+
+    def __init__(self, sos: np.ndarray, channels: int = 16):
+        self.sos = np.asarray(sos)
+        self.channels = channels
+        self.zi = None
+
+    def reset(self) -> None:
+        self.zi = None
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        block = np.asarray(block, dtype=np.float64)
+        if block.ndim != 2 or block.shape[1] != self.channels:
+            raise ValueError(f"expected an (n, {self.channels}) block, got {block.shape}")
+        if len(block) == 0:
+            return block.copy()
+        if self.zi is None:
+            # Start in steady state for the first sample so the large DC
+            # offset of raw ADS1299 data does not ring through the filter.
+            zi = scipy_signal.sosfilt_zi(self.sos)
+            self.zi = zi[:, :, None] * block[0][None, None, :]
+        out, self.zi = scipy_signal.sosfilt(self.sos, block, axis=0, zi=self.zi)
+        return out
+
+
+class FilterBank:
+    """A set of named StreamingFilters fed the same block."""
+
+    def __init__(self, fs: float, channels: int = 16):
+        self.fs = fs
+        self.channels = channels
+        self.filters: Dict[str, StreamingFilter] = {}
+
+    def add(self, name: str, *stages: Stage) -> StreamingFilter:
+        """Add ``name`` as the cascade of ``stages`` (each ``(btype, cutoff, order)``)."""
+        filt = StreamingFilter(chain_sos(self.fs, *stages), self.channels)
+        self.filters[name] = filt
+        return filt
+
+    def process(self, block: np.ndarray) -> Dict[str, np.ndarray]:
+        return {name: filt.process(block) for name, filt in self.filters.items()}
+
+    def reset(self) -> None:
+        for filt in self.filters.values():
+            filt.reset()
+
+    @property
+    def names(self) -> Sequence[str]:
+        return list(self.filters)
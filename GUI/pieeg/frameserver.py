@@ -0,0 +1,255 @@
+"""WebSocket frame server for the web UI's ServerSource (web/src/source.ts).
+
+Every ``HOP_MS`` the server takes the samples acquired since the previous
+hop and builds one frame, the same one SimulatorSource produces in the
+browser:
+
+    {"ts", "srate", "channels", "raw": [[μV] * channels] * N,
+     "display_hz", "bands": {band: μV²}, "bands_per_ch": {band: [μV²] * channels}}
+
+``raw`` holds the last ``RAW_SECONDS``, decimated to ``display_hz`` points/s
+by a pieeg.decimate.Decimator (M4 by default, so blinks and spikes survive).
+The bands come from the last ``WIN_SEC`` (pieeg.bandpower, i.e. fft.ts).
+
+Clients receive JSON text unless they send ``{"formats": ["f32", ...]}``
+after connecting. In that case they receive binary frames that the browser
+maps with Float32Array views instead of parsing text. The frame is 32 header
+bytes, little-endian::
+
+    offset  type  field
+    0       4s    magic b"PEEG"
+    4       u8    version (1)
+    5       u8    number of bands (5: delta, theta, alpha, beta, gamma)
+    6       u16   channels
+    8       u32   raw rows
+    12      f32   srate
+    16      f32   display_hz
+    20      u32   reserved (0)
+    24      f64   ts
+    32      f32   raw[rows][channels], bands[bands], bands_per_ch[bands][channels]
+
+Each frame is encoded once per format that some client uses, and the same
+bytes go to every client of that format. Building and encoding run in a
+worker thread, so the event loop only moves bytes. A client
+whose socket is still backed up with ``max_buffer`` bytes skips frames
+(latest wins) instead of queueing them without bound. The acquisition itself
+runs in the stream's reader thread and never waits for the server.
+"""
+import asyncio
+import json
+import struct
+import time
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+
+from .bandpower import BAND_NAMES, band_powers_mean
+from .decimate import Decimator
+from .health import LatencyHistogram, PeriodReport
+
+WIN_SEC = 1.0
+HOP_MS = 100
+RAW_SECONDS = 4.0
+DISPLAY_HZ = 50
+WS_PATH = "/ws"
+WS_PORT = 8000
+
+FORMATS = ("f32", "json")
+MAGIC = b"PEEG"
+VERSION = 1
+HEADER = struct.Struct('<4sBBHIffId')  # 32 bytes, keeps the float32 payload 4-byte aligned
+
+
+class Frame(NamedTuple):
+    ts: float
+    srate: int
+    channels: int
+    raw: np.ndarray  # (rows, channels) float32 μV at display_hz
+    display_hz: float
+    bands: np.ndarray  # (bands,) channel mean, μV²
+    bands_per_ch: np.ndarray  # (channels, bands) μV²
+
+
+def encode_json(frame: Frame) -> bytes:
+    """The JSON text ServerSource has always parsed."""
+    return json.dumps({
+        'ts': frame.ts,
+        'srate': frame.srate,
+        'channels': frame.channels,
+        'raw': np.round(frame.raw, 2).tolist(),
+        'display_hz': frame.display_hz,
+        'bands': {name: float(v) for name, v in zip(BAND_NAMES, frame.bands)},
+        'bands_per_ch': {name: frame.bands_per_ch[:, i].tolist() for i, name in enumerate(BAND_NAMES)},
+    }, separators=(',', ':')).encode()
+
+
+def encode_binary(frame: Frame) -> bytes:
+    """Header + little-endian float32 raw, bands and band-major bands_per_ch."""
+    rows, channels = frame.raw.shape
+    header = HEADER.pack(MAGIC, VERSION, len(frame.bands), channels, rows, frame.srate, frame.display_hz, 0,
+                         frame.ts)
+    return b''.join((header, frame.raw.astype('<f4', copy=False).tobytes(), frame.bands.astype('<f4').tobytes(),
+                     frame.bands_per_ch.T.astype('<f4').tobytes()))
+
+
+def decode_binary(buf: bytes) -> Frame:
+    """Inverse of ``encode_binary`` (zero-copy views into ``buf``)."""
+    magic, version, nbands, channels, rows, srate, display_hz, _, ts = HEADER.unpack_from(buf)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a pieeg binary frame")
+    data = np.frombuffer(buf, dtype='<f4', offset=HEADER.size)
+    n = rows * channels
+    return Frame(ts, int(srate), channels, data[:n].reshape(rows, channels), display_hz,
+                 data[n:n + nbands], data[n + nbands:n + nbands + nbands * channels].reshape(nbands, channels).T)
+
+
+def _scroll(buf: np.ndarray, filled: int, data: np.ndarray) -> int:
+    """Shift ``data`` into the end of ``buf``; returns the new fill level."""
+    k = len(data)
+    cap = len(buf)
+    if k >= cap:
+        buf[:] = data[-cap:]
+    elif k:
+        buf[:-k] = buf[k:]
+        buf[-k:] = data
+    return min(cap, filled + k)
+
+
+class FrameBuilder:
+    """Rolling sample buffers that turn into ServerSource frames."""
+
+    def __init__(self, srate: int, channels: int, win_sec: float = WIN_SEC,
+                 raw_seconds: float = RAW_SECONDS, display_hz: float = DISPLAY_HZ,
+                 display_mode: str = "m4"):
+        self.srate = srate
+        self.channels = channels
+        self.decimator = Decimator(srate, display_hz, channels, display_mode)
+        self.display_hz = self.decimator.rate
+        self.buf = np.zeros((max(2, int(round(srate * win_sec))), channels), dtype=np.float32)
+        self.raw = np.zeros((max(2, int(round(self.display_hz * raw_seconds))), channels), dtype=np.float32)
+        self.filled = 0
+        self.raw_filled = 0
+
+    def push(self, data: np.ndarray) -> None:
+        if len(data) == 0:
+            return
+        self.filled = _scroll(self.buf, self.filled, data)
+        self.raw_filled = _scroll(self.raw, self.raw_filled, self.decimator.process(data))
+
+    def frame(self) -> Optional[Frame]:
+        """The frame for the current buffers (None until 2 samples arrived)."""
+        if self.filled < 2:
+            return None
+        per_ch, mean = band_powers_mean(self.buf[len(self.buf) - self.filled:], self.srate)
+        return Frame(time.time(), self.srate, self.channels, self.raw[len(self.raw) - self.raw_filled:],
+                     self.display_hz, mean, per_ch)
+
+
+ENCODERS = {'f32': encode_binary, 'json': encode_json}
+
+
+class FrameServer:
+    """Serves one EEGStream to any number of ServerSource clients on ``ws://host:port/ws``."""
+
+    def __init__(self, stream, host: str = "0.0.0.0", port: int = WS_PORT, path: str = WS_PATH,
+                 hop: float = HOP_MS / 1000, max_buffer: int = 1 << 20, **builder):
+        self.stream = stream
+        self.host = host
+        self.port = port
+        self.path = path
+        self.hop = hop
+        self.max_buffer = max_buffer
+        self.builder = FrameBuilder(stream.rate, stream.channels, **builder)
+        self.reader = stream.reader()
+        self.clients: Dict = {}  # connection -> format
+        self.frames = 0
+        self.bytes_sent = 0
+        self.skipped = 0  # frames not sent to a client that was still backed up
+        self.late_hops = 0
+        self.build = LatencyHistogram()  # read + band power + encoding, once per frame
+        self.fanout = LatencyHistogram()  # handing the bytes to every client
+        self.report = PeriodReport(self, histograms=('build', 'fanout'))  # the event loop owns the histograms
+        self.ready: Optional[asyncio.Event] = None
+
+    def _next_frame(self, formats) -> Dict[str, bytes]:
+        data, _ = self.reader.read_available()
+        self.builder.push(data)
+        frame = self.builder.frame() if formats else None  # nobody connected: only keep the buffer current
+        if frame is None:
+            return {}
+        return {fmt: ENCODERS[fmt](frame) for fmt in formats}
+
+    async def _handler(self, ws) -> None:
+        if ws.request.path != self.path:
+            await ws.close(1008, f"frames are served on {self.path}")
+            return
+        self.clients[ws] = "json"
+        try:
+            async for message in ws:
+                # {"formats": [...]} in order of preference; anything else is ignored
+                try:
+                    wanted = json.loads(message).get('formats', [])
+                except (ValueError, AttributeError):
+                    continue
+                self.clients[ws] = next((f for f in wanted if f in FORMATS), "json")
+        finally:
+            self.clients.pop(ws, None)
+
+    def _broadcast(self, messages: Dict[str, bytes]) -> None:
+        from websockets.asyncio.server import broadcast
+
+        ready = {fmt: [] for fmt in messages}
+        for ws, fmt in list(self.clients.items()):
+            transport = ws.transport
+            if fmt not in ready:  # switched format after this frame was encoded
+                continue
+            if transport is not None and transport.get_write_buffer_size() > self.max_buffer:
+                self.skipped += 1
+            else:
+                ready[fmt].append(ws)
+        for fmt, clients in ready.items():
+            broadcast(clients, messages[fmt], text=fmt == "json")
+            self.bytes_sent += len(messages[fmt]) * len(clients)
+
+    async def _produce(self) -> None:
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        while not self.stream.closed:
+            self.stream.raise_if_failed()
+            start = time.perf_counter()
+            messages = await asyncio.to_thread(self._next_frame, set(self.clients.values()))
+            self.build.add(time.perf_counter() - start)
+            if messages:
+                start = time.perf_counter()
+                self._broadcast(messages)
+                self.fanout.add(time.perf_counter() - start)
+                self.frames += 1
+            due += self.hop
+            delay = due - loop.time()
+            if delay < 0:  # fell behind: skip the missed hops rather than bursting
+                self.late_hops += 1
+                due = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def serve(self) -> None:
+        """Run until the stream closes (or the task is cancelled)."""
+        from websockets.asyncio.server import serve
+
+        async with serve(self._handler, self.host, self.port, compression=None,
+                         ping_interval=10, ping_timeout=10):
+            if self.ready is not None:
+                self.ready.set()
+            await self._produce()
+
+    def summary(self, reset: bool = True) -> Dict:
+        """Running totals, plus frame build and fan-out times since the previous reset."""
+        return dict(self.report.take(reset), clients=len(self.clients), frames=self.frames,
+                    bytes_sent=self.bytes_sent, skipped=self.skipped, late_hops=self.late_hops)
+
+    @staticmethod
+    def format_summary(s: Dict) -> str:
+        return (f"🌐 {s['clients']} clients | {s['frames']} frames, {s['bytes_sent'] / 1e6:.1f} MB sent | "
+                f"build {s['build']['mean_ms']:.2f}/{s['build']['max_ms']:.2f} ms | "
+                f"fan-out {s['fanout']['mean_ms']:.2f}/{s['fanout']['max_ms']:.2f} ms | "
+                f"skipped {s['skipped']} | late hops {s['late_hops']}")
@@ -0,0 +1,254 @@
+"""Acquisition health: status failures, missed DRDY edges, rate and stage latency.
+
+One AcquisitionHealth is shared by the reader thread and the processing loop.
+Every counter and histogram has a single writer thread, so no locking is
+needed. ``summary()`` returns the figures for the period since the previous
+call (plus running totals) as a JSON-ready dict, and ``write_json`` publishes
+it atomically for other processes to poll.
+
+``summary()`` may run on another thread than a stage's writer, so it never
+resets a stage histogram. The histograms only grow; each period is reported
+as the difference from a copy taken at the previous reset. ``PeriodReport``
+does the same for the counters and histograms of the other pipeline stages.
+"""
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence
+
+import numpy as np
+
+
+class PeriodMax:
+    """Largest value of the current reporting period.
+
+    One thread calls ``update``; the reporting thread reads ``value`` and
+    starts the next period with ``restart``. Neither writes what the other
+    writes.
+    """
+
+    def __init__(self):
+        self.period = 0  # reporting thread
+        self._value = (0, 0)  # (period, largest), writer thread
+
+    def update(self, value) -> None:
+        period, largest = self._value
+        if period != self.period:
+            self._value = (self.period, value)
+        elif value > largest:
+            self._value = (period, value)
+
+    def value(self):
+        period, largest = self._value
+        return largest if period == self.period else 0
+
+    def restart(self) -> None:
+        self.period += 1
+
+
+class LatencyHistogram:
+    """Log2-bucketed latency histogram: bucket k holds [2^k, 2^(k+1)) μs."""
+
+    BUCKETS = 21  # 1 μs … ~1 s; the last bucket also takes anything slower
+
+    def __init__(self):
+        self.reset()
+        self.peak = PeriodMax()  # largest sample of the reporting period
+
+    def reset(self) -> None:
+        self.counts = np.zeros(self.BUCKETS, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        us = seconds * 1e6
+        k = int(us).bit_length() - 1 if us >= 1 else 0
+        self.counts[min(k, self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.peak.update(seconds)
+
+    def copy(self) -> "LatencyHistogram":
+        out = LatencyHistogram()
+        out.counts = self.counts.copy()
+        out.count = int(out.counts.sum())  # consistent with counts even if an add is in flight
+        out.total = self.total
+        out.max = self.max
+        return out
+
+    def since(self, earlier: "LatencyHistogram", max_seconds: float) -> "LatencyHistogram":
+        """The samples added after the copy ``earlier``, whose largest was ``max_seconds``."""
+        out = LatencyHistogram()
+        out.counts = self.counts - earlier.counts
+        out.count = int(out.counts.sum())
+        out.total = max(0.0, self.total - earlier.total)
+        if out.count:  # an add racing the period switch may miss max_seconds: fall back to its bucket
+            out.max = max_seconds or 2.0 ** (int(np.flatnonzero(out.counts)[-1]) + 1) / 1e6
+        return out
+
+    def percentile(self, q: float) -> float:
+        """Upper edge (s) of the bucket holding the q-th percentile."""
+        if self.count == 0:
+            return 0.0
+        k = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.count))
+        return min(2.0 ** (k + 1) / 1e6, self.max)
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean_ms': 1000 * self.total / self.count if self.count else 0.0,
+            'p50_ms': 1000 * self.percentile(50),
+            'p99_ms': 1000 * self.percentile(99),
+            'max_ms': 1000 * self.max,
+            'buckets_us_log2': self.counts.tolist(),
+        }
+
+
+class PeriodReport:
+    """Per-period figures of another object's counters, histograms and PeriodMax peaks.
+
+    Each attribute named has one writer thread, which only adds to it.
+    ``take`` may run on one other thread: it reports each counter and
+    LatencyHistogram as its change since the previous reset, and each peak
+    as its value in the period, and never writes what a writer writes.
+    """
+
+    def __init__(self, owner, counters: Sequence[str] = (), histograms: Sequence[str] = (),
+                 peaks: Sequence[str] = ()):
+        self.owner = owner
+        self.counters = tuple(counters)
+        self.histograms = tuple(histograms)
+        self.peaks = tuple(peaks)
+        self._marks = self._snapshot()
+
+    def _snapshot(self):
+        return ({name: getattr(self.owner, name) for name in self.counters},
+                {name: getattr(self.owner, name).copy() for name in self.histograms})
+
+    def take(self, reset: bool = True) -> Dict:
+        """``{name: change}`` per counter, ``{name: to_dict()}`` per histogram, ``{name: largest}`` per peak."""
+        counters, histograms = current = self._snapshot()
+        counter_marks, histogram_marks = self._marks
+        out = {name: counters[name] - counter_marks[name] for name in self.counters}
+        for name in self.histograms:
+            peak = getattr(self.owner, name).peak.value()
+            out[name] = histograms[name].since(histogram_marks[name], peak).to_dict()
+        out.update({name: getattr(self.owner, name).value() for name in self.peaks})
+        if reset:
+            self._marks = current
+            for name in self.histograms:
+                getattr(self.owner, name).peak.restart()
+            for name in self.peaks:
+                getattr(self.owner, name).restart()
+        return out
+
+
+class AcquisitionHealth:
+    """Rolling health counters for one acquisition session."""
+
+    def __init__(self, sample_rate: float, chips: int = 2, expected_status: int = 0xC00008,
+                 stages: Sequence[str] = ('spi', 'decode', 'filter', 'bandpower', 'plot', 'publish')):
+        self.sample_rate = sample_rate
+        self.expected_status = expected_status
+        self.stages: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in stages}  # cumulative
+        self._stage_marks = {name: LatencyHistogram() for name in stages}  # copies at the last reset
+        self.started = time.monotonic()
+        self.status_failures = np.zeros(chips, dtype=np.int64)  # totals per chip
+        self.missed_drdy = 0
+        self.samples = 0
+        self._last_edge: Optional[float] = None
+        self._mark = self._snapshot(self.started)
+
+    # ---- reader thread ----------------------------------------------------
+
+    def check_status(self, status: Sequence[int]) -> bool:
+        """Count per-chip status mismatches; True when every chip is OK."""
+        bad = np.asarray(status) != self.expected_status
+        if bad.any():
+            self.status_failures += bad
+            return False
+        return True
+
+    def observe_edge(self, ts: float, skipped: int = 0) -> None:
+        """Count DRDY edges that were never serviced.
+
+        They are inferred from timestamp gaps, or reported by the waiter as
+        ``skipped`` (queued edges it drained unread), whichever is larger,
+        so skipped edges are not counted twice.
+        """
+        missed = skipped
+        if self._last_edge is not None:
+            periods = (ts - self._last_edge) * self.sample_rate
+            if periods > 1.5:
+                missed = max(missed, int(round(periods)) - 1)
+        self.missed_drdy += missed
+        self._last_edge = ts
+
+    # ---- any thread (one writer per stage) -------------------------------
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name].add(time.perf_counter() - start)
+
+    # ---- reporting ---------------------------------------------------------
+
+    def _snapshot(self, now: float) -> Dict:
+        return {'t': now, 'samples': self.samples, 'missed': self.missed_drdy,
+                'status': self.status_failures.copy()}
+
+    def summary(self, reset: bool = True) -> Dict:
+        now = time.monotonic()
+        mark = self._mark
+        current = {name: hist.copy() for name, hist in self.stages.items()}
+        period = max(now - mark['t'], 1e-9)
+        out = {
+            'timestamp': time.time(),
+            'uptime_s': now - self.started,
+            'period_s': period,
+            'nominal_sps': self.sample_rate,
+            'effective_sps': (self.samples - mark['samples']) / period,
+            'samples_total': self.samples,
+            'missed_drdy': self.missed_drdy - mark['missed'],
+            'missed_drdy_total': self.missed_drdy,
+            'status_failures': (self.status_failures - mark['status']).tolist(),
+            'status_failures_total': self.status_failures.tolist(),
+            'stages': {name: self._stage_period(name, current[name]).to_dict() for name in self.stages},
+        }
+        if reset:
+            self._mark = self._snapshot(now)
+            self._stage_marks = current
+            for hist in self.stages.values():
+                hist.peak.restart()
+        return out
+
+    def _stage_period(self, name: str, current: LatencyHistogram) -> LatencyHistogram:
+        return current.since(self._stage_marks[name], self.stages[name].peak.value())
+
+    def format(self, reset: bool = True) -> str:
+        return self.format_summary(self.summary(reset))
+
+    @staticmethod
+    def format_summary(summary: Dict) -> str:
+        stages = ' '.join(f"{name}={s['mean_ms']:.2f}/{s['max_ms']:.2f}"
+                          for name, s in summary['stages'].items() if s['count'])
+        return (f"🩺 {summary['effective_sps']:.1f}/{summary['nominal_sps']:.0f} SPS | "
+                f"missed DRDY {summary['missed_drdy']} | "
+                f"status failures {summary['status_failures']} | "
+                f"stage ms mean/max {stages}")
+
+
+def write_json(path: str, payload: Dict) -> None:
+    """Atomically replace ``path`` with ``payload`` as JSON."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, dir=directory, suffix='.json') as tmp:
+        json.dump(payload, tmp)
+    os.replace(tmp.name, path)
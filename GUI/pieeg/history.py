@@ -0,0 +1,188 @@
+"""Columnar band-power history for the dashboards.
+
+A deque of reading dicts costs several hundred bytes per reading (the dict,
+its keys' slots, a boxed float per band, the timestamp). Every API call then
+copies the deque into a list and rebuilds float lists from the dicts.
+``BandHistory`` keeps the same readings in preallocated NumPy columns:
+
+* ``timestamps`` float64 and ``powers`` (capacity, bands) float64: 40 bytes
+  per reading for 4 bands;
+* ``dominant`` uint8, the index of the reading's dominant band;
+* optionally ``per_channel`` (capacity, bands, channels) float32, allocated
+  when the first reading with per-channel powers (``bands_per_ch``) arrives.
+
+Like pieeg.ring.SampleRing, ``head`` counts every reading ever appended and
+the newest ``capacity`` are kept. Appends are not synchronised: callers
+with more than one writer thread serialise them (the dashboards' store lock).
+Readers take zero-copy ``views`` (one or two contiguous slices) or
+``columns`` (one array per column, copied only when the range wraps), and
+must use them promptly. Statistics and JSON records are computed from the
+columns in a few NumPy operations and one ``tolist`` per column.
+
+With ``grow=True`` the store never drops readings: it doubles its columns
+when full (amortised O(1), like a list), for recordings.
+"""
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .decimate import decimate_indices
+from .rolling import BANDS
+
+# Contiguous zero-copy slices of the history: (timestamps, powers, dominant)
+Segment = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class BandHistory:
+    """The newest ``capacity`` band-power readings, column by column."""
+
+    def __init__(self, capacity: int, bands: Sequence[str] = BANDS, grow: bool = False):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1 reading")
+        self.capacity = capacity
+        self.bands = tuple(bands)
+        self.grow = grow
+        self._keys = [f'{b}_power' for b in self.bands]
+        self._index = {b: i for i, b in enumerate(self.bands)}
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.powers = np.zeros((capacity, len(self.bands)), dtype=np.float64)
+        self.dominant = np.zeros(capacity, dtype=np.uint8)
+        self.per_channel: Optional[np.ndarray] = None
+        self.head = 0  # readings ever appended; the next one goes to head % capacity
+
+    def __len__(self) -> int:
+        return min(self.head, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        columns = (self.timestamps, self.powers, self.dominant, self.per_channel)
+        return sum(c.nbytes for c in columns if c is not None)
+
+    # ---- producer -------------------------------------------------------
+
+    def append(self, record: Dict, ts: Optional[float] = None) -> None:
+        """Store one reading (the dashboards' band-power dict; ``bands_per_ch`` is kept if present)."""
+        if self.grow and self.head == self.capacity:
+            self._resize(2 * self.capacity)
+        i = self.head % self.capacity
+        powers = [float(record.get(k) or 0.0) for k in self._keys]
+        stamp = record.get('timestamp')
+        if not isinstance(stamp, (int, float)) or not stamp:  # missing, or e.g. an ISO string
+            stamp = time.time() if ts is None else ts
+        self.timestamps[i] = stamp
+        self.powers[i] = powers
+        dominant = self._index.get(record.get('dominant_wave'))
+        self.dominant[i] = powers.index(max(powers)) if dominant is None else dominant
+        per_ch = record.get('bands_per_ch')
+        if per_ch:
+            rows = [per_ch.get(b, ()) for b in self.bands]
+            channels = max(len(r) for r in rows)
+            if self.per_channel is None or self.per_channel.shape[2] != channels:
+                self.per_channel = np.zeros((self.capacity, len(self.bands), channels), dtype=np.float32)
+            for band, row in enumerate(rows):
+                self.per_channel[i, band, :len(row)] = row
+        elif self.per_channel is not None:
+            self.per_channel[i] = 0.0
+        self.head += 1  # publish only after the slot is complete
+
+    def _resize(self, capacity: int) -> None:
+        n = len(self)
+        for name in ('timestamps', 'powers', 'dominant', 'per_channel'):
+            column = getattr(self, name)
+            if column is not None:
+                grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+                grown[:n] = column[:n]
+                setattr(self, name, grown)
+        self.capacity = capacity
+
+    def clear(self) -> None:
+        self.head = 0
+
+    # ---- consumers ------------------------------------------------------
+
+    @property
+    def oldest(self) -> int:
+        """Absolute index of the oldest reading still stored."""
+        return max(0, self.head - self.capacity)
+
+    def _range(self, count: Optional[int], since: Optional[int]) -> Tuple[int, int]:
+        stop = self.head
+        start = self.oldest if since is None else max(since, self.oldest)
+        if count is not None:
+            start = max(start, stop - max(count, 0))
+        return start, max(start, stop)
+
+    def views(self, count: Optional[int] = None, since: Optional[int] = None) -> Tuple[int, List[Segment]]:
+        """Zero-copy views of the newest ``count`` readings (or all since absolute index ``since``).
+
+        Returns ``(first, segments)``: at most two contiguous slices (two when
+        the range wraps), oldest first.
+        """
+        start, stop = self._range(count, since)
+        segments = []
+        index = start
+        while index < stop:
+            i = index % self.capacity
+            j = min(self.capacity, i + stop - index)
+            segments.append((self.timestamps[i:j], self.powers[i:j], self.dominant[i:j]))
+            index += j - i
+        return start, segments
+
+    def columns(self, count: Optional[int] = None, since: Optional[int] = None) -> Segment:
+        """``(timestamps, powers, dominant)`` of the range, as views unless it wraps."""
+        _, segments = self.views(count, since)
+        if len(segments) == 1:
+            return segments[0]
+        if not segments:
+            return (self.timestamps[:0], self.powers[:0], self.dominant[:0])
+        return tuple(np.concatenate(parts) for parts in zip(*segments))
+
+    def channel_columns(self, count: Optional[int] = None) -> np.ndarray:
+        """(n, bands, channels) per-channel powers of the newest ``count`` readings (empty if none)."""
+        if self.per_channel is None:
+            return np.zeros((0, len(self.bands), 0), dtype=np.float32)
+        start, stop = self._range(count, None)
+        idx = np.arange(start, stop) % self.capacity
+        return self.per_channel[idx]
+
+    def mean(self, count: Optional[int] = None) -> Dict[str, float]:
+        _, powers, _ = self.columns(count)
+        if not len(powers):
+            return {b: 0.0 for b in self.bands}
+        return dict(zip(self.bands, powers.mean(axis=0).tolist()))
+
+    def stats(self, count: Optional[int] = None) -> Dict:
+        """``{band: {mean, std, min, max}, 'dominant_wave': band}`` of the range ({} when empty).
+
+        Same layout as pieeg.rolling.BandStats.summary.
+        """
+        _, powers, _ = self.columns(count)
+        if not len(powers):
+            return {}
+        mean = powers.mean(axis=0)
+        columns = zip(self.bands, mean.tolist(), powers.std(axis=0).tolist(),
+                      powers.min(axis=0).tolist(), powers.max(axis=0).tolist())
+        out = {band: {'mean': m, 'std': s, 'min': lo, 'max': hi} for band, m, s, lo, hi in columns}
+        out['dominant_wave'] = self.bands[int(mean.argmax())]
+        return out
+
+    def records(self, count: Optional[int] = None, since: Optional[int] = None,
+                points: Optional[int] = None, mode: str = "lttb") -> List[Dict]:
+        """The range as the dashboards' reading dicts, oldest first.
+
+        With ``points``, about that many readings picked by pieeg.decimate
+        (``mode``), judged on the band powers.
+        """
+        ts, powers, dominant = self.columns(count, since)
+        if points and len(ts) > points:
+            idx = decimate_indices(powers, points, mode)
+            ts, powers, dominant = ts[idx], powers[idx], dominant[idx]
+        names = [self.bands[d] for d in dominant.tolist()]
+        keys = self._keys
+        return [dict(zip(keys, row), dominant_wave=name, timestamp=t)
+                for row, name, t in zip(powers.tolist(), names, ts.tolist())]
+
+    def latest(self) -> Optional[Dict]:
+        records = self.records(1)
+        return records[0] if records else None
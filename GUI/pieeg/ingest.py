@@ -0,0 +1,223 @@
+"""MQTT ingest for the dashboards: an asyncio receive loop and a consumer stage.
+
+paho's ``loop_forever`` thread runs ``on_message`` to completion before it
+reads the next packet or sends a keepalive. A dashboard doing its analysis
+and Socket.IO fan-out there falls behind in a burst, and then the broker
+drops it for missing keepalives. ``MqttIngest`` splits the work:
+
+* The receive loop is an asyncio loop in its own thread, driving the paho
+  socket with add_reader/add_writer (paho's external-loop hooks). Per
+  message it only parses the payload (JSON by default) and puts it on a
+  bounded queue. It is never blocked by a handler, so keepalives go out on
+  time, and it reconnects with backoff when the broker goes away.
+* The consumer thread takes messages off the queue in order and runs the
+  handler registered for the topic (analysis, emits).
+
+When the consumer falls ``queue_size`` messages behind, the oldest message
+is dropped and counted: a dashboard wants the newest data, not a growing
+backlog. ``summary()`` reports the queue depth, drops, parse and handler
+errors, the time each message waited in the queue and the handler time.
+"""
+import asyncio
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .health import LatencyHistogram, PeriodMax, PeriodReport
+
+QUEUE_SIZE = 1024
+KEEPALIVE = 60
+
+
+class _Message:
+    __slots__ = ('topic', 'data', 'handler', 'received')
+
+    def __init__(self, topic: str, data: Any, handler: Callable[[str, Any], None], received: float):
+        self.topic = topic
+        self.data = data
+        self.handler = handler
+        self.received = received
+
+
+class MqttIngest:
+    """Subscribes ``handler(topic, data)`` callbacks to topics on ``broker``, off the network loop."""
+
+    def __init__(self, broker: str, port: int = 1883, client_id: str = "", keepalive: int = KEEPALIVE,
+                 queue_size: int = QUEUE_SIZE, on_status: Optional[Callable[[bool], None]] = None):
+        import paho.mqtt.client as mqtt
+
+        self.broker = broker
+        self.port = port
+        self.keepalive = keepalive
+        self.on_status = on_status  # connected / disconnected, called from the receive loop
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = self._on_socket_register_write
+        self.client.on_socket_unregister_write = self._on_socket_unregister_write
+        self.topics: Dict[str, int] = {}
+        self.queue: "queue.Queue[Optional[_Message]]" = queue.Queue(queue_size)
+        self.connected = False
+        self.last_error: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._disconnected: Optional[asyncio.Future] = None
+        self._misc: Optional[asyncio.Task] = None
+        self._threads = []
+        # Cumulative, each written by one thread (receive loop or consumer); summary() reports deltas
+        self.received = 0
+        self.handled = 0
+        self.dropped = 0  # oldest messages discarded because the consumer fell behind
+        self.parse_errors = 0
+        self.handler_errors = 0
+        self.max_depth = PeriodMax()
+        self.wait = LatencyHistogram()  # receive -> handler start
+        self.process = LatencyHistogram()  # handler time
+        self.report = PeriodReport(self, counters=('received', 'handled', 'dropped', 'parse_errors',
+                                                   'handler_errors'),
+                                   histograms=('wait', 'process'), peaks=('max_depth',))
+
+    def subscribe(self, topic: str, handler: Callable[[str, Any], None],
+                  parse: Callable[[bytes], Any] = json.loads, qos: int = 0) -> None:
+        """Call ``handler(topic, parse(payload))`` in the consumer thread for each message on ``topic``."""
+
+        def on_message(client, userdata, msg):
+            # receive loop: parse and enqueue only
+            try:
+                data = parse(msg.payload)
+            except ValueError:
+                self.parse_errors += 1
+                return
+            self._put(_Message(msg.topic, data, handler, time.perf_counter()))
+
+        self.topics[topic] = qos
+        self.client.message_callback_add(topic, on_message)
+        if self.connected:
+            self._loop.call_soon_threadsafe(self.client.subscribe, topic, qos)
+
+    def _put(self, message: _Message) -> None:
+        self.received += 1
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                break
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        self.max_depth.update(self.queue.qsize())
+
+    # ---- consumer stage ---------------------------------------------------
+
+    def _consume(self) -> None:
+        while True:
+            message = self.queue.get()
+            if message is None:
+                return
+            start = time.perf_counter()
+            self.wait.add(start - message.received)
+            try:
+                message.handler(message.topic, message.data)
+            except Exception as e:
+                self.handler_errors += 1
+                print(f"⚠️  MQTT handler error ({message.topic}): {e}")
+            self.process.add(time.perf_counter() - start)
+            self.handled += 1
+
+    # ---- receive loop -----------------------------------------------------
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties=None) -> None:
+        if reason_code.is_failure:
+            self.last_error = str(reason_code)
+            return
+        self.connected = True
+        for topic, qos in self.topics.items():
+            client.subscribe(topic, qos)
+        if self.on_status is not None:
+            self.on_status(True)
+
+    def _on_disconnect(self, client, userdata, flags, reason_code, properties=None) -> None:
+        was_connected, self.connected = self.connected, False
+        if self._disconnected is not None and not self._disconnected.done():
+            self._disconnected.set_result(reason_code)
+        if was_connected and self.on_status is not None:
+            self.on_status(False)
+
+    def _on_socket_open(self, client, userdata, sock) -> None:
+        self._loop.add_reader(sock, client.loop_read)
+        self._misc = self._loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client, userdata, sock) -> None:
+        self._loop.remove_reader(sock)
+        self._loop.remove_writer(sock)
+        if self._misc is not None:
+            self._misc.cancel()
+
+    def _on_socket_register_write(self, client, userdata, sock) -> None:
+        self._loop.add_writer(sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock) -> None:
+        self._loop.remove_writer(sock)
+
+    async def _misc_loop(self) -> None:
+        import paho.mqtt.client as mqtt
+
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:  # keepalive pings, timeouts
+            await asyncio.sleep(1)
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        backoff = 1.0
+        while not self._stop.is_set():
+            self._disconnected = self._loop.create_future()
+            try:
+                self.client.connect(self.broker, self.port, self.keepalive)
+            except OSError as e:
+                self.last_error = str(e)
+                try:
+                    await asyncio.wait_for(self._stop.wait(), backoff)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(backoff * 2, 30.0)
+                continue
+            backoff = 1.0
+            stop = asyncio.ensure_future(self._stop.wait())
+            await asyncio.wait([self._disconnected, stop], return_when=asyncio.FIRST_COMPLETED)
+            stop.cancel()
+        if self.connected:
+            self.client.disconnect()
+
+    def start(self) -> "MqttIngest":
+        self._threads = [threading.Thread(target=asyncio.run, args=(self._main(),), name="pieeg-mqtt-recv",
+                                          daemon=True),
+                         threading.Thread(target=self._consume, name="pieeg-mqtt-consume", daemon=True)]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        self.queue.put(None)  # the consumer finishes what is queued first
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join(5)
+
+    def summary(self, reset: bool = True) -> Dict:
+        """Counts, peak queue depth and timings since the previous reset."""
+        return dict(self.report.take(reset), connected=self.connected, depth=self.queue.qsize(),
+                    capacity=self.queue.maxsize)
+
+    @staticmethod
+    def format_summary(s: Dict) -> str:
+        return (f"📥 MQTT {'up' if s['connected'] else 'down'} | {s['received']} received, {s['handled']} handled | "
+                f"queue {s['depth']}/{s['capacity']} (max {s['max_depth']}) | dropped {s['dropped']} | "
+                f"wait p99 {s['wait']['p99_ms']:.2f} ms | handler {s['process']['mean_ms']:.2f}/"
+                f"{s['process']['max_ms']:.2f} ms | errors {s['parse_errors']}+{s['handler_errors']}")
@@ -0,0 +1,274 @@
+"""Append-only session journal of dashboard readings.
+
+Each dashboard session writes its readings, as they arrive, to a directory
+of JSON Lines segments::
+
+    <directory>/segment-00000.jsonl
+    <directory>/segment-00001.jsonl   (after segment_bytes or segment_seconds)
+
+One line per reading (the band-power dict). Lines with an ``event`` key are
+markers, e.g. the start and end of a recording. Nothing is ever rewritten:
+``JournalWriter`` is the one background thread that appends and fsyncs
+every ``sync_interval``. It takes readings from a bounded queue; when that
+falls ``queue_size`` readings behind (a stalled disk), the oldest are
+dropped and counted, so memory stays bounded whatever the session length.
+After a crash every line up to the last fsync is intact, and a torn last
+line is skipped by readers.
+
+``JournalReader`` follows a journal, live or finished: each ``read_new``
+returns the lines appended since the previous call, reading only the new
+bytes.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .health import LatencyHistogram, PeriodMax, PeriodReport
+
+SEGMENT_BYTES = 16 << 20
+SEGMENT_SECONDS = 3600.0
+SYNC_INTERVAL = 1.0
+QUEUE_SIZE = 65536
+BATCH = 1024  # readings per write
+
+
+def segment_name(index: int) -> str:
+    return f"segment-{index:05d}.jsonl"
+
+
+def segments(directory) -> List[Path]:
+    """The journal's segment files, oldest first."""
+    return sorted(Path(directory).glob("segment-*.jsonl"))
+
+
+def _jsonable(value: Any) -> Any:
+    if hasattr(value, 'item'):  # NumPy scalars
+        return value.item()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+class Journal:
+    """The segment files of one journal directory; used by a single thread."""
+
+    def __init__(self, directory, segment_bytes: int = SEGMENT_BYTES, segment_seconds: float = SEGMENT_SECONDS,
+                 sync_interval: float = SYNC_INTERVAL):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.sync_interval = sync_interval
+        existing = segments(self.directory)
+        self.index = int(existing[-1].stem.split('-')[1]) + 1 if existing else 0  # never append to an old segment
+        self.records = 0  # lines written
+        self.synced = 0  # lines covered by the last fsync
+        self._file = None
+        self._size = 0
+        self._opened = 0.0
+        self._last_sync = time.monotonic()
+
+    @property
+    def path(self) -> Path:
+        return self.directory / segment_name(self.index)
+
+    def _due_for_rollover(self, now: float) -> bool:
+        return self._size > 0 and (self._size >= self.segment_bytes or now - self._opened >= self.segment_seconds)
+
+    def write(self, data: bytes, lines: int) -> None:
+        """Append ``lines`` complete lines (``data`` ends with a newline)."""
+        now = time.monotonic()
+        if self._file is not None and self._due_for_rollover(now):
+            self._close_segment()
+            self.index += 1
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            self._size = 0
+            self._opened = now
+        self._file.write(data)
+        self._size += len(data)
+        self.records += lines
+        self.maybe_sync()
+
+    def maybe_sync(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sync >= self.sync_interval:
+            self.sync()
+            if self._due_for_rollover(now):  # roll over on time while idle, too
+                self._close_segment()
+                self.index += 1
+
+    def sync(self) -> None:
+        self._last_sync = time.monotonic()
+        if self._file is None or self.synced == self.records:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.synced = self.records
+
+    def _close_segment(self) -> None:
+        self.sync()
+        self._file.close()
+        self._file = None
+        self._size = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._close_segment()
+
+
+class JournalWriter(threading.Thread):
+    """Background writer of a Journal: ``append`` never blocks the caller.
+
+    ``snapshot``, if given, is called on this thread after every
+    ``snapshot_every`` readings written, e.g. to refresh a small derived
+    file for other programs.
+    """
+
+    def __init__(self, directory, segment_bytes: int = SEGMENT_BYTES, segment_seconds: float = SEGMENT_SECONDS,
+                 sync_interval: float = SYNC_INTERVAL, queue_size: int = QUEUE_SIZE,
+                 snapshot: Optional[Callable[[], None]] = None, snapshot_every: int = 100):
+        super().__init__(name="pieeg-journal", daemon=True)
+        self.journal = Journal(directory, segment_bytes, segment_seconds, sync_interval)
+        self.queue: "queue.Queue[Dict]" = queue.Queue(queue_size)
+        self.snapshot = snapshot
+        self.snapshot_every = snapshot_every
+        self._stop_event = threading.Event()
+        # Cumulative: appended/dropped/max_depth by the caller of append, the rest by this thread
+        self.appended = 0
+        self.dropped = 0  # oldest readings discarded because the writer fell behind
+        self.errors = 0
+        self.max_depth = PeriodMax()
+        self.write_time = LatencyHistogram()
+        self.report = PeriodReport(self, counters=('appended', 'dropped', 'errors'), histograms=('write_time',),
+                                   peaks=('max_depth',))
+
+    @property
+    def directory(self) -> Path:
+        return self.journal.directory
+
+    def append(self, record: Dict) -> None:
+        """Queue one reading (or event marker) for the journal."""
+        self.appended += 1
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                break
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        self.max_depth.update(self.queue.qsize())
+
+    def mark(self, event: str, **fields) -> None:
+        """Queue an event marker line (``{'event': event, 'timestamp': now, **fields}``)."""
+        self.append(dict(fields, event=event, timestamp=time.time()))
+
+    def _drain(self) -> List[Dict]:
+        try:
+            batch = [self.queue.get(timeout=min(0.1, self.journal.sync_interval))]
+        except queue.Empty:
+            return []
+        while len(batch) < BATCH:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self) -> None:
+        while not (self._stop_event.is_set() and self.queue.empty()):
+            batch = self._drain()
+            if not batch:
+                self.journal.maybe_sync()
+                continue
+            start = time.perf_counter()
+            before = self.journal.records
+            try:
+                data = ''.join(json.dumps(r, separators=(',', ':'), default=_jsonable) + '\n' for r in batch)
+                self.journal.write(data.encode(), len(batch))
+            except (OSError, TypeError, ValueError) as e:
+                self.errors += 1
+                print(f"⚠️  Journal write error ({self.directory}): {e}")
+                continue
+            self.write_time.add(time.perf_counter() - start)
+            if self.snapshot and self.journal.records // self.snapshot_every > before // self.snapshot_every:
+                try:
+                    self.snapshot()
+                except Exception as e:
+                    print(f"⚠️  Journal snapshot error: {e}")
+        self.journal.close()
+
+    def stop(self) -> None:
+        """Write everything queued, fsync and close."""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+    def describe(self) -> Dict:
+        """Where the journal is, for derived files that point to it."""
+        return {'directory': str(self.directory), 'segments': [p.name for p in segments(self.directory)],
+                'records': self.journal.records}
+
+    def summary(self, reset: bool = True) -> Dict:
+        """Journal totals, plus appends, drops, errors and write time since the previous reset."""
+        out = self.report.take(reset)
+        out.update(directory=str(self.directory), segment=self.journal.index, records=self.journal.records,
+                   synced=self.journal.synced, depth=self.queue.qsize(), capacity=self.queue.maxsize,
+                   write=out.pop('write_time'))
+        return out
+
+    @staticmethod
+    def format_summary(s: Dict) -> str:
+        return (f"📝 journal segment {s['segment']} | {s['records']} lines ({s['synced']} synced) | "
+                f"{s['appended']} appended, dropped {s['dropped']} | queue {s['depth']}/{s['capacity']} "
+                f"(max {s['max_depth']}) | write {s['write']['mean_ms']:.2f}/{s['write']['max_ms']:.2f} ms | "
+                f"errors {s['errors']}")
+
+
+class JournalReader:
+    """Incremental reader of a journal directory (live or finished)."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._segment: Optional[Path] = None
+        self._offset = 0
+        self.errors = 0  # lines that did not parse (a crash can tear the last one)
+
+    def read_new(self) -> List[Dict]:
+        """Lines appended since the previous call, oldest first (a line still being written waits)."""
+        out = []
+        files = segments(self.directory)
+        if self._segment is not None:
+            files = [p for p in files if p >= self._segment]
+        for path in files:
+            offset = self._offset if path == self._segment else 0
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+            end = data.rfind(b'\n') + 1
+            for line in data[:end].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    self.errors += 1
+            self._segment, self._offset = path, offset + end
+        return out
+
+
+def read_journal(directory) -> List[Dict]:
+    """Every line of a journal."""
+    return JournalReader(directory).read_new()
+
+
+def readings(lines: List[Dict]) -> List[Dict]:
+    """The readings among journal lines (event markers dropped)."""
+    return [line for line in lines if 'event' not in line]
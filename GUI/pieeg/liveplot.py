@@ -0,0 +1,131 @@
+"""Fixed-cost live plot of multichannel EEG with matplotlib blitting.
+
+Each subplot owns exactly one Line2D whose y-data is a fixed-length scrolling
+buffer, so a session can run for hours without the figure accumulating
+artists. Redraws are throttled to ``redraw_hz`` independently of how often
+samples are pushed, and only the lines are re-rendered over a cached
+background; the (expensive) full redraw happens only when an axis has to
+rescale.
+"""
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+class LivePlot:
+    """Scrolling per-channel line plot laid out column-major over a grid.
+
+    Channel ``k`` goes to ``axes[k % rows, k // rows]``, i.e. channels 1-4 fill
+    the first column, 5-8 the second and so on.
+    """
+
+    def __init__(self, fs: float, channels: int = 16, rows: int = 4, cols: int = 4,
+                 seconds: float = 20.0, redraw_hz: float = 10.0,
+                 titles: Optional[Sequence[str]] = None, figsize=(5, 5),
+                 color: str = '#0a0b0c'):
+        from matplotlib import pyplot as plt
+
+        if channels > rows * cols:
+            raise ValueError(f"{channels} channels do not fit a {rows}x{cols} grid")
+        self.plt = plt
+        self.channels = channels
+        self.redraw_interval = 1.0 / redraw_hz if redraw_hz > 0 else 0.0
+        n = max(2, int(round(seconds * fs)))
+        self.x = (np.arange(n) - (n - 1)) / fs  # seconds relative to the newest sample
+        self.y = np.zeros((n, channels), dtype=np.float32)
+        self.filled = 0
+
+        self.fig, grid = plt.subplots(rows, cols, figsize=figsize, squeeze=False)
+        self.fig.subplots_adjust(hspace=1)
+        self.axes = []
+        self.lines = []
+        for ch in range(channels):
+            ax = grid[ch % rows, ch // rows]
+            line, = ax.plot(self.x, self.y[:, ch], color=color, animated=True)
+            ax.set_xlim(self.x[0], self.x[-1])
+            ax.set_ylim(-1.0, 1.0)
+            ax.set_xlabel('Time')
+            ax.set_ylabel('Amplitude')
+            ax.set_title(titles[ch] if titles else f'Data after pass filter Ch-{ch + 1}')
+            self.axes.append(ax)
+            self.lines.append(line)
+        for k in range(channels, rows * cols):
+            grid[k % rows, k // rows].set_visible(False)
+
+        self.draws = 0  # blitted frames
+        self.full_redraws = 0  # frames that had to rescale and redraw everything
+        self.last_draw_s = 0.0  # wall time of the latest redraw
+        self._last_draw_at = 0.0
+        self._background = None
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+        plt.show(block=False)
+        self.fig.canvas.draw()
+
+    def _on_draw(self, _event) -> None:
+        # Any full draw (first show, resize, rescale) refreshes the cached background.
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self) -> None:
+        for ax, line in zip(self.axes, self.lines):
+            ax.draw_artist(line)
+
+    def push(self, block: np.ndarray) -> None:
+        """Scroll an (n, channels) block of new samples into the buffer."""
+        block = np.asarray(block)
+        n = len(block)
+        if n == 0:
+            return
+        size = len(self.y)
+        if n >= size:
+            self.y[:] = block[-size:]
+        else:
+            self.y[:-n] = self.y[n:]
+            self.y[-n:] = block
+        self.filled = min(size, self.filled + n)
+
+    def _rescale(self) -> bool:
+        if self.filled == 0:
+            return False
+        visible = self.y[-self.filled:]
+        lo, hi = visible.min(axis=0), visible.max(axis=0)
+        changed = False
+        for ch, ax in enumerate(self.axes):
+            cur_lo, cur_hi = ax.get_ylim()
+            span = cur_hi - cur_lo
+            # Hysteresis: rescale only when the trace leaves the axis or uses
+            # under a quarter of it, so full redraws stay rare.
+            if lo[ch] < cur_lo or hi[ch] > cur_hi or (hi[ch] - lo[ch]) < 0.25 * span:
+                pad = max(0.25 * (hi[ch] - lo[ch]), 1.0)
+                ax.set_ylim(lo[ch] - pad, hi[ch] + pad)
+                changed = True
+        return changed
+
+    def draw(self, force: bool = False) -> bool:
+        """Redraw if the redraw interval has elapsed; returns True if it did."""
+        now = time.monotonic()
+        if not force and now - self._last_draw_at < self.redraw_interval:
+            self.fig.canvas.flush_events()  # keep the window responsive
+            return False
+        self._last_draw_at = now
+        for ch, line in enumerate(self.lines):
+            line.set_ydata(self.y[:, ch])
+        canvas = self.fig.canvas
+        if self._rescale() or self._background is None:
+            self.full_redraws += 1
+            canvas.draw()  # _on_draw recaptures the background and draws the lines
+        else:
+            canvas.restore_region(self._background)
+            self._draw_lines()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+        self.draws += 1
+        self.last_draw_s = time.monotonic() - now
+        return True
+
+    def is_open(self) -> bool:
+        return self.plt.fignum_exists(self.fig.number)
+
+    def close(self) -> None:
+        self.plt.close(self.fig)
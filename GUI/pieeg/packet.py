@@ -0,0 +1,131 @@
+"""Binary EEG control packet sent over UDP to the ESP32 firmware (port 4210).
+
+32 bytes, little-endian, mirrored by src/eeg_packet.hpp:
+
+    offset  type     field
+    0       u8       magic 0xE5 (never the first byte of the legacy ASCII text)
+    1       u8       version (1)
+    2       u16      sequence number, wraps
+    4       u32      sender monotonic time in μs, wraps (~71 min)
+    8       f32      control value (0-10, the number the ASCII format carried)
+    12      5 x f32  delta, theta, alpha, beta, gamma band power
+
+The firmware detects the format from the first byte and length, so the old
+ASCII payload (``"2.35"``) still works; ``decode_any`` does the same here.
+"""
+import random
+import struct
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+MAGIC = 0xE5
+VERSION = 1
+BAND_ORDER = ('delta', 'theta', 'alpha', 'beta', 'gamma')
+
+PACKET = struct.Struct('<BBHIf5f')
+PACKET_SIZE = PACKET.size  # 32
+
+Bands = Union[Dict[str, float], Sequence[float]]
+
+
+class ControlPacket(NamedTuple):
+    seq: Optional[int]  # None for a legacy ASCII payload
+    t_us: Optional[int]
+    value: float
+    delta: float = 0.0
+    theta: float = 0.0
+    alpha: float = 0.0
+    beta: float = 0.0
+    gamma: float = 0.0
+
+
+def monotonic_us() -> int:
+    return (time.monotonic_ns() // 1000) & 0xFFFFFFFF
+
+
+def _band_values(bands: Optional[Bands]) -> List[float]:
+    if bands is None:
+        return [0.0] * len(BAND_ORDER)
+    if isinstance(bands, dict):
+        return [float(bands.get(b, 0.0)) for b in BAND_ORDER]
+    values = [float(v) for v in bands]
+    if len(values) != len(BAND_ORDER):
+        raise ValueError(f"expected {len(BAND_ORDER)} band powers ({', '.join(BAND_ORDER)}), got {len(values)}")
+    return values
+
+
+def encode(seq: int, value: float, bands: Optional[Bands] = None, t_us: Optional[int] = None) -> bytes:
+    """Pack one control packet."""
+    return PACKET.pack(MAGIC, VERSION, seq & 0xFFFF, (monotonic_us() if t_us is None else t_us) & 0xFFFFFFFF,
+                       value, *_band_values(bands))
+
+
+def is_binary(buf: bytes) -> bool:
+    return len(buf) == PACKET_SIZE and buf[0] == MAGIC
+
+
+def decode(buf: bytes) -> ControlPacket:
+    """Unpack one binary packet (ValueError if it is not one)."""
+    if not is_binary(buf):
+        raise ValueError(f"not a {PACKET_SIZE}-byte EEG control packet")
+    magic, version, *fields = PACKET.unpack(buf)
+    if version != VERSION:
+        raise ValueError(f"unsupported EEG control packet version {version}")
+    return ControlPacket(*fields)
+
+
+def decode_any(buf: bytes) -> ControlPacket:
+    """Binary packet or legacy ASCII value, detected like the firmware does."""
+    if is_binary(buf):
+        return decode(buf)
+    return ControlPacket(None, None, float(buf.decode('ascii').strip()))
+
+
+def pack_many(packets: Iterable[ControlPacket]) -> bytes:
+    """Concatenate packets (e.g. a log) into one buffer."""
+    packets = list(packets)
+    out = bytearray(PACKET_SIZE * len(packets))
+    for i, p in enumerate(packets):
+        PACKET.pack_into(out, i * PACKET_SIZE, MAGIC, VERSION, p.seq & 0xFFFF, p.t_us & 0xFFFFFFFF, p.value,
+                         p.delta, p.theta, p.alpha, p.beta, p.gamma)
+    return bytes(out)
+
+
+def unpack_many(buf: bytes) -> List[ControlPacket]:
+    """Inverse of ``pack_many``."""
+    return [ControlPacket(*fields) for _, _, *fields in PACKET.iter_unpack(buf)]
+
+
+def seq_newer(seq: int, last: int, restart_window: int = 256,
+              t_us: Optional[int] = None, last_t_us: Optional[int] = None) -> bool:
+    """True if ``seq`` comes after ``last`` (mod 2^16), or looks like a sender restart.
+
+    Same rule as the firmware: duplicates and packets up to
+    ``restart_window`` behind are stale; a larger step back means the sender
+    restarted its counter. A step back whose sender time ``t_us`` is later
+    than that of the last accepted packet (``last_t_us``) is a restart too:
+    a late packet was sent earlier, a restarted sender's is sent later.
+    """
+    diff = (seq - last + 0x8000) % 0x10000 - 0x8000
+    if diff > 0 or diff < -restart_window:
+        return True
+    if t_us is None or last_t_us is None:
+        return False
+    return (t_us - last_t_us + 0x80000000) % 0x100000000 - 0x80000000 > 0
+
+
+class PacketEncoder:
+    """Numbers packets consecutively for one sender.
+
+    The first number is random by default, so a restarted sender is unlikely
+    to land just behind its previous run's numbers, which the firmware would
+    drop as stale.
+    """
+
+    def __init__(self, start: Optional[int] = None):
+        self.seq = random.getrandbits(16) if start is None else start & 0xFFFF
+
+    def encode(self, value: float, bands: Optional[Bands] = None) -> bytes:
+        buf = encode(self.seq, value, bands)
+        self.seq = (self.seq + 1) & 0xFFFF
+        return buf
@@ -0,0 +1,238 @@
+"""Lossless raw-sample recording to a memory-mapped, append-only file.
+
+File layout (little endian)::
+
+    [0, HEADER_SIZE)   header: HEADER_DTYPE fields, then a JSON blob with
+                       free-form metadata (e.g. the ADS1299 register table)
+    [HEADER_SIZE, ...) records: RECORD_DTYPE(channels, status_words) each
+
+The file is grown in whole chunks with ``truncate`` and written through an
+``mmap``, so appending is a single copy from the acquisition ring straight
+into the page cache. ``n_samples`` in the header is the crash-safe length
+marker: it is only advanced after the records it covers have been flushed
+with msync, so after a crash (or while the file is still being written)
+everything up to the marker is complete. ``open_recording`` maps a file --
+live or finished -- as a NumPy record array of exactly that length.
+"""
+import json
+import mmap
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .ads1299 import UV_PER_LSB
+from .ring import RingReader
+
+MAGIC = b"PIEEGRAW"
+VERSION = 1
+HEADER_SIZE = 4096  # keeps the records page aligned
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("header_size", "<u4"),
+    ("n_samples", "<u8"),  # length marker, 8-byte aligned for a single store
+    ("channels", "<u4"),
+    ("status_words", "<u4"),
+    ("sample_rate", "<f8"),
+    ("gain", "<f8"),
+    ("uv_per_lsb", "<f8"),
+    ("created", "<f8"),
+    ("meta_len", "<u4"),
+])
+_META_OFFSET = HEADER_DTYPE.itemsize
+
+
+def record_dtype(channels: int, status_words: int) -> np.dtype:
+    """One sample: timestamp (s), per-chip status words, μV per channel."""
+    return np.dtype([
+        ("t", "<f8"),
+        ("status", "<u4", (status_words,)),
+        ("uv", "<f4", (channels,)),
+    ])
+
+
+class RawRecorder:
+    """Append decoded samples to a memory-mapped recording file."""
+
+    def __init__(self, path: str, sample_rate: float, channels: int = 16,
+                 status_words: int = 2, gain: float = 1.0,
+                 meta: Optional[Dict[str, Any]] = None,
+                 chunk_seconds: float = 60.0, sync_interval: float = 1.0):
+        self.path = path
+        self.dtype = record_dtype(channels, status_words)
+        self.chunk_records = max(1, int(chunk_seconds * sample_rate))
+        self.sync_interval = sync_interval
+        self.n_written = 0  # records copied into the map
+        self.n_committed = 0  # records covered by the on-disk length marker
+        self.dropped = 0  # samples lost to ring overruns before they could be recorded
+        self._last_sync = time.monotonic()
+
+        meta_blob = json.dumps(meta or {}).encode()
+        if _META_OFFSET + len(meta_blob) > HEADER_SIZE:
+            raise ValueError("metadata does not fit in the recording header")
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        self._map = None
+        self._grow(self.chunk_records)
+        header = self._header()
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["header_size"] = HEADER_SIZE
+        header["n_samples"] = 0
+        header["channels"] = channels
+        header["status_words"] = status_words
+        header["sample_rate"] = sample_rate
+        header["gain"] = gain
+        header["uv_per_lsb"] = UV_PER_LSB / gain
+        header["created"] = time.time()
+        header["meta_len"] = len(meta_blob)
+        self._map[_META_OFFSET:_META_OFFSET + len(meta_blob)] = meta_blob
+        self._map.flush()
+
+    # ---- mapping ----------------------------------------------------------
+
+    def _header(self) -> np.ndarray:
+        return np.frombuffer(self._map, HEADER_DTYPE, count=1)[0]
+
+    def _records(self) -> np.ndarray:
+        return np.frombuffer(self._map, self.dtype, count=self.capacity, offset=HEADER_SIZE)
+
+    def _grow(self, capacity: int) -> None:
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+        os.ftruncate(self._fd, HEADER_SIZE + capacity * self.dtype.itemsize)
+        self._map = mmap.mmap(self._fd, HEADER_SIZE + capacity * self.dtype.itemsize)
+        self.capacity = capacity
+
+    def _reserve(self, n: int) -> None:
+        need = self.n_written + n
+        if need > self.capacity:
+            chunks = -(-need // self.chunk_records)
+            self._grow(chunks * self.chunk_records)
+
+    # ---- writing ----------------------------------------------------------
+
+    def append(self, data: np.ndarray, timestamps, status=0) -> None:
+        """Append an (n, channels) block with its timestamps and status words."""
+        n = len(data)
+        if n == 0:
+            return
+        self._reserve(n)
+        recs = self._records()[self.n_written:self.n_written + n]
+        recs["uv"] = data
+        recs["t"] = timestamps
+        recs["status"] = status
+        del recs
+        self.n_written += n
+        self.maybe_sync()
+
+    def write_from(self, reader: RingReader) -> int:
+        """Copy every unread sample of ``reader``'s ring straight into the file."""
+        overruns = reader.overruns
+        first, segments = reader.peek()
+        n = sum(len(seg[0]) for seg in segments)
+        if n == 0:
+            return 0
+        self._reserve(n)
+        recs = self._records()
+        pos = self.n_written
+        for data, ts, status in segments:
+            k = len(data)
+            recs["uv"][pos:pos + k] = data
+            recs["t"][pos:pos + k] = ts
+            recs["status"][pos:pos + k] = status
+            pos += k
+        torn = reader.advance(first, n)
+        if torn:
+            # The writer lapped us mid-copy: drop the possibly mixed records.
+            recs[self.n_written:pos - torn] = recs[self.n_written + torn:pos]
+        self.dropped += reader.overruns - overruns
+        del recs
+        self.n_written += n - torn
+        self.maybe_sync()
+        return n - torn
+
+    def maybe_sync(self) -> None:
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """Flush records to disk, then advance and flush the length marker."""
+        self._last_sync = time.monotonic()
+        if self.n_committed == self.n_written:
+            return
+        self._map.flush()
+        self._header()["n_samples"] = self.n_written
+        self._map.flush(0, mmap.PAGESIZE)
+        self.n_committed = self.n_written
+
+    def close(self) -> None:
+        """Commit everything and trim the preallocated tail."""
+        if self._map is None:
+            return
+        self.sync()
+        self._map.close()
+        self._map = None
+        os.ftruncate(self._fd, HEADER_SIZE + self.n_written * self.dtype.itemsize)
+        os.fsync(self._fd)
+        os.close(self._fd)
+
+    def __enter__(self) -> "RawRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class RecordingThread(threading.Thread):
+    """Drains a RingReader into a RawRecorder off the acquisition thread."""
+
+    def __init__(self, recorder: RawRecorder, reader: RingReader, interval: float = 0.1):
+        super().__init__(name="pieeg-recorder", daemon=True)
+        self.recorder = recorder
+        self.reader = reader
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.recorder.write_from(self.reader)
+        self.recorder.write_from(self.reader)
+        self.recorder.close()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+
+def read_header(path: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Return ``(header fields, metadata)`` of a recording."""
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    header = np.frombuffer(raw, HEADER_DTYPE, count=1)[0]
+    if header["magic"] != MAGIC:
+        raise ValueError(f"{path} is not a PiEEG raw recording")
+    fields = {name: header[name].item() for name in HEADER_DTYPE.names if name != "magic"}
+    meta = json.loads(raw[_META_OFFSET:_META_OFFSET + fields["meta_len"]] or b"{}")
+    return fields, meta
+
+
+def open_recording(path: str) -> Tuple[Dict[str, Any], np.memmap]:
+    """Map the committed part of a (possibly still growing) recording.
+
+    Returns ``(header, records)`` where ``records["uv"]`` is (n, channels),
+    ``records["t"]`` (n,) and ``records["status"]`` (n, status_words). Call
+    again to pick up samples committed since.
+    """
+    header, meta = read_header(path)
+    header["meta"] = meta
+    dtype = record_dtype(header["channels"], header["status_words"])
+    n = header["n_samples"]
+    if n == 0:
+        return header, np.zeros(0, dtype=dtype)
+    return header, np.memmap(path, dtype=dtype, mode="r", offset=header["header_size"], shape=(n,))
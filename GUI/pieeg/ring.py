@@ -0,0 +1,176 @@
+"""Preallocated single-producer sample ring for decoded EEG.
+
+The acquisition thread is the only writer. It fills a slot and only then
+advances ``head`` (the total number of samples ever written), so readers never
+need a lock: they copy what they want and re-check ``head`` afterwards to
+detect slots that were overwritten during the copy. Samples are addressed by
+absolute index, which lets any number of consumers (plotter, band power,
+publishers) run at their own pace; a consumer that falls more than
+``capacity`` samples behind loses the oldest data and has it counted in its
+``overruns`` instead of ever stalling the writer.
+"""
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# Contiguous zero-copy slices of the ring: (data, timestamps, status)
+Segment = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class SampleRing:
+    """Fixed-size (capacity, channels) float32 ring with per-sample timestamps.
+
+    Each sample also carries ``status_words`` uint32 values (one ADS1299
+    status word per chip) so recorders can keep them alongside the data.
+    """
+
+    def __init__(self, capacity: int, channels: int = 16, status_words: int = 2):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2 samples")
+        self.capacity = capacity
+        self.channels = channels
+        self.data = np.zeros((capacity, channels), dtype=np.float32)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.status = np.zeros((capacity, status_words), dtype=np.uint32)
+        self.head = 0  # absolute index of the next sample to be written
+
+    # ---- producer -------------------------------------------------------
+
+    def append(self, sample, timestamp: float, status=0) -> None:
+        """Write one (channels,) sample."""
+        i = self.head % self.capacity
+        self.data[i] = sample
+        self.timestamps[i] = timestamp
+        self.status[i] = status
+        self.head += 1  # publish only after the slot is complete
+
+    def extend(self, block: np.ndarray, timestamps, status=0) -> None:
+        """Write an (n, channels) block; only the newest ``capacity`` rows are kept."""
+        n = len(block)
+        if n == 0:
+            return
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=np.float64), (n,))
+        status = np.broadcast_to(np.asarray(status, dtype=np.uint32), (n, self.status.shape[1]))
+        skip = max(0, n - self.capacity)
+        start = self.head + skip
+        i = start % self.capacity
+        first = min(n - skip, self.capacity - i)
+        self.data[i:i + first] = block[skip:skip + first]
+        self.timestamps[i:i + first] = timestamps[skip:skip + first]
+        self.status[i:i + first] = status[skip:skip + first]
+        rest = n - skip - first
+        if rest:
+            self.data[:rest] = block[skip + first:]
+            self.timestamps[:rest] = timestamps[skip + first:]
+            self.status[:rest] = status[skip + first:]
+        self.head += n
+
+    # ---- consumers ------------------------------------------------------
+
+    @property
+    def oldest(self) -> int:
+        """Smallest absolute index that is still safe to read.
+
+        One slot is held back because the writer may be filling it right now.
+        """
+        return max(0, self.head - self.capacity + 1)
+
+    def read(self, start: int, count: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Copy up to ``count`` samples starting at absolute index ``start``.
+
+        Returns ``(data, timestamps, first)`` where ``first`` is the absolute
+        index of ``data[0]``; it is larger than ``start`` when the requested
+        samples had already been overwritten.
+        """
+        head = self.head
+        start = max(start, self.oldest)
+        stop = min(start + max(count, 0), head)
+        if stop <= start:
+            return (np.empty((0, self.channels), dtype=np.float32),
+                    np.empty(0, dtype=np.float64), start)
+        i, j = start % self.capacity, stop % self.capacity
+        if i < j:
+            data = self.data[i:j].copy()
+            ts = self.timestamps[i:j].copy()
+        else:
+            data = np.concatenate((self.data[i:], self.data[:j]))
+            ts = np.concatenate((self.timestamps[i:], self.timestamps[:j]))
+        # Drop anything the writer lapped while we were copying.
+        torn = self.oldest - start
+        if torn > 0:
+            data, ts, start = data[torn:], ts[torn:], start + torn
+        return data, ts, start
+
+    def views(self, start: int, count: int) -> Tuple[int, List[Segment]]:
+        """Zero-copy views of up to ``count`` samples from absolute index ``start``.
+
+        Returns ``(first, segments)``: at most two contiguous slices (two when
+        the range wraps). The views alias the ring, so callers must consume
+        them promptly and then check ``oldest`` for samples lapped meanwhile.
+        """
+        start = max(start, self.oldest)
+        stop = min(start + max(count, 0), self.head)
+        segments = []
+        index = start
+        while index < stop:
+            i = index % self.capacity
+            j = min(self.capacity, i + stop - index)
+            segments.append((self.data[i:j], self.timestamps[i:j], self.status[i:j]))
+            index += j - i
+        return start, segments
+
+    def reader(self, start: Optional[int] = None) -> "RingReader":
+        """Create a cursor beginning at ``start`` (default: the next new sample)."""
+        return RingReader(self, self.head if start is None else start)
+
+
+class RingReader:
+    """A consumer's position in a SampleRing, with its own overrun count."""
+
+    def __init__(self, ring: SampleRing, start: int):
+        self.ring = ring
+        self.index = start
+        self.overruns = 0  # samples lost because this consumer fell behind
+
+    @property
+    def available(self) -> int:
+        return max(0, self.ring.head - max(self.index, self.ring.oldest))
+
+    def read_available(self, max_count: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return everything written since the last read without blocking."""
+        count = self.ring.head - self.index if max_count is None else max_count
+        data, ts, first = self.ring.read(self.index, count)
+        self.overruns += first - self.index
+        self.index = first + len(data)
+        return data, ts
+
+    def peek(self, max_count: Optional[int] = None) -> Tuple[int, List[Segment]]:
+        """Zero-copy views of unread samples; pass them to ``advance`` once used."""
+        count = self.ring.head - self.index if max_count is None else max_count
+        return self.ring.views(self.index, count)
+
+    def advance(self, first: int, count: int) -> int:
+        """Mark ``count`` samples from ``first`` (as returned by ``peek``) consumed.
+
+        Returns how many of them the writer may have overwritten while they
+        were being used; those are counted as overruns too.
+        """
+        torn = max(0, min(count, self.ring.oldest - first))
+        self.overruns += (first - self.index) + torn
+        self.index = first + count
+        return torn
+
+    def read(self, count: int, timeout: Optional[float] = None,
+             poll_interval: float = 0.002) -> Tuple[np.ndarray, np.ndarray]:
+        """Wait until ``count`` new samples exist and return exactly those.
+
+        On timeout the (possibly shorter) data available so far is returned.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.available < count:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(poll_interval)
+        return self.read_available(count)
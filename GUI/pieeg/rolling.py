@@ -0,0 +1,153 @@
+"""Rolling mean, standard deviation, min and max in O(1) per update.
+
+``RollingStats`` keeps a window of the last ``size`` readings and/or the
+readings of the last ``seconds``. Each reading is a vector (e.g. 4 band
+powers, or bands x channels). Per update:
+
+* the mean and variance follow Welford's update, run forwards for the new
+  reading and backwards for each one leaving the window;
+* min and max come from a monotonic deque per component. A reading is
+  pushed and popped at most once, so the cost is amortised O(1).
+
+Queries read the maintained values and never walk the window. The variance
+is the population variance (``np.std``'s default), like the dashboards'
+statistics.
+
+Updates, expiry and queries take one lock per window, so a writer thread can
+push while other threads (e.g. Flask requests) expire and read.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+BANDS = ('theta', 'alpha', 'beta', 'gamma')
+
+
+class RollingStats:
+    """Windowed statistics of ``width``-component readings (by count, by age, or both)."""
+
+    def __init__(self, width: int, size: Optional[int] = None, seconds: Optional[float] = None):
+        self.width = width
+        self.size = size
+        self.seconds = seconds
+        self._window = deque()  # (index, ts, values)
+        self._min = [deque() for _ in range(width)]  # (index, value), values increasing
+        self._max = [deque() for _ in range(width)]  # (index, value), values decreasing
+        self._index = 0
+        self._mean = np.zeros(width)
+        self._m2 = np.zeros(width)
+        self._lock = threading.RLock()
+
+    @property
+    def count(self) -> int:
+        return len(self._window)
+
+    def push(self, values: Sequence[float], ts: Optional[float] = None) -> None:
+        """Add one reading taken at ``ts`` (default: now) and drop the ones that left the window."""
+        ts = time.time() if ts is None else ts
+        x = np.asarray(values, dtype=np.float64).reshape(self.width)
+        with self._lock:
+            self._push(x, ts)
+
+    def _push(self, x: np.ndarray, ts: float) -> None:
+        i = self._index
+        self._index += 1
+        self._window.append((i, ts, x))
+        n = len(self._window)
+        delta = x - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (x - self._mean)
+        for k, v in enumerate(x.tolist()):
+            lo, hi = self._min[k], self._max[k]
+            while lo and lo[-1][1] >= v:
+                lo.pop()
+            lo.append((i, v))
+            while hi and hi[-1][1] <= v:
+                hi.pop()
+            hi.append((i, v))
+        self._evict(ts)
+
+    def _evict(self, now: float) -> None:
+        window = self._window
+        while window and ((self.size is not None and len(window) > self.size)
+                          or (self.seconds is not None and window[0][1] < now - self.seconds)):
+            i, _, y = window.popleft()
+            n = len(window)
+            if n == 0:
+                self._mean[:] = 0.0
+                self._m2[:] = 0.0
+            else:
+                delta = y - self._mean
+                self._mean -= delta / n
+                self._m2 -= delta * (y - self._mean)
+            for dq in self._min + self._max:
+                if dq and dq[0][0] == i:
+                    dq.popleft()
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """Drop readings older than ``seconds`` without adding one (time windows only)."""
+        with self._lock:
+            self._evict(time.time() if now is None else now)
+
+    def mean(self) -> np.ndarray:
+        with self._lock:
+            return self._mean.copy()
+
+    def var(self) -> np.ndarray:
+        with self._lock:
+            n = len(self._window)
+            return np.maximum(self._m2, 0.0) / n if n else np.zeros(self.width)
+
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var())
+
+    def min(self) -> np.ndarray:
+        with self._lock:
+            return np.array([dq[0][1] if dq else 0.0 for dq in self._min])
+
+    def max(self) -> np.ndarray:
+        with self._lock:
+            return np.array([dq[0][1] if dq else 0.0 for dq in self._max])
+
+
+class BandStats(RollingStats):
+    """RollingStats over the ``{band}_power`` fields of band-power dicts."""
+
+    def __init__(self, size: Optional[int] = None, seconds: Optional[float] = None, bands: Sequence[str] = BANDS):
+        super().__init__(len(bands), size, seconds)
+        self.bands = tuple(bands)
+        self._keys = [f'{b}_power' for b in self.bands]
+
+    def push_record(self, record: Dict, ts: Optional[float] = None) -> None:
+        self.push([record.get(k, 0) or 0.0 for k in self._keys], ts)
+
+    @classmethod
+    def of(cls, records: Iterable[Dict], bands: Sequence[str] = BANDS) -> "BandStats":
+        """Statistics of every record, in one pass."""
+        stats = cls(bands=bands)
+        for i, record in enumerate(records):
+            stats.push_record(record, ts=i)
+        return stats
+
+    def means(self) -> Dict[str, float]:
+        return dict(zip(self.bands, self.mean().tolist()))
+
+    def summary(self, now: Optional[float] = None) -> Dict:
+        """``{band: {mean, std, min, max}, 'dominant_wave': band}`` ({} when empty).
+
+        With ``now``, readings older than ``seconds`` before it are dropped
+        first, in the same step.
+        """
+        with self._lock:
+            if now is not None:
+                self._evict(now)
+            if not self.count:
+                return {}
+            means = self._mean.tolist()
+            columns = zip(self.bands, means, self.std().tolist(), self.min().tolist(), self.max().tolist())
+            out = {band: {'mean': mean, 'std': std, 'min': lo, 'max': hi} for band, mean, std, lo, hi in columns}
+        out['dominant_wave'] = self.bands[means.index(max(means))]
+        return out
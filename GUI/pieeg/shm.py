@@ -0,0 +1,320 @@
+"""Local pub/sub over shared memory: a ring of seqlocked records.
+
+One publisher process creates a named ``multiprocessing.shared_memory``
+segment. The segment is a ring of fixed-size records described by a NumPy
+structured dtype. Any number of subscriber processes attach by name and
+read every record in order, without locks or syscalls: polling costs a few
+microseconds, and ``wait()`` sleeps in sub-millisecond steps. A subscriber
+that falls more than ``capacity`` records behind is told how many records
+it lost rather than being handed stale or torn data.
+
+Each slot is ``[seq | record | seq_end]``. The writer first sets ``seq`` to
+an odd value, then writes the record, then writes the final even value
+into ``seq_end`` and ``seq``. A reader accepts a copy only if ``seq`` (read
+before and after the copy) and ``seq_end`` all equal the value expected for
+that message.
+
+``BAND_CHANNEL`` / ``BAND_RECORD`` are the band-power channel published by
+the acquisition script and read by the dashboards. ``band_dict()`` turns a
+record into the same dict that /tmp/latest_eeg_data.json holds.
+``CONTROL_CHANNEL`` carries the drone control commands (see pieeg.control).
+"""
+import json
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"PIEEGSHM"
+VERSION = 2
+HEADER_SIZE = 4096
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('capacity', '<u4'),
+    ('slot_size', '<u4'),
+    ('closed', '<u4'),  # set by the publisher on close; subscribers re-attach
+    ('instance', '<u8'),  # random per publisher, to notice a restarted publisher
+    ('head', '<u8'),  # number of records published so far
+    ('dtype_len', '<u4'),
+    ('pid', '<u4'),  # the publisher's process, to tell a live channel from a stale one
+])
+# ... followed by the record dtype's descr as JSON
+
+BAND_CHANNEL = "pieeg_bands"
+BAND_KEYS = ('delta', 'theta', 'alpha', 'beta', 'gamma')
+BAND_RECORD = np.dtype([('timestamp', '<f8')] + [(f'{b}_power', '<f8') for b in BAND_KEYS])
+
+CONTROL_CHANNEL = "pieeg_control"
+CONTROL_RECORD = np.dtype([('timestamp', '<f8'), ('v', '<f4'), ('arm', 'u1')])
+
+
+def _slot_dtype(record: np.dtype) -> np.dtype:
+    size = -(-record.itemsize // 8) * 8  # keep seq_end 8-byte aligned
+    return np.dtype({'names': ['seq', 'record', 'seq_end'],
+                     'formats': ['<u8', record, '<u8'],
+                     'offsets': [0, 8, 8 + size],
+                     'itemsize': 16 + size})
+
+
+class _Segment:
+    """A mapped ring: header view, slot views and the record dtype."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, record: np.dtype, capacity: int):
+        self.shm = shm
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=shm.buf)
+        self.record = record
+        self.capacity = capacity
+        slots = _slot_dtype(record)
+        self.slots = np.ndarray((capacity,), slots, buffer=shm.buf, offset=HEADER_SIZE)
+        self.seq = self.slots['seq']
+        self.seq_end = self.slots['seq_end']
+        self.data = self.slots['record']
+
+    def release(self) -> None:
+        # Drop our views before closing, or the mmap refuses to close.
+        del self.header, self.slots, self.seq, self.seq_end, self.data
+        self.shm.close()
+
+
+def _untrack(shm: shared_memory.SharedMemory, header: np.ndarray) -> None:
+    # Before 3.13 attaching also registers the segment with this process's
+    # resource tracker, which would unlink it when we exit; only the
+    # publisher owns it. A publisher in this process keeps its registration.
+    if int(header['pid']) == os.getpid() and bytes(header['magic']) == MAGIC:
+        return
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+def _attach(name: str) -> _Segment:
+    shm = shared_memory.SharedMemory(name=name)
+    header = np.ndarray((), HEADER_DTYPE, buffer=shm.buf)
+    _untrack(shm, header)
+    if bytes(header['magic']) != MAGIC or int(header['version']) != VERSION:
+        del header
+        shm.close()
+        raise ValueError(f"shared memory {name!r} is not a pieeg channel")
+    n = int(header['dtype_len'])
+    descr = json.loads(bytes(shm.buf[HEADER_DTYPE.itemsize:HEADER_DTYPE.itemsize + n]).decode())
+    capacity = int(header['capacity'])
+    del header
+    return _Segment(shm, np.dtype([tuple(f) for f in descr]), capacity)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # exists, owned by another user
+        return True
+    return True
+
+
+def _unlink_stale(name: str) -> None:
+    """Remove channel ``name`` if its publisher closed it or is gone; FileExistsError if it is live."""
+    shm = shared_memory.SharedMemory(name=name)
+    owner = None
+    if shm.size >= HEADER_DTYPE.itemsize:
+        header = np.ndarray((), HEADER_DTYPE, buffer=shm.buf)
+        _untrack(shm, header)
+        if bytes(header['magic']) == MAGIC and not int(header['closed']):
+            if int(header['version']) != VERSION:
+                owner = "a publisher of another pieeg version"
+            elif _pid_alive(int(header['pid'])):
+                owner = f"process {int(header['pid'])}"
+        del header
+    shm.close()
+    if owner is not None:
+        raise FileExistsError(f"shared memory channel {name!r} is in use by {owner}: is another acquisition "
+                              f"script running? (if not, remove /dev/shm/{name.lstrip('/')})")
+    # Left behind by a publisher that did not exit cleanly
+    shared_memory.SharedMemory(name=name).unlink()
+
+
+class ShmPublisher:
+    """Creates channel ``name`` and publishes records into it."""
+
+    def __init__(self, name: str = BAND_CHANNEL, record: np.dtype = BAND_RECORD, capacity: int = 256):
+        record = np.dtype(record)
+        descr = json.dumps(record.descr).encode()
+        if HEADER_DTYPE.itemsize + len(descr) > HEADER_SIZE:
+            raise ValueError("record dtype is too large for the channel header")
+        size = HEADER_SIZE + capacity * _slot_dtype(record).itemsize
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            _unlink_stale(name)  # raises if a live publisher owns it
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = name
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        shm.buf[HEADER_DTYPE.itemsize:HEADER_DTYPE.itemsize + len(descr)] = descr
+        self._seg = _Segment(shm, record, capacity)
+        h = self._seg.header
+        h['version'] = VERSION
+        h['capacity'] = capacity
+        h['slot_size'] = self._seg.slots.dtype.itemsize
+        h['instance'] = int.from_bytes(os.urandom(8), 'little')
+        h['dtype_len'] = len(descr)
+        h['pid'] = os.getpid()
+        h['magic'] = MAGIC  # last: subscribers only accept a fully initialised header
+        self.published = 0
+
+    def publish(self, record) -> int:
+        """Publish one record (a tuple in field order or a 0-d record array); returns its sequence number."""
+        seg = self._seg
+        n = int(seg.header['head'])
+        slot = n % seg.capacity
+        seg.seq[slot] = 2 * n + 1  # odd: being written
+        seg.data[slot] = record
+        seg.seq_end[slot] = 2 * n + 2
+        seg.seq[slot] = 2 * n + 2
+        seg.header['head'] = n + 1
+        self.published += 1
+        return n
+
+    def close(self) -> None:
+        if self._seg is None:
+            return
+        self._seg.header['closed'] = 1
+        shm = self._seg.shm
+        self._seg.release()
+        self._seg = None
+        shm.unlink()
+
+    def __enter__(self) -> "ShmPublisher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ShmSubscriber:
+    """Reads every record of channel ``name`` in order.
+
+    By default reading starts with the newest record already published. Pass
+    ``from_start=True`` to begin from the oldest record still in the ring.
+    Creating a subscriber before the publisher exists raises
+    FileNotFoundError.
+    """
+
+    def __init__(self, name: str = BAND_CHANNEL, from_start: bool = False, reattach_after: float = 2.0):
+        self.name = name
+        self.reattach_after = reattach_after
+        self.lost = 0  # records overwritten before this subscriber read them
+        self._seg = _attach(name)
+        self.record = self._seg.record
+        self._instance = int(self._seg.header['instance'])
+        head = int(self._seg.header['head'])
+        self.next = max(0, head - self._seg.capacity) if from_start else max(0, head - 1)
+        self._last_data = time.monotonic()
+
+    def _reattach(self) -> None:
+        try:
+            seg = _attach(self.name)
+        except (FileNotFoundError, ValueError):
+            return
+        if int(seg.header['instance']) == self._instance:
+            seg.release()
+            return
+        # A new publisher: start over with its stream
+        self._seg.release()
+        self._seg = seg
+        self.record = seg.record
+        self._instance = int(seg.header['instance'])
+        self.next = 0
+
+    def _read_slot(self, n: int) -> Optional[np.ndarray]:
+        seg = self._seg
+        slot = n % seg.capacity
+        want = 2 * n + 2
+        if int(seg.seq[slot]) != want:
+            return None
+        rec = seg.data[slot].copy()
+        if int(seg.seq_end[slot]) != want or int(seg.seq[slot]) != want:
+            return None
+        return rec
+
+    def poll(self, max_count: Optional[int] = None) -> List[np.ndarray]:
+        """All records published since the last call (oldest first), without blocking."""
+        seg = self._seg
+        head = int(seg.header['head'])
+        if head == self.next:
+            if seg.header['closed'] or time.monotonic() - self._last_data > self.reattach_after:
+                self._last_data = time.monotonic()
+                self._reattach()
+            return []
+        if head < self.next:  # publisher restarted under the same segment size
+            self.next = 0
+        out = []
+        while self.next < head and (max_count is None or len(out) < max_count):
+            oldest = head - seg.capacity
+            if self.next < oldest:
+                self.lost += oldest - self.next
+                self.next = oldest
+            rec = self._read_slot(self.next)
+            if rec is None:  # overwritten while we were reading: it is lost
+                self.lost += 1
+                head = int(seg.header['head'])
+            else:
+                out.append(rec)
+            self.next += 1
+        self._last_data = time.monotonic()
+        return out
+
+    def wait(self, timeout: Optional[float] = None, poll_interval: float = 0.0005) -> List[np.ndarray]:
+        """Block until at least one new record arrives (or ``timeout`` s pass)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            records = self.poll()
+            if records or (deadline is not None and time.monotonic() >= deadline):
+                return records
+            time.sleep(poll_interval)
+
+    def latest(self) -> Optional[np.ndarray]:
+        """The newest record without consuming anything (None before the first one)."""
+        seg = self._seg
+        if seg.header['closed']:
+            self._reattach()
+            seg = self._seg
+        for _ in range(3):  # retried if the writer laps it mid-copy
+            head = int(seg.header['head'])
+            if head == 0:
+                return None
+            rec = self._read_slot(head - 1)
+            if rec is not None:
+                return rec
+        return None
+
+    def close(self) -> None:
+        if self._seg is not None:
+            self._seg.release()
+            self._seg = None
+
+    def __enter__(self) -> "ShmSubscriber":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def band_record(timestamp: float, powers: Dict[str, float]) -> Tuple:
+    """A BAND_RECORD tuple from a {band: power} dict (missing bands are 0)."""
+    return (timestamp,) + tuple(float(powers.get(b, 0.0)) for b in BAND_KEYS)
+
+
+def band_dict(record: np.ndarray) -> Dict:
+    """The /tmp/latest_eeg_data.json-style dict for a BAND_RECORD."""
+    powers = {b: float(record[f'{b}_power']) for b in ('theta', 'alpha', 'beta', 'gamma')}
+    dominant = max(powers, key=powers.get)
+    out = {'timestamp': float(record['timestamp'])}
+    out.update({f'{b}_power': v for b, v in powers.items()})
+    out['dominant_wave'] = dominant
+    out['command'] = dominant
+    return out
@@ -0,0 +1,272 @@
+"""Hardware-free PiEEG backend: a port of web/src/simulator.ts.
+
+``SimulatedPiEEG16`` reproduces the browser simulator sample for sample: for
+the same seed it gives the same μV values. The mulberry32 stream is a pure
+function of the call index, so whole blocks are generated with NumPy.
+
+``SimulatedDevice`` wraps it behind the ADS1299Array interface. It offers
+``configure``, ``read_raw``, ``read`` and ``close``, and ``.drdy`` stands in
+for the DRDY waiter. The acquisition thread can therefore run unchanged on
+a dev box or in CI. Frames are real 27-byte ADS1299 frames, with the μV
+values quantised to 24-bit codes. Scripted artifacts and dropouts are
+placed on the sample timeline:
+
+* ``Artifact`` adds a blink (half-sine bump), an electrode pop (step that
+  decays) or a burst of broadband noise to some channels;
+* ``Dropout`` either withholds frames entirely (missed DRDY edges, visible as
+  timestamp gaps) or corrupts the chips' status words (rejected frames).
+
+``speed`` paces DRDY at ``speed`` times real time, and a reader that falls
+more than one period behind loses frames exactly as on the chip;
+``speed=None`` free-runs as fast as the consumer reads. Timestamps are always sample time
+(``n / rate``), so a free-running session is fully deterministic.
+"""
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ads1299 import CHANNELS_PER_CHIP, FRAME_BYTES, UV_PER_LSB, config1_for_rate, decode_chained, status_words
+from .device import CONFIG1, DEFAULT_REGISTERS
+
+NCH = 16
+SRATE = 250
+
+# (frequency Hz, amplitude μV); the 10 Hz component follows the alpha burst
+BANDS: Tuple[Tuple[float, float], ...] = (
+    (2.0, 8.0),  # delta
+    (6.0, 6.0),  # theta
+    (10.0, 12.0),  # alpha (modulated by burst)
+    (20.0, 4.0),  # beta
+)
+ALPHA_BURST_PERIOD = 10.0
+NOISE_UV = 3.0
+
+STATUS_OK = (0xC0, 0x00, 0x08)
+STATUS_BAD = (0x00, 0x00, 0x00)
+
+ARTIFACT_SHAPES = ("blink", "pop", "noise")
+DROPOUT_KINDS = ("missing", "bad_status")
+
+
+class Artifact(NamedTuple):
+    """``amplitude`` μV of ``shape`` on ``channels`` (None = all) from ``start`` s."""
+
+    start: float
+    duration: float
+    amplitude: float = 150.0
+    shape: str = "blink"
+    channels: Optional[Sequence[int]] = None
+
+
+class Dropout(NamedTuple):
+    """Frames in [start, start + duration) s are ``missing`` or have a ``bad_status``."""
+
+    start: float
+    duration: float
+    kind: str = "missing"
+
+
+def mulberry32(seed: int, first: int, count: int) -> np.ndarray:
+    """Calls ``first`` .. ``first + count - 1`` of simulator.ts's mulberry32, vectorised."""
+    k = np.arange(first + 1, first + count + 1, dtype=np.uint64)
+    a = ((seed & 0xFFFFFFFF) + k * 0x6D2B79F5).astype(np.uint32)
+    t = (a ^ (a >> 15)) * (a | 1)
+    t = (t + (t ^ (t >> 7)) * (t | 61)) ^ t
+    return (t ^ (t >> 14)).astype(np.float64) / 4294967296.0
+
+
+class SimulatedPiEEG16:
+    """Seeded synthetic EEG in μV, identical to the web simulator for 16 channels."""
+
+    def __init__(self, srate: float = SRATE, seed: int = 1, channels: int = NCH,
+                 bands: Sequence[Tuple[float, float]] = BANDS,
+                 alpha_burst_period: Optional[float] = ALPHA_BURST_PERIOD, noise_uv: float = NOISE_UV,
+                 artifacts: Sequence[Artifact] = ()):
+        for a in artifacts:
+            if a.shape not in ARTIFACT_SHAPES:
+                raise ValueError(f"unknown artifact shape {a.shape!r}, expected one of {ARTIFACT_SHAPES}")
+        self.srate = srate
+        self.seed = seed
+        self.channels = channels
+        self.bands = tuple(bands)
+        self.alpha_burst_period = alpha_burst_period
+        self.noise_uv = noise_uv
+        self.artifacts = tuple(artifacts)
+        self.n = 0
+        self.phase = mulberry32(seed, 0, channels) * 2 * np.pi
+
+    def generate(self, start: int, count: int) -> np.ndarray:
+        """Samples ``start`` .. ``start + count - 1`` as a (count, channels) float64 array."""
+        ch = self.channels
+        idx = np.arange(start, start + count)
+        t = idx / self.srate
+        out = np.zeros((count, ch))
+        if self.alpha_burst_period:
+            alpha_env = 0.5 * (1 + np.sin(2 * np.pi * t / self.alpha_burst_period))
+        else:
+            alpha_env = np.full(count, 0.5)
+        for freq, amp in self.bands:
+            gain = 0.4 + 1.2 * alpha_env if abs(freq - 10.0) < 0.1 else 1.0
+            out += np.reshape(amp * gain, (-1, 1)) * np.sin(2 * np.pi * freq * t[:, None] + self.phase)
+        if self.noise_uv:
+            # Two draws per channel per sample, after the channels' phase draws
+            r = mulberry32(self.seed, ch + 2 * start * ch, 2 * count * ch).reshape(count, ch, 2)
+            u = np.maximum(r[..., 0], 1e-12)
+            out += self.noise_uv * np.sqrt(-2 * np.log(u)) * np.cos(2 * np.pi * r[..., 1])
+        for a in self.artifacts:
+            self._add_artifact(out, t, a)
+        return out
+
+    def _add_artifact(self, out: np.ndarray, t: np.ndarray, a: Artifact) -> None:
+        sel = (t >= a.start) & (t < a.start + a.duration)
+        if not sel.any():
+            return
+        x = (t[sel] - a.start) / a.duration
+        if a.shape == "blink":
+            wave = a.amplitude * np.sin(np.pi * x)
+        elif a.shape == "pop":
+            wave = a.amplitude * np.exp(-5 * x)
+        else:  # noise: deterministic per artifact and sample
+            rng = np.random.default_rng([self.seed, int(a.start * 1000), int(np.flatnonzero(sel)[0])])
+            wave = a.amplitude * rng.standard_normal(x.size)
+        cols = slice(None) if a.channels is None else list(a.channels)
+        out[np.flatnonzero(sel)[:, None], np.arange(self.channels)[cols]] += wave[:, None]
+
+    def read_chunk(self, count: int) -> np.ndarray:
+        """The next ``count`` samples, like ``readChunk`` in simulator.ts."""
+        out = self.generate(self.n, count)
+        self.n += count
+        return out
+
+    def read_sample(self) -> np.ndarray:
+        return self.read_chunk(1)[0]
+
+
+class SimulatedDrdy:
+    """DRDY waiter for a SimulatedDevice: paced at ``speed`` x real time or free-running."""
+
+    mode = "sim"
+
+    def __init__(self, device: "SimulatedDevice"):
+        self.device = device
+        self.line = None
+        self.last_skipped = 0  # overwritten frames show up as timestamp gaps instead
+        self._wall0: Optional[float] = None
+
+    def wait(self, timeout: Optional[float] = 1.0) -> Optional[float]:
+        dev = self.device
+        n = dev._next_delivered()
+        if dev.speed is not None:
+            period = 1.0 / (dev.rate * dev.speed)
+            if self._wall0 is None:
+                self._wall0 = time.monotonic() - n * period
+            latest = int((time.monotonic() - self._wall0) / period)
+            if latest > n:
+                # Like the ADS1299, a frame not read before the next DRDY is overwritten.
+                dev._current = latest - 1
+                n = dev._next_delivered()
+            delay = self._wall0 + n * period - time.monotonic()
+            if timeout is not None and delay > timeout:
+                time.sleep(timeout)
+                return None
+            if delay > 0:
+                time.sleep(delay)
+        dev._current = n
+        return n / dev.rate
+
+
+class SimulatedDevice:
+    """Drop-in replacement for ADS1299Array backed by SimulatedPiEEG16."""
+
+    def __init__(self, chips: int = 2, rate: int = SRATE, seed: int = 1, speed: Optional[float] = 1.0,
+                 artifacts: Sequence[Artifact] = (), dropouts: Sequence[Dropout] = (),
+                 chunk: int = 256, **signal):
+        for d in dropouts:
+            if d.kind not in DROPOUT_KINDS:
+                raise ValueError(f"unknown dropout kind {d.kind!r}, expected one of {DROPOUT_KINDS}")
+        self.chips = chips
+        self.channels = CHANNELS_PER_CHIP * chips
+        self.speed = speed
+        self.seed = seed
+        self.dropouts = tuple(dropouts)
+        self.registers: List[Dict[int, int]] = [{} for _ in range(chips)]
+        self._signal = dict(signal, artifacts=artifacts)
+        self._chunk = chunk
+        self.drdy = SimulatedDrdy(self)
+        self.configure(rate)
+
+    def configure(self, rate: Optional[int] = None,
+                  registers: Sequence[Tuple[int, int]] = DEFAULT_REGISTERS) -> None:
+        """Record the register table like the hardware would and restart at sample 0."""
+        rate = rate or getattr(self, "rate", SRATE)
+        for reg, value in registers:
+            value = config1_for_rate(rate) if reg == CONFIG1 else value
+            for regs in self.registers:
+                regs[reg] = value
+        self.rate = rate
+        self.sim = SimulatedPiEEG16(rate, self.seed, self.channels, **self._signal)
+        self._current = -1
+        self._frames_start = 0
+        self._frames = np.empty((0, FRAME_BYTES * self.chips), dtype=np.uint8)
+
+    def _in_dropout(self, n: int, kind: str) -> bool:
+        t = n / self.rate
+        return any(d.kind == kind and d.start <= t < d.start + d.duration for d in self.dropouts)
+
+    def _next_delivered(self) -> int:
+        n = self._current + 1
+        while self._in_dropout(n, "missing"):
+            n += 1
+        return n
+
+    def frames(self, start: int, count: int) -> np.ndarray:
+        """Raw frames for samples ``start`` .. as (count, 27 * chips) uint8."""
+        counts = np.clip(np.rint(self.sim.generate(start, count) / UV_PER_LSB), -(1 << 23), (1 << 23) - 1)
+        words = counts.astype(">i4").view(np.uint8).reshape(count, self.chips, CHANNELS_PER_CHIP, 4)[..., 1:]
+        raw = np.empty((count, self.chips, FRAME_BYTES), dtype=np.uint8)
+        raw[:, :, :3] = STATUS_OK
+        raw[:, :, 3:] = words.reshape(count, self.chips, -1)
+        if any(d.kind == "bad_status" for d in self.dropouts):
+            bad = [self._in_dropout(n, "bad_status") for n in range(start, start + count)]
+            raw[np.array(bad, dtype=bool), :, :3] = STATUS_BAD
+        return raw.reshape(count, -1)
+
+    def read_raw(self) -> np.ndarray:
+        """Frames of the DRDY last signalled by ``drdy.wait`` (27 * chips bytes)."""
+        n = max(self._current, 0)
+        offset = n - self._frames_start
+        if not 0 <= offset < len(self._frames):
+            self._frames_start = n
+            self._frames = self.frames(n, self._chunk)
+            offset = 0
+        return self._frames[offset]
+
+    def read(self) -> Tuple[np.ndarray, np.ndarray]:
+        raw = self.read_raw()
+        return decode_chained(raw, self.chips)[0], status_words(raw)
+
+    def read_block(self, count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The next ``count`` delivered samples at once, without pacing.
+
+        Returns (μV float32 (k, channels), timestamps (k,), status uint32
+        (k, chips)); ``k < count`` when part of the span is a missing dropout.
+        """
+        start = self._current + 1
+        raw = self.frames(start, count)
+        idx = np.arange(start, start + count)
+        keep = np.array([not self._in_dropout(n, "missing") for n in idx], dtype=bool) \
+            if self.dropouts else np.ones(count, dtype=bool)
+        self._current = start + count - 1
+        raw = raw[keep]
+        return (decode_chained(raw, self.chips), idx[keep] / self.rate,
+                status_words(raw).reshape(-1, self.chips))
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "SimulatedDevice":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,65 @@
+"""Throughput accounting for the processing loop.
+
+Tracks how many samples/windows the consumer handled, how long it was busy
+and how much CPU the whole process used over each reporting period, so a
+headless run can print a one-line summary every few seconds.
+"""
+import time
+from typing import Dict
+
+
+class ThroughputStats:
+    """Rolling per-period throughput and CPU figures."""
+
+    def __init__(self, interval: float = 10.0):
+        self.interval = interval
+        self.started = time.monotonic()
+        self.total_samples = 0
+        self.total_windows = 0
+        self._begin_period(self.started)
+
+    def _begin_period(self, now: float) -> None:
+        self._period_start = now
+        self._period_cpu = time.process_time()
+        self._samples = 0
+        self._windows = 0
+        self._busy = 0.0
+        self._busy_max = 0.0
+
+    def add(self, samples: int, busy_s: float) -> None:
+        """Record one processed window of ``samples`` that took ``busy_s`` seconds."""
+        self._samples += samples
+        self._windows += 1
+        self._busy += busy_s
+        self._busy_max = max(self._busy_max, busy_s)
+        self.total_samples += samples
+        self.total_windows += 1
+
+    def due(self) -> bool:
+        return time.monotonic() - self._period_start >= self.interval
+
+    def summary(self, reset: bool = True) -> Dict[str, float]:
+        now = time.monotonic()
+        wall = max(now - self._period_start, 1e-9)
+        out = {
+            'period_s': wall,
+            'samples_per_s': self._samples / wall,
+            'windows': self._windows,
+            'busy_ms_mean': 1000 * self._busy / self._windows if self._windows else 0.0,
+            'busy_ms_max': 1000 * self._busy_max,
+            'cpu_percent': 100 * (time.process_time() - self._period_cpu) / wall,
+            'uptime_s': now - self.started,
+            'total_samples': self.total_samples,
+        }
+        if reset:
+            self._begin_period(now)
+        return out
+
+    def format(self, reset: bool = True) -> str:
+        return self.format_summary(self.summary(reset))
+
+    @staticmethod
+    def format_summary(s: Dict[str, float]) -> str:
+        return (f"📈 {s['samples_per_s']:.1f} SPS | {s['windows']} windows in {s['period_s']:.1f}s | "
+                f"processing {s['busy_ms_mean']:.2f} ms/window (max {s['busy_ms_max']:.2f}) | "
+                f"CPU {s['cpu_percent']:.1f}% | total {s['total_samples']} samples")
@@ -0,0 +1,165 @@
+"""Importable acquisition API: open a device, get NumPy blocks.
+
+    from pieeg import open_device
+
+    with open_device("sim", rate=250) as stream:      # or "ads1299" on the Pi
+        for block in stream:                           # (25, 16) float32 μV
+            process(block.data, block.timestamps)
+
+``open_device`` opens the backend, writes the registers, and starts the
+reader thread that fills a SampleRing. The returned EEGStream hands out
+fixed-size blocks, either by iterating or with ``read``. ``read_available``
+never blocks. ``reader()`` gives extra independent consumers, for example a
+recorder or a display running at a different hop. Closing the stream, or
+leaving the ``with`` block, stops the thread and releases the SPI and GPIO
+resources.
+"""
+import time
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .acquire import AcquisitionThread
+from .ads1299 import decode_chained, status_words
+from .device import PIEEG16, ADS1299Array, parse_ports
+from .drdy import request_drdy
+from .health import AcquisitionHealth
+from .ring import RingReader, SampleRing
+from .simulator import SimulatedDevice
+
+BACKENDS = ("ads1299", "sim")
+
+DRDY_PIN = 26
+
+
+class Block(NamedTuple):
+    data: np.ndarray  # (n, channels) float32 μV
+    timestamps: np.ndarray  # (n,) seconds
+
+
+class EEGStream:
+    """A running acquisition: device + reader thread + ring buffer."""
+
+    def __init__(self, device, drdy, rate: int, block_size: Optional[int] = None,
+                 ring_seconds: float = 10.0, release: Sequence = ()):
+        self.device = device
+        self.drdy = drdy
+        self.rate = rate
+        self.channels = device.channels
+        self.chips = device.chips
+        self.block_size = block_size or max(1, rate // 10)
+        self.health = AcquisitionHealth(sample_rate=rate, chips=device.chips)
+        self.ring = SampleRing(capacity=int(rate * ring_seconds), channels=device.channels,
+                               status_words=device.chips)
+        self.thread = AcquisitionThread(drdy, self._read_sample, self.ring, health=self.health)
+        self.closed = False
+        self._reader = self.ring.reader()
+        self._release: List = list(release)  # e.g. the DRDY line, released on close
+
+    def _read_sample(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        health = self.health
+        with health.stage('spi'):
+            raw = self.device.read_raw()
+        status = status_words(raw)
+        if not health.check_status(status):
+            return None
+        with health.stage('decode'):
+            return decode_chained(raw, self.chips)[0], status
+
+    def start(self) -> "EEGStream":
+        self.thread.start()
+        return self
+
+    def reader(self, start: Optional[int] = None) -> RingReader:
+        """An independent consumer position (default: from the newest sample)."""
+        return self.ring.reader(start)
+
+    def raise_if_failed(self) -> None:
+        """Re-raise an exception that ended the reader thread, if any."""
+        if self.thread.error is not None:
+            raise self.thread.error
+
+    def _wait_for(self, count: int, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._reader.available < count:
+            self.raise_if_failed()
+            if self.closed or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            time.sleep(0.002)
+        return True
+
+    def read(self, count: Optional[int] = None, timeout: Optional[float] = None) -> Block:
+        """Wait for ``count`` (default ``block_size``) samples; shorter on timeout."""
+        count = count or self.block_size
+        self._wait_for(count, timeout)
+        return Block(*self._reader.read_available(count))
+
+    def read_available(self, max_count: Optional[int] = None) -> Block:
+        """Everything acquired since the last read, without blocking."""
+        self.raise_if_failed()
+        return Block(*self._reader.read_available(max_count))
+
+    @property
+    def overruns(self) -> int:
+        """Samples the stream's own consumer lost by reading too slowly."""
+        return self._reader.overruns
+
+    def blocks(self, timeout: Optional[float] = None) -> Iterator[Block]:
+        """Yield full ``block_size`` blocks until closed; TimeoutError if none arrives in ``timeout`` s."""
+        while not self.closed:
+            if not self._wait_for(self.block_size, timeout):
+                if self.closed:
+                    return
+                raise TimeoutError(f"no {self.block_size}-sample block within {timeout} s "
+                                   f"(rejected frames: {self.thread.rejected}, DRDY timeouts: {self.thread.timeouts})")
+            yield Block(*self._reader.read_available(self.block_size))
+
+    def __iter__(self) -> Iterator[Block]:
+        return self.blocks()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.thread.stop()
+        for resource in self._release:
+            resource.release()
+        self.device.close()
+
+    def __enter__(self) -> "EEGStream":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_device(backend: str = "ads1299", rate: int = 250, spi: str = PIEEG16, drdy: str = "edge",
+                drdy_pin: int = DRDY_PIN, gpio_chip: str = "0", block_size: Optional[int] = None,
+                ring_seconds: float = 10.0, sim_speed: Optional[float] = 1.0, **sim_options) -> EEGStream:
+    """Open, configure and start ``backend`` at ``rate`` SPS; returns a running EEGStream.
+
+    ``spi`` describes the chips (see pieeg.device.parse_ports). ``sim_speed``
+    and ``sim_options`` (seed, artifacts, dropouts, ...) apply to the ``sim``
+    backend. Hardware errors from gpiod/spidev propagate as OSError.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}, expected one of {BACKENDS}")
+    ports = parse_ports(spi)
+    if backend == "sim":
+        device = SimulatedDevice(chips=sum(p.chips for p in ports), rate=rate, speed=sim_speed, **sim_options)
+        return EEGStream(device, device.drdy, rate, block_size, ring_seconds).start()
+
+    import gpiod
+
+    chip = gpiod.chip(gpio_chip)
+    device = ADS1299Array(ports, gpio_chip=chip)
+    waiter = None
+    try:
+        waiter = request_drdy(chip, drdy_pin, drdy, consumer="Button")
+        device.configure(rate=rate)
+    except BaseException:
+        if waiter is not None:
+            waiter.line.release()
+        device.close()
+        raise
+    return EEGStream(device, waiter, rate, block_size, ring_seconds, release=[waiter.line]).start()
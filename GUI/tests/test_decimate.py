@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from pieeg.decimate import Decimator, decimate_indices, decimate_records
+
+
+def _signal(n, channels=3, seed=0):
+    x = np.random.default_rng(seed).normal(size=(n, channels)).astype(np.float32)
+    x[n // 3, 0] = 50.0  # a blink between stride points
+    x[n // 2, 1] = -50.0
+    return x
+
+
+def _stream(dec, x, sizes):
+    out, i = [], 0
+    while i < len(x):
+        n = sizes[len(out) % len(sizes)]
+        out.append(dec.process(x[i:i + n]))
+        i += n
+    return np.concatenate(out)
+
+
+@pytest.mark.parametrize("mode", ["m4", "lttb", "stride"])
+def test_output_does_not_depend_on_block_sizes(mode):
+    x = _signal(1000)
+    whole = Decimator(250, 50, 3, mode).process(x)
+    split = _stream(Decimator(250, 50, 3, mode), x, [1, 7, 64, 3, 250])
+    np.testing.assert_array_equal(whole, split)
+
+
+def test_m4_bounds_and_peaks():
+    x = _signal(1000)
+    dec = Decimator(250, 40, 3, "m4")
+    assert dec.bucket == 25 and dec.rate == 40
+    out = dec.process(x)
+    assert out.shape == (4 * 40, 3)
+    buckets = x.reshape(40, 25, 3)
+    points = out.reshape(40, 4, 3)
+    np.testing.assert_array_equal(points[:, 0], buckets[:, 0])
+    np.testing.assert_array_equal(points[:, 3], buckets[:, -1])
+    np.testing.assert_array_equal(points[:, 1:3].min(axis=1), buckets.min(axis=1))
+    np.testing.assert_array_equal(points[:, 1:3].max(axis=1), buckets.max(axis=1))
+    assert out[:, 0].max() == 50.0 and out[:, 1].min() == -50.0
+
+
+def test_lttb_points_stay_in_their_bucket():
+    x = _signal(1000)
+    dec = Decimator(250, 10, 3, "lttb")
+    out = dec.process(x)
+    assert len(out) == 1000 // dec.bucket - 1  # the last bucket waits for its successor
+    buckets = x.reshape(-1, dec.bucket, 3)[:len(out)]
+    for b, point in zip(buckets, out):
+        assert ((b == point).any(axis=0)).all()
+    assert out[:, 0].max() == 50.0 and out[:, 1].min() == -50.0
+
+
+def test_passthrough_when_buckets_would_add_points():
+    dec = Decimator(250, 500, 2, "m4")
+    x = _signal(10, channels=2)
+    assert dec.passthrough and dec.rate == 250
+    np.testing.assert_array_equal(dec.process(x), x)
+
+
+@pytest.mark.parametrize("mode", ["lttb", "m4", "stride"])
+def test_indices_are_sorted_in_range_and_keep_the_ends(mode):
+    y = _signal(5000, channels=4)
+    idx = decimate_indices(y, 100, mode)
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert (np.diff(idx) > 0).all()
+    assert len(idx) <= (100 // 4) * (2 + 2 * 4) + 2 if mode == "m4" else len(idx) <= 100
+    if mode != "stride":
+        assert 5000 // 3 in idx and 5000 // 2 in idx  # both spikes survive
+
+
+def test_lttb_keeps_exactly_points():
+    assert len(decimate_indices(_signal(5000), 100, "lttb")) == 100
+    assert decimate_indices(_signal(50), 100).tolist() == list(range(50))
+
+
+def test_decimate_records():
+    records = [{'theta_power': float(i % 10), 'n': i} for i in range(300)]
+    kept = decimate_records(records, 30)
+    assert len(kept) == 30
+    assert kept[0]['n'] == 0 and kept[-1]['n'] == 299
+    with pytest.raises(ValueError):
+        decimate_indices(np.zeros(10), 5, "bogus")
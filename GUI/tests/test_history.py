@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from pieeg.history import BandHistory
+
+
+def _reading(i, **extra):
+    return dict({'theta_power': float(i), 'alpha_power': 0.5, 'beta_power': 0.0, 'gamma_power': 0.0,
+                 'timestamp': 1000.0 + i}, **extra)
+
+
+def test_newest_readings_across_the_wrap():
+    history = BandHistory(5)
+    for i in range(12):
+        history.append(_reading(i))
+    assert len(history) == 5
+    assert history.oldest == 7
+    first, segments = history.views()
+    assert first == 7
+    assert [len(s[0]) for s in segments] == [3, 2]  # slots 2..4, then 0..1
+    ts, powers, _ = history.columns()
+    assert ts.tolist() == [1007.0, 1008.0, 1009.0, 1010.0, 1011.0]
+    assert [r['theta_power'] for r in history.records(2)] == [10.0, 11.0]
+    assert history.latest()['timestamp'] == 1011.0
+
+
+def test_since_an_overwritten_index_starts_at_the_oldest():
+    history = BandHistory(4)
+    for i in range(10):
+        history.append(_reading(i))
+    assert [r['theta_power'] for r in history.records(since=2)] == [6.0, 7.0, 8.0, 9.0]
+    assert [r['theta_power'] for r in history.records(since=8)] == [8.0, 9.0]
+    assert history.records(since=10) == []
+
+
+def test_dominant_and_timestamp_fallbacks():
+    history = BandHistory(3)
+    history.append({'theta_power': 1.0, 'gamma_power': 3.0, 'timestamp': '2024-01-01T00:00:00'}, ts=42.0)
+    history.append({'theta_power': 1.0, 'dominant_wave': 'theta'}, ts=43.0)
+    records = history.records()
+    assert [r['dominant_wave'] for r in records] == ['gamma', 'theta']
+    assert [r['timestamp'] for r in records] == [42.0, 43.0]
+
+
+def test_grow_keeps_every_reading():
+    history = BandHistory(2, grow=True)
+    for i in range(9):
+        history.append(_reading(i))
+    assert history.capacity == 16
+    assert [r['theta_power'] for r in history.records()] == [float(i) for i in range(9)]
+
+
+def test_per_channel_columns():
+    history = BandHistory(3)
+    history.append(_reading(0))
+    history.append(_reading(1, bands_per_ch={'theta': [1.0, 2.0], 'alpha': [3.0, 4.0]}))
+    history.append(_reading(2))
+    per_ch = history.channel_columns()
+    assert per_ch.shape == (3, 4, 2)
+    assert per_ch[1, 0].tolist() == [1.0, 2.0]
+    assert not per_ch[2].any()  # a reading without them is zeros, not the previous reading's
+
+
+def test_stats_match_numpy():
+    history = BandHistory(8)
+    for i in range(20):
+        history.append(_reading(i))
+    stats = history.stats()
+    theta = np.arange(12.0, 20.0)
+    assert stats['theta']['mean'] == pytest.approx(theta.mean())
+    assert stats['theta']['std'] == pytest.approx(theta.std())
+    assert (stats['theta']['min'], stats['theta']['max']) == (12.0, 19.0)
+    assert stats['dominant_wave'] == 'theta'
+    assert BandHistory(2).stats() == {}
+
+
+def test_decimated_records_keep_the_ends():
+    history = BandHistory(1000)
+    for i in range(1000):
+        history.append(_reading(i % 37, timestamp=1000.0 + i))
+    records = history.records(points=50)
+    assert len(records) == 50
+    assert records[0]['timestamp'] == 1000.0 and records[-1]['timestamp'] == 1999.0
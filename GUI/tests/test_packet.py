@@ -0,0 +1,53 @@
+import pytest
+
+from pieeg.packet import (PACKET_SIZE, ControlPacket, PacketEncoder, decode, decode_any, encode, pack_many,
+                          seq_newer, unpack_many)
+
+
+def test_round_trip():
+    buf = encode(0x1_0005, 2.5, {'theta': 1.0, 'gamma': 4.0}, t_us=0x1_0000_0007)
+    assert len(buf) == PACKET_SIZE
+    p = decode(buf)
+    assert (p.seq, p.t_us, p.value, p.theta, p.gamma) == (5, 7, 2.5, 1.0, 4.0)
+
+
+def test_legacy_ascii_and_bad_packets():
+    assert decode_any(b"2.35\n").value == pytest.approx(2.35)
+    assert decode_any(b"2.35").seq is None
+    with pytest.raises(ValueError):
+        decode(b"\xe5" + bytes(PACKET_SIZE - 2))
+    with pytest.raises(ValueError):
+        encode(0, 1.0, [1.0, 2.0])
+
+
+def test_pack_many_round_trip():
+    packets = [ControlPacket(i, 1000 * i, float(i), 0.0, 1.0, 2.0, 3.0, 4.0) for i in range(3)]
+    assert unpack_many(pack_many(packets)) == packets
+
+
+def test_encoder_wraps_the_sequence_number():
+    enc = PacketEncoder(0xFFFE)
+    assert [decode(enc.encode(1.0)).seq for _ in range(3)] == [0xFFFE, 0xFFFF, 0]
+
+
+@pytest.mark.parametrize("seq, last, newer", [
+    (1, 0, True),
+    (0, 0xFFFF, True),  # wrapped forward
+    (0x7FFF, 0, True),
+    (0, 0, False),  # duplicate
+    (0xFFFF, 0, False),  # one behind across the wrap
+    (0, 200, False),  # late, within the restart window
+    (0, 257, True),  # too far back: the sender restarted
+    (0xFF00, 0x10, True),
+])
+def test_seq_newer(seq, last, newer):
+    assert seq_newer(seq, last) is newer
+
+
+def test_seq_newer_uses_sender_time_to_tell_restarts_from_late_packets():
+    # Within the restart window, only a later sender time means a restart
+    assert seq_newer(990, 1000, t_us=2000, last_t_us=1000)
+    assert not seq_newer(990, 1000, t_us=500, last_t_us=1000)
+    # ... compared mod 2^32, across the ~71 min wrap of t_us
+    assert seq_newer(990, 1000, t_us=5, last_t_us=0xFFFF_FFF0)
+    assert not seq_newer(990, 1000, t_us=0xFFFF_FFF0, last_t_us=5)
@@ -0,0 +1,86 @@
+import numpy as np
+
+from pieeg.ring import SampleRing
+
+
+def _samples(start, n, channels=2):
+    return np.arange(start, start + n, dtype=np.float32)[:, None].repeat(channels, axis=1)
+
+
+class _Lapping(np.ndarray):
+    """Runs ``hook`` once, the next time the array is sliced (i.e. mid-copy in SampleRing.read)."""
+
+    hook = None
+
+    def __getitem__(self, key):
+        out = super().__getitem__(key)
+        hook, self.hook = self.hook, None
+        if hook is not None:
+            hook()
+        return out
+
+
+def test_absolute_indices_across_wraparound():
+    ring = SampleRing(8, channels=2)
+    ring.extend(_samples(0, 6), np.arange(6.0))
+    ring.extend(_samples(6, 7), np.arange(6.0, 13.0))
+    assert ring.head == 13
+    assert ring.oldest == 6  # one slot held back for the writer
+    data, ts, first = ring.read(6, 100)
+    assert first == 6
+    assert data[:, 0].tolist() == list(range(6, 13))
+    assert ts.tolist() == list(range(6, 13))
+
+
+def test_extend_larger_than_capacity_keeps_newest():
+    ring = SampleRing(4, channels=2)
+    ring.extend(_samples(0, 10), np.arange(10.0))
+    assert ring.head == 10
+    data, _, first = ring.read(0, 10)
+    assert first == ring.oldest == 7
+    assert data[:, 0].tolist() == [7, 8, 9]
+
+
+def test_reader_counts_overruns():
+    ring = SampleRing(8, channels=2)
+    reader = ring.reader()
+    ring.extend(_samples(0, 20), np.arange(20.0))
+    data, _ = reader.read_available()
+    assert data[:, 0].tolist() == list(range(13, 20))
+    assert reader.overruns == 13
+    assert reader.index == 20
+    assert reader.available == 0
+
+
+def test_views_split_at_the_end_of_the_buffer():
+    ring = SampleRing(8, channels=2)
+    ring.extend(_samples(0, 12), np.arange(12.0))
+    first, segments = ring.views(6, 100)
+    assert first == 6
+    assert len(segments) == 2
+    assert np.concatenate([s[0][:, 0] for s in segments]).tolist() == list(range(6, 12))
+
+
+def test_read_drops_samples_lapped_during_the_copy():
+    ring = SampleRing(8, channels=2)
+    ring.extend(_samples(0, 6), np.arange(6.0))
+    lapping = ring.timestamps.view(_Lapping)
+    ring.timestamps = lapping
+    lapping.hook = lambda: ring.extend(_samples(6, 4), np.arange(6.0, 10.0))
+    data, ts, first = ring.read(0, 6)
+    # 0..2 may have been overwritten mid-copy: only 3..5 are returned
+    assert first == 3
+    assert data[:, 0].tolist() == [3, 4, 5]
+    assert ts.tolist() == [3, 4, 5]
+
+
+def test_peek_advance_reports_torn_samples():
+    ring = SampleRing(8, channels=2)
+    reader = ring.reader(0)
+    ring.extend(_samples(0, 6), np.arange(6.0))
+    first, segments = reader.peek()
+    assert first == 0 and sum(len(s[0]) for s in segments) == 6
+    ring.extend(_samples(6, 4), np.arange(6.0, 10.0))  # the writer laps the views
+    assert reader.advance(first, 6) == 3
+    assert reader.overruns == 3
+    assert reader.index == 6
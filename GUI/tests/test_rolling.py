@@ -0,0 +1,78 @@
+import threading
+
+import numpy as np
+import pytest
+
+from pieeg.rolling import BandStats, RollingStats
+
+
+def _check(stats, window):
+    window = np.asarray(window)
+    assert stats.count == len(window)
+    np.testing.assert_allclose(stats.mean(), window.mean(axis=0), atol=1e-9)
+    np.testing.assert_allclose(stats.std(), window.std(axis=0), atol=1e-9)
+    np.testing.assert_array_equal(stats.min(), window.min(axis=0))
+    np.testing.assert_array_equal(stats.max(), window.max(axis=0))
+
+
+def test_count_window_matches_numpy():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=(500, 3))
+    stats = RollingStats(3, size=50)
+    for i, row in enumerate(values):
+        stats.push(row, ts=i)
+        _check(stats, values[max(0, i - 49):i + 1])
+
+
+def test_time_window_and_expire():
+    stats = RollingStats(1, seconds=10)
+    for t in range(30):
+        stats.push([float(t % 7)], ts=float(t))
+    _check(stats, [[float(t % 7)] for t in range(19, 30)])  # ts >= 29 - 10
+    stats.expire(now=35.0)
+    _check(stats, [[float(t % 7)] for t in range(25, 30)])
+    stats.expire(now=100.0)
+    assert stats.count == 0
+    assert stats.mean().tolist() == [0.0] and stats.var().tolist() == [0.0]
+
+
+def test_monotonic_min_max_deques():
+    stats = RollingStats(1, size=3)
+    for v in [5, 1, 4, 2, 8, 3, 3, 0]:
+        stats.push([v], ts=0)
+    _check(stats, [[3], [3], [0]])
+
+
+def test_band_stats_summary():
+    records = [{'theta_power': t, 'alpha_power': 2 * t, 'beta_power': 0.0, 'gamma_power': None} for t in range(5)]
+    summary = BandStats.of(records).summary()
+    assert summary['theta'] == {'mean': 2.0, 'std': pytest.approx(np.std(range(5))), 'min': 0.0, 'max': 4.0}
+    assert summary['gamma']['max'] == 0.0
+    assert summary['dominant_wave'] == 'alpha'
+    assert BandStats(size=3).summary() == {}
+
+
+def test_summary_while_another_thread_pushes():
+    stats = BandStats(seconds=0.005)
+    errors = []
+    done = threading.Event()
+
+    def query():
+        while not done.is_set():
+            try:
+                stats.summary()
+                stats.expire()
+            except Exception as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=query)
+    reader.start()
+    rng = np.random.default_rng(2)
+    for v in rng.random(50000):
+        stats.push_record({'theta_power': v})
+    done.set()
+    reader.join()
+    assert errors == []
+    window = np.array([values for _, _, values in stats._window])
+    if len(window):
+        _check(stats, window)
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+import uuid
+
+import numpy as np
+import pytest
+
+from pieeg.shm import BAND_RECORD, ShmPublisher, ShmSubscriber, band_dict, band_record
+
+GUI = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def name():
+    return f"pieeg_test_{uuid.uuid4().hex[:8]}"
+
+
+def _record(i):
+    return band_record(float(i), {'theta': i})
+
+
+def _publisher_process(name, body):
+    """Run a publisher of ``name`` in another process: ``body`` follows ``p = ShmPublisher(name)``.
+
+    The segment is taken off the child's resource tracker, so it outlives the
+    child like after a power cut or a killed process group.
+    """
+    code = (f"import os, time\nfrom multiprocessing import resource_tracker\nfrom pieeg.shm import ShmPublisher\n"
+            f"p = ShmPublisher({name!r})\nresource_tracker.unregister(p._seg.shm._name, 'shared_memory')\n{body}")
+    return subprocess.Popen([sys.executable, '-c', code], cwd=GUI, stdout=subprocess.PIPE, text=True)
+
+
+def test_every_record_in_order(name):
+    with ShmPublisher(name, capacity=8) as pub:
+        sub = ShmSubscriber(name, from_start=True)
+        for i in range(20):  # wraps the ring, read as it goes
+            pub.publish(_record(i))
+            if i % 3 == 2:
+                assert [int(r['timestamp']) for r in sub.poll()] == list(range(i - 2, i + 1))
+        assert [int(r['timestamp']) for r in sub.poll()] == [18, 19]
+        assert sub.lost == 0
+        assert band_dict(sub.latest())['theta_power'] == 19.0
+        sub.close()
+
+
+def test_subscriber_that_falls_behind_counts_lost_records(name):
+    with ShmPublisher(name, capacity=8) as pub:
+        pub.publish(_record(0))
+        sub = ShmSubscriber(name)  # starts with the newest record
+        for i in range(1, 20):
+            pub.publish(_record(i))
+        got = [int(r['timestamp']) for r in sub.poll()]
+        assert got == list(range(12, 20))
+        assert sub.lost == 12
+        sub.close()
+
+
+def test_slot_being_written_is_not_read(name):
+    with ShmPublisher(name, capacity=8) as pub:
+        sub = ShmSubscriber(name, from_start=True)
+        for i in range(3):
+            pub.publish(_record(i))
+        pub._seg.seq[1] += 1  # odd: the writer is in the middle of slot 1
+        assert [int(r['timestamp']) for r in sub.poll()] == [0, 2]
+        assert sub.lost == 1
+        sub.close()
+
+
+def test_takes_over_a_closed_channel(name):
+    ShmPublisher(name).close()
+    with ShmPublisher(name) as pub:
+        assert pub.publish(_record(0)) == 0
+
+
+def test_takes_over_the_channel_of_a_dead_publisher(name):
+    proc = _publisher_process(name, "p.publish((1.0,) + (0.0,) * 5)\nos._exit(0)")  # no close(): left behind
+    proc.communicate(timeout=30)
+    with ShmPublisher(name) as pub:
+        sub = ShmSubscriber(name, from_start=True)
+        assert sub.poll() == []
+        pub.publish(_record(7))
+        assert [int(r['timestamp']) for r in sub.poll()] == [7]
+        sub.close()
+
+
+def test_refuses_the_channel_of_a_live_publisher(name):
+    proc = _publisher_process(name, "print('ready', flush=True)\ntime.sleep(60)")
+    try:
+        assert proc.stdout.readline().strip() == 'ready'
+        with pytest.raises(FileExistsError, match=f"process {proc.pid}"):
+            ShmPublisher(name)
+        sub = ShmSubscriber(name)  # the live channel is untouched
+        assert sub.record == np.dtype(BAND_RECORD)
+        sub.close()
+    finally:
+        proc.kill()
+        proc.wait()
+        try:
+            ShmPublisher(name).close()  # clean up the killed publisher's segment
+        except FileExistsError:
+            pass
@@ -2,6 +2,7 @@
 #include <FastLED.h>
 #include <WiFi.h>
 #include <WiFiUdp.h>
+#include "eeg_packet.hpp"
 #include "flight_control.hpp"
 #include "led.hpp"
 
@@ -20,6 +21,7 @@ static const char* eeg_password = WIFI_PASSWORD;
 WiFiUDP udp;
 const int UDP_PORT = 4210;
 char packetBuffer[255];
+EegPacketTracker eegTracker = {};  // seqによる順序・欠落の追跡
 
 // EEG制御変数
 static float eeg_current_value = 0.0f;
@@ -145,12 +147,10 @@ void loop() {
     if (packetSize) {
         packetCount++;
         
-        int len = udp.read(packetBuffer, 255);
-        if (len > 0) {
-            packetBuffer[len] = 0;
-        }
-        
-        float newEegValue = atof(packetBuffer);
+        int len = udp.read(packetBuffer, sizeof(packetBuffer));
+        EegPacket pkt;
+        // バイナリ(32B)/旧ASCIIを自動判別。解析できない・古い（seqが戻った）パケットは範囲外の値にして捨てる
+        float newEegValue = eeg_packet_receive(packetBuffer, len, &eegTracker, &pkt) ? pkt.value : -1.0f;
         
         if (newEegValue >= 0.0f && newEegValue <= 10.0f) { // 妥当性チェック
             eeg_current_value = newEegValue;
@@ -178,8 +178,10 @@ void loop() {
             // LED更新
             updateEEGLED(eeg_current_value);
             
-            Serial.printf("EEG: %.2f -> Yaw Rate: %.2f rad/s, Thrust: %.2f\r\n", 
-                         eeg_current_value, yaw_rate, thrust);
+            Serial.printf("EEG: %.2f -> Yaw Rate: %.2f rad/s, Thrust: %.2f (seq %u, +%lu us, lost %lu)\r\n", 
+                         eeg_current_value, yaw_rate, thrust, pkt.seq,
+                         (unsigned long)eeg_packet_delay_us(&eegTracker, &pkt, micros()),
+                         (unsigned long)eegTracker.lost);
         }
     }
     
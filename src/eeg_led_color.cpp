@@ -1,5 +1,6 @@
 #include <WiFi.h>
 #include <WiFiUdp.h>
+#include "eeg_packet.hpp"
 
 // WiFi設定（.envから読み込み）
 #ifndef WIFI_SSID
@@ -16,6 +17,7 @@ const char* password = WIFI_PASSWORD;
 WiFiUDP udp;
 const int UDP_PORT = 4210;
 char packetBuffer[255];
+EegPacketTracker eegTracker = {};  // seqによる順序・欠落の追跡
 
 // M5Stamp S3のRGB LED設定
 const int RED_PIN = 2;
@@ -156,12 +158,14 @@ void loop() {
   if (packetSize) {
     packetCount++;
     
-    int len = udp.read(packetBuffer, 255);
-    if (len > 0) {
-      packetBuffer[len] = 0;
+    int len = udp.read(packetBuffer, sizeof(packetBuffer));
+    EegPacket pkt;
+    // バイナリ(32B)/旧ASCIIを自動判別。解析できない・古い（seqが戻った）パケットは無視
+    if (!eeg_packet_receive(packetBuffer, len, &eegTracker, &pkt)) {
+      return;
     }
-    
-    targetEEG = atof(packetBuffer);
+
+    targetEEG = pkt.value;
     hasNewEEG = true;
     
     Serial.print("New EEG Value: ");
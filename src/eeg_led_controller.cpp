@@ -1,5 +1,6 @@
 #include <WiFi.h>
 #include <WiFiUdp.h>
+#include "eeg_packet.hpp"
 #include <FastLED.h>
 
 // WiFi設定（.envから読み込み）
@@ -17,6 +18,7 @@ const char* password = WIFI_PASSWORD;
 WiFiUDP udp;
 const int UDP_PORT = 4210;
 char packetBuffer[255];
+EegPacketTracker eegTracker = {};  // seqによる順序・欠落の追跡
 
 // LED設定
 #define LED_PIN 48      // ESP32-S3のRGB LEDピン
@@ -89,13 +91,15 @@ void loop() {
     packetCount++;
     
     // パケット読み取り
-    int len = udp.read(packetBuffer, 255);
-    if (len > 0) {
-      packetBuffer[len] = 0;
+    int len = udp.read(packetBuffer, sizeof(packetBuffer));
+    EegPacket pkt;
+    // バイナリ(32B)/旧ASCIIを自動判別。解析できない・古い（seqが戻った）パケットは無視
+    if (!eeg_packet_receive(packetBuffer, len, &eegTracker, &pkt)) {
+      return;
     }
     
     // EEG値として解析
-    float eegValue = atof(packetBuffer);
+    float eegValue = pkt.value;
     
     // LED色を更新
     CRGB newColor = getEEGColor(eegValue);
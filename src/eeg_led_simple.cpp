@@ -1,5 +1,6 @@
 #include <WiFi.h>
 #include <WiFiUdp.h>
+#include "eeg_packet.hpp"
 
 // WiFi設定（.envから読み込み）
 #ifndef WIFI_SSID
@@ -16,6 +17,7 @@ const char* password = WIFI_PASSWORD;
 WiFiUDP udp;
 const int UDP_PORT = 4210;
 char packetBuffer[255];
+EegPacketTracker eegTracker = {};  // seqによる順序・欠落の追跡
 
 // M5Stamp S3のLED設定を複数試行
 const int LED_PINS[] = {2, 8, 48, 21, 47};  // 可能性のあるピン
@@ -106,12 +108,14 @@ void loop() {
   if (packetSize) {
     packetCount++;
     
-    int len = udp.read(packetBuffer, 255);
-    if (len > 0) {
-      packetBuffer[len] = 0;
+    int len = udp.read(packetBuffer, sizeof(packetBuffer));
+    EegPacket pkt;
+    // バイナリ(32B)/旧ASCIIを自動判別。解析できない・古い（seqが戻った）パケットは無視
+    if (!eeg_packet_receive(packetBuffer, len, &eegTracker, &pkt)) {
+      return;
     }
-    
-    float eegValue = atof(packetBuffer);
+
+    float eegValue = pkt.value;
     
     // EEG値に応じたLED明度制御
     int brightness = (int)(eegValue * 51);  // 0-5 -> 0-255
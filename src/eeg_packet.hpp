@@ -0,0 +1,111 @@
+#pragma once
+// EEG制御パケットの受信処理（GUI/pieeg/packet.py と同じ形式）
+//
+// バイナリ形式: 32バイト・リトルエンディアン
+//   magic 0xE5 / version 1 / seq u16 / 送信側monotonic時刻 u32 [us] / 制御値 f32 /
+//   帯域パワー f32 x5 (delta, theta, alpha, beta, gamma)
+// それ以外のペイロードは旧形式のASCII数値 ("2.35") として解釈するので、
+// 旧送信スクリプト（test_udp_sender.py など）もそのまま使える。
+
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+
+static const uint8_t EEG_PACKET_MAGIC = 0xE5;
+static const uint8_t EEG_PACKET_VERSION = 1;
+static const int EEG_PACKET_SIZE = 32;
+// これ以上seqが戻ったら送信側の再起動とみなす（それ未満の戻り・重複は古いパケットとして捨てる）
+static const int EEG_PACKET_RESTART_WINDOW = 256;
+
+struct __attribute__((packed)) EegPacketWire {
+  uint8_t magic;
+  uint8_t version;
+  uint16_t seq;
+  uint32_t t_us;
+  float value;
+  float bands[5];
+};
+static_assert(sizeof(EegPacketWire) == 32, "EEG packet must be 32 bytes");
+
+struct EegPacket {
+  bool binary;     // false: 旧ASCII形式（seq/t_us/bandsは0）
+  uint16_t seq;
+  uint32_t t_us;
+  float value;
+  float bands[5];  // delta, theta, alpha, beta, gamma
+};
+
+// 受信したペイロードを解析。数値として読めなければ false
+static inline bool eeg_packet_parse(const uint8_t* buf, int len, EegPacket* out) {
+  if (len == EEG_PACKET_SIZE && buf[0] == EEG_PACKET_MAGIC) {
+    if (buf[1] != EEG_PACKET_VERSION) return false;
+    EegPacketWire w;
+    memcpy(&w, buf, sizeof(w));  // ESP32はリトルエンディアンなのでそのまま
+    out->binary = true;
+    out->seq = w.seq;
+    out->t_us = w.t_us;
+    out->value = w.value;
+    memcpy(out->bands, w.bands, sizeof(out->bands));
+    return true;
+  }
+  if (len <= 0 || len >= 32) return false;
+  char text[32];
+  memcpy(text, buf, len);
+  text[len] = 0;
+  char* end;
+  float v = strtof(text, &end);
+  if (end == text) return false;
+  out->binary = false;
+  out->seq = 0;
+  out->t_us = 0;
+  out->value = v;
+  memset(out->bands, 0, sizeof(out->bands));
+  return true;
+}
+
+// 順序・遅延の追跡（送信元1つにつき1個）
+struct EegPacketTracker {
+  bool valid;
+  uint16_t last_seq;
+  uint32_t last_t_us;    // 最後に受け付けたパケットの送信側時刻
+  uint32_t dropped;      // 古い・重複で捨てたパケット数
+  uint32_t lost;         // seqの飛びから推定した未着パケット数
+  bool offset_valid;
+  uint32_t min_offset;   // (受信micros - 送信t_us) の最小値 = 最速パケットの基準
+};
+
+// 新しいパケットなら true（ASCII形式は常に true）
+static inline bool eeg_packet_accept(EegPacketTracker* tr, const EegPacket* p) {
+  if (!p->binary) return true;
+  if (tr->valid) {
+    int16_t diff = (int16_t)(uint16_t)(p->seq - tr->last_seq);
+    // seqが少し戻っても、送信時刻が前回より後なら遅れたパケットではなく送信側の再起動
+    bool restarted = (int32_t)(p->t_us - tr->last_t_us) > 0;
+    if (diff <= 0 && diff >= -EEG_PACKET_RESTART_WINDOW && !restarted) {
+      tr->dropped++;
+      return false;
+    }
+    // 大きな飛びは送信側の再起動（開始seqは乱数）なので欠落に数えない
+    if (diff > 1 && diff <= EEG_PACKET_RESTART_WINDOW) tr->lost += diff - 1;
+  }
+  tr->valid = true;
+  tr->last_seq = p->seq;
+  tr->last_t_us = p->t_us;
+  return true;
+}
+
+// 最速パケットに対する遅延 [us]（時計のずれを含まない相対値、ASCII形式は0）
+static inline uint32_t eeg_packet_delay_us(EegPacketTracker* tr, const EegPacket* p, uint32_t now_us) {
+  if (!p->binary) return 0;
+  uint32_t offset = now_us - p->t_us;
+  if (!tr->offset_valid || (int32_t)(offset - tr->min_offset) < 0) {
+    tr->min_offset = offset;
+    tr->offset_valid = true;
+  }
+  return offset - tr->min_offset;
+}
+
+// udp.read() したペイロードを解析し、新しいパケットなら true（pktに結果）
+static inline bool eeg_packet_receive(const char* buf, int len, EegPacketTracker* tr, EegPacket* out) {
+  return eeg_packet_parse((const uint8_t*)buf, len, out) && eeg_packet_accept(tr, out);
+}
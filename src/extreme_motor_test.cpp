@@ -1,6 +1,7 @@
 #include <Arduino.h>
 #include <WiFi.h>
 #include <WiFiUdp.h>
+#include "eeg_packet.hpp"
 
 // WiFi設定
 #ifndef WIFI_SSID
@@ -17,6 +18,7 @@ const char* password = WIFI_PASSWORD;
 WiFiUDP udp;
 const int UDP_PORT = 4210;
 char packetBuffer[255];
+EegPacketTracker eegTracker = {};  // seqによる順序・欠落の追跡
 
 // モータピン
 const int motorPins[] = {5, 42, 10, 41};
@@ -208,12 +210,10 @@ void loop() {
     if (packetSize) {
         packetCount++;
         
-        int len = udp.read(packetBuffer, 255);
-        if (len > 0) {
-            packetBuffer[len] = 0;
-        }
-        
-        float newEegValue = atof(packetBuffer);
+        int len = udp.read(packetBuffer, sizeof(packetBuffer));
+        EegPacket pkt;
+        // バイナリ(32B)/旧ASCIIを自動判別。解析できない・古い（seqが戻った）パケットは範囲外の値にして捨てる
+        float newEegValue = eeg_packet_receive(packetBuffer, len, &eegTracker, &pkt) ? pkt.value : -1.0f;
         
         if (newEegValue >= 0.0f && newEegValue <= 10.0f) {
             current_eeg_value = newEegValue;
@@ -1,6 +1,7 @@
 // Canvas rendering: 16ch stacked waveform + band-power bars. No dependencies.
 
 import type { Bands } from "./fft";
+import type { RawRow } from "./source";
 
 const BAND_ORDER = ["delta", "theta", "alpha", "beta", "gamma"];
 const BAND_COLORS: Record<string, string> = {
@@ -25,7 +26,7 @@ function fitCanvas(canvas: HTMLCanvasElement): CanvasRenderingContext2D {
 }
 
 // Stacked 16-channel waveform, autoscaled to a shared per-frame amplitude.
-export function drawWaveform(canvas: HTMLCanvasElement, raw: number[][]): void {
+export function drawWaveform(canvas: HTMLCanvasElement, raw: RawRow[]): void {
   const ctx = fitCanvas(canvas);
   const w = canvas.clientWidth;
   const h = canvas.clientHeight;
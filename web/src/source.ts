@@ -1,14 +1,18 @@
 // Unified frame source: either the in-browser simulator or a live server WS.
 // Both push the same Frame shape to a callback so chart.ts is source-agnostic.
 
-import { bandPowersMean, bandPowersPerCh, type Bands } from "./fft";
+import { BANDS, bandPowersMean, bandPowersPerCh, type Bands } from "./fft";
 import { NCH, SRATE, SimulatedPiEEG16 } from "./simulator";
 
+// One sample across channels: a plain array (simulator, JSON) or a
+// Float32Array view into a binary frame.
+export type RawRow = ArrayLike<number> & Iterable<number>;
+
 export interface Frame {
   ts: number;
   srate: number;
   channels: number;
-  raw: number[][]; // [N samples][ch]
+  raw: RawRow[]; // [N samples][ch]
   displayHz: number;
   bands: Bands;
   bandsPerCh: Record<string, number[]>;
@@ -75,16 +79,63 @@ export class SimulatorSource implements Source {
   }
 }
 
+// ---- Binary frames (GUI/pieeg/frameserver.py) -----------------------------
+//
+// 32-byte little-endian header, then float32 raw[rows][ch], bands[nb] and
+// bandsPerCh[nb][ch] in BANDS order:
+//   0 "PEEG" | 4 u8 version | 5 u8 nb | 6 u16 ch | 8 u32 rows |
+//   12 f32 srate | 16 f32 display_hz | 20 u32 reserved | 24 f64 ts
+
+const FRAME_MAGIC = 0x47454550; // "PEEG" as a little-endian u32
+const FRAME_VERSION = 1;
+const FRAME_HEADER = 32;
+
+// Raw rows are subarray views of one Float32Array over the received buffer:
+// no text parsing and no copy (every browser platform is little-endian).
+export function decodeBinaryFrame(buf: ArrayBuffer): Frame {
+  const h = new DataView(buf);
+  if (h.getUint32(0, true) !== FRAME_MAGIC || h.getUint8(4) !== FRAME_VERSION) {
+    throw new Error("not a pieeg binary frame");
+  }
+  const nb = h.getUint8(5);
+  const ch = h.getUint16(6, true);
+  const rows = h.getUint32(8, true);
+  const data = new Float32Array(buf, FRAME_HEADER, rows * ch + nb + nb * ch);
+  const raw: Float32Array[] = new Array(rows);
+  for (let i = 0; i < rows; i++) raw[i] = data.subarray(i * ch, (i + 1) * ch);
+  const bands: Bands = {};
+  const bandsPerCh: Record<string, number[]> = {};
+  Object.keys(BANDS)
+    .slice(0, nb)
+    .forEach((name, b) => {
+      bands[name] = data[rows * ch + b];
+      const at = rows * ch + nb + b * ch;
+      bandsPerCh[name] = Array.from(data.subarray(at, at + ch));
+    });
+  return {
+    ts: h.getFloat64(24, true),
+    srate: h.getFloat32(12, true),
+    channels: ch,
+    raw,
+    displayHz: h.getFloat32(16, true),
+    bands,
+    bandsPerCh,
+    source: "server",
+  };
+}
+
 // ---- Server (live PiEEG via WebSocket) ------------------------------------
 
 export class ServerSource implements Source {
   private ws: WebSocket | null = null;
   private closed = false;
 
+  // binary: ask for Float32 frames; servers that only speak JSON ignore it.
   constructor(
     private url: string,
     private onFrame: FrameHandler,
     private onStatus: StatusHandler,
+    private binary = true,
   ) {}
 
   start(): void {
@@ -107,9 +158,17 @@ export class ServerSource implements Source {
       return;
     }
     this.ws = ws;
-    ws.onopen = () => this.onStatus(true, `接続済み ${this.url}`);
+    ws.binaryType = "arraybuffer";
+    ws.onopen = () => {
+      if (this.binary) ws.send(JSON.stringify({ formats: ["f32", "json"] }));
+      this.onStatus(true, `接続済み ${this.url}`);
+    };
     ws.onmessage = (ev) => {
       try {
+        if (ev.data instanceof ArrayBuffer) {
+          this.onFrame(decodeBinaryFrame(ev.data));
+          return;
+        }
         const d = JSON.parse(ev.data);
         this.onFrame({
           ts: d.ts,
@@ -0,0 +1,43 @@
+import { describe, expect, it } from "vitest";
+import { BANDS, bandPowersPerCh } from "../src/fft";
+import fixture from "./fixtures/bandpower_parity.json";
+
+// The expected values come from the Python implementation
+// (GUI/pieeg/bandpower.py), so this keeps the two in lockstep.
+
+interface Component {
+  freq: number;
+  amp: number;
+  phase: number;
+}
+
+function makeWindow(c: { srate: number; n: number; channels: number; offset: number[]; components: Component[] }): number[][] {
+  const rows: number[][] = [];
+  for (let i = 0; i < c.n; i++) {
+    const row: number[] = [];
+    for (let ch = 0; ch < c.channels; ch++) {
+      let v = c.offset[ch];
+      for (const k of c.components) v += k.amp * Math.sin((2 * Math.PI * k.freq * i) / c.srate + k.phase * (ch + 1));
+      row.push(v);
+    }
+    rows.push(row);
+  }
+  return rows;
+}
+
+describe("band power parity with pieeg.bandpower", () => {
+  it("uses the same band order", () => {
+    expect(fixture.bands).toEqual(Object.keys(BANDS));
+  });
+
+  for (const c of fixture.cases) {
+    it(c.name, () => {
+      const out = bandPowersPerCh(makeWindow(c), c.srate);
+      c.expected.forEach((perBand, ch) => {
+        fixture.bands.forEach((name, b) => {
+          expect(out[name][ch]).toBeCloseTo(perBand[b], 6);
+        });
+      });
+    });
+  }
+});
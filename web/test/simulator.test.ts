@@ -1,6 +1,7 @@
 import { describe, expect, it } from "vitest";
 import { bandPowersMean } from "../src/fft";
 import { NCH, SimulatedPiEEG16 } from "../src/simulator";
+import parity from "./fixtures/simulator_parity.json";
 
 describe("SimulatedPiEEG16", () => {
   it("produces 16 channels per sample", () => {
@@ -35,4 +36,15 @@ describe("SimulatedPiEEG16", () => {
     const topTwo = ranked.slice(0, 2).map(([k]) => k);
     expect(topTwo).toContain("alpha");
   });
+
+  // Expected samples come from the Python port (GUI/pieeg/simulator.py).
+  for (const c of parity.cases) {
+    it(`matches pieeg.simulator sample for sample (seed ${c.seed}, from sample ${c.skip})`, () => {
+      const dev = new SimulatedPiEEG16(parity.srate, c.seed);
+      dev.readChunk(c.skip);
+      dev.readChunk(c.expected.length).forEach((row, i) => {
+        row.forEach((v, ch) => expect(v).toBeCloseTo(c.expected[i][ch], 9));
+      });
+    });
+  }
 });
@@ -0,0 +1,47 @@
+import { describe, expect, it } from "vitest";
+import { decodeBinaryFrame } from "../src/source";
+import fixture from "./fixtures/frame_binary.json";
+
+// One frame from GUI/pieeg/frameserver.py, encoded both ways: the binary
+// decoder must give what ServerSource reads from the JSON text.
+
+function toArrayBuffer(b64: string): ArrayBuffer {
+  const bytes = Uint8Array.from(atob(b64), (c) => c.charCodeAt(0));
+  return bytes.buffer;
+}
+
+describe("decodeBinaryFrame", () => {
+  const f = decodeBinaryFrame(toArrayBuffer(fixture.binary_base64));
+  const j = fixture.frame;
+
+  it("reads the header", () => {
+    expect(f.ts).toBe(j.ts);
+    expect(f.srate).toBe(j.srate);
+    expect(f.channels).toBe(j.channels);
+    expect(f.displayHz).toBe(j.display_hz);
+    expect(f.source).toBe("server");
+  });
+
+  it("maps raw samples as Float32Array rows", () => {
+    expect(f.raw.length).toBe(j.raw.length);
+    f.raw.forEach((row, i) => {
+      expect(row).toBeInstanceOf(Float32Array);
+      expect(row.length).toBe(j.channels);
+      // JSON carries 2 decimals
+      Array.from(row).forEach((v, ch) => expect(v).toBeCloseTo(j.raw[i][ch], 2));
+    });
+  });
+
+  it("reads mean and per-channel band powers", () => {
+    for (const [name, v] of Object.entries(j.bands)) {
+      expect(f.bands[name]).toBeCloseTo(v, 3);
+      f.bandsPerCh[name].forEach((p, ch) =>
+        expect(p).toBeCloseTo((j.bands_per_ch as Record<string, number[]>)[name][ch], 3),
+      );
+    }
+  });
+
+  it("rejects other binary payloads", () => {
+    expect(() => decodeBinaryFrame(new ArrayBuffer(32))).toThrow();
+  });
+});